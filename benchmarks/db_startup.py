@@ -0,0 +1,64 @@
+"""
+Бенчмарк времени старта DatabaseManager: холодный старт, теплый старт и прежняя схема
+(все DDL-запросы на каждом старте)
+
+Запуск из корня проекта: python -m benchmarks.db_startup [--runs 50]
+"""
+
+import argparse
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from database import DatabaseManager
+from db_migrations import MIGRATIONS
+
+
+def _measure(runs: int, func) -> list[float]:
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - started) * 1000)
+    return timings
+
+
+def _report(name: str, timings: list[float]):
+    p95 = sorted(timings)[max(0, int(len(timings) * 0.95) - 1)]
+    print(f"{name:<32} median {statistics.median(timings):8.3f} ms   p95 {p95:8.3f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=50)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        counter = iter(range(args.runs * 2))
+
+        def cold_start():
+            DatabaseManager(str(Path(tmp_dir) / f"cold_{next(counter)}.db")).close()
+
+        warm_path = str(Path(tmp_dir) / "warm.db")
+        DatabaseManager(warm_path).close()
+
+        def warm_start():
+            DatabaseManager(warm_path).close()
+
+        def legacy_start():
+            # Так старт выглядел без учета версии схемы: все шаги выполняются каждый раз
+            db = DatabaseManager(warm_path)
+            with db.pool.connection() as conn:
+                cursor = conn.cursor()
+                for migration in MIGRATIONS:
+                    migration.apply(cursor)
+            db.close()
+
+        _report("Холодный старт (новая БД)", _measure(args.runs, cold_start))
+        _report("Теплый старт (миграции)", _measure(args.runs, warm_start))
+        _report("Теплый старт (все DDL)", _measure(args.runs, legacy_start))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""
+Бенчмарк памяти на задачи проекта: объекты jira.Issue (граф Resource вместе с исходным JSON)
+против записей IssueSnapshot, построенных из того же JSON ответа поиска
+
+Запуск из корня проекта: python -m benchmarks.issue_memory [--issues 10000]
+"""
+
+import argparse
+import gc
+import json
+import tracemalloc
+from collections.abc import Callable
+
+from jira.resources import Issue
+
+from issue_snapshot import IssueSnapshot
+
+CLOSED_STATUSES = frozenset({"Done", "Закрыто"})
+STATUSES = ["Open", "In Progress", "Review", "Done", "Закрыто"]
+
+
+def _user(number: int) -> dict:
+    name = f"user{number}"
+    return {
+        "self": f"https://jira.example.com/rest/api/2/user?username={name}",
+        "name": name,
+        "key": name,
+        "emailAddress": f"{name}@example.com",
+        "avatarUrls": {
+            size: f"https://jira.example.com/secure/useravatar?size={size}&ownerId={name}"
+            for size in ("48x48", "24x24", "16x16", "32x32")
+        },
+        "displayName": f"Пользователь {number}",
+        "active": True,
+        "timeZone": "Europe/Moscow",
+    }
+
+
+def _status(name: str) -> dict:
+    return {
+        "self": f"https://jira.example.com/rest/api/2/status/{name}",
+        "description": "",
+        "iconUrl": "https://jira.example.com/images/icons/statuses/generic.png",
+        "name": name,
+        "id": str(STATUSES.index(name) + 1),
+        "statusCategory": {"self": "", "id": 2, "key": "new", "colorName": "blue-gray", "name": "To Do"},
+    }
+
+
+def _raw_issue(number: int, with_changelog: bool) -> dict:
+    status = STATUSES[number % len(STATUSES)]
+    raw = {
+        "expand": "operations,versionedRepresentations,editmeta,changelog,renderedFields",
+        "id": str(100000 + number),
+        "self": f"https://jira.example.com/rest/api/2/issue/{100000 + number}",
+        "key": f"PRJ-{number}",
+        "fields": {
+            "summary": f"Задача номер {number}: доработка отчета",
+            "status": _status(status),
+            "assignee": _user(number % 25),
+            "issuetype": {"self": "", "id": "3", "name": "Task", "subtask": False, "iconUrl": ""},
+            "duedate": f"2026-{number % 12 + 1:02d}-15",
+            "created": "2026-01-10T09:15:00.000+0300",
+            "updated": "2026-10-15T18:45:12.345+0300",
+            "timeoriginalestimate": 3600 * (number % 16),
+            "timespent": 1800 * (number % 40),
+            "timeestimate": 900 * (number % 8),
+        },
+    }
+    if with_changelog:
+        raw["changelog"] = {
+            "startAt": 0,
+            "maxResults": 3,
+            "total": 3,
+            "histories": [
+                {
+                    "id": str(number * 10 + step),
+                    "author": _user(step),
+                    "created": f"2026-10-{10 + step:02d}T12:00:00.000+0300",
+                    "items": [
+                        {
+                            "field": "status",
+                            "fieldtype": "jira",
+                            "from": "1",
+                            "fromString": "Open",
+                            "to": "4",
+                            "toString": STATUSES[step + 2],
+                        }
+                    ],
+                }
+                for step in range(3)
+            ],
+        }
+    return raw
+
+
+def _retained_bytes(payload: str, build: Callable[[dict], object]) -> int:
+    """Память, занятая записями после того, как разобранный JSON страницы освобожден"""
+    gc.collect()
+    tracemalloc.start()
+    raw_issues = json.loads(payload)
+    records = [build(raw) for raw in raw_issues]
+    del raw_issues
+    gc.collect()
+    retained, _peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del records
+    return retained
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--issues", type=int, default=10000)
+    args = parser.parse_args()
+
+    options = {"server": "https://jira.example.com"}
+    builders = {
+        "jira.Issue": lambda raw: Issue(options, None, raw=raw),
+        "IssueSnapshot": lambda raw: IssueSnapshot.from_json(raw, CLOSED_STATUSES),
+    }
+    for profile, with_changelog in (("monitor", False), ("analytics", True)):
+        payload = json.dumps([_raw_issue(number, with_changelog) for number in range(args.issues)])
+        for name, build in builders.items():
+            retained = _retained_bytes(payload, build)
+            print(
+                f"{profile:<10} {name:<14} {args.issues} задач: {retained / 2**20:7.2f} МБ "
+                f"({retained / args.issues:6.0f} байт на задачу)"
+            )
+
+
+if __name__ == "__main__":
+    main()
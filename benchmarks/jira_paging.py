@@ -0,0 +1,45 @@
+"""
+Бенчмарк постраничной выборки задач: последовательные страницы и параллельные волны
+на имитации сервера Jira с фиксированной задержкой ответа
+
+Запуск из корня проекта: python -m benchmarks.jira_paging [--issues 5000] [--page-size 100] [--latency-ms 150]
+"""
+
+import argparse
+import time
+from types import SimpleNamespace
+
+from jira.client import ResultList
+
+from jira_search import IssueStream
+
+
+class _LatencyJira:
+    def __init__(self, issues: int, latency_ms: float):
+        self.issues = [SimpleNamespace(key=f"PRJ-{i}") for i in range(issues)]
+        self.latency = latency_ms / 1000
+
+    def search_issues(self, jql, startAt=0, maxResults=50, fields=None, expand=None):
+        time.sleep(self.latency)
+        page = self.issues[startAt : startAt + maxResults]
+        return ResultList(page, _startAt=startAt, _maxResults=maxResults, _total=len(self.issues))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--issues", type=int, default=5000)
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--latency-ms", type=float, default=150)
+    args = parser.parse_args()
+
+    jira = _LatencyJira(args.issues, args.latency_ms)
+    for concurrency in (1, 2, 4, 8):
+        stream = IssueStream(jira, "project = PRJ", page_size=args.page_size, concurrency=concurrency)
+        started = time.perf_counter()
+        count = sum(1 for _ in stream)
+        elapsed = time.perf_counter() - started
+        print(f"concurrency {concurrency:<2} {count} задач, {stream.pages} страниц: {elapsed:6.2f} с")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Бенчмарк CPU на разбор страниц ответа /rest/api/2/search: объекты jira.Issue из response.json()
+против записей IssueSnapshot из JSON, разобранного json и orjson (прямая выборка RawSearchClient)
+
+Запуск из корня проекта: python -m benchmarks.search_parse [--issues 10000] [--page-size 100]
+"""
+
+import argparse
+import json
+import time
+from collections.abc import Callable
+
+from jira.resources import Issue
+
+from benchmarks.issue_memory import CLOSED_STATUSES, _raw_issue
+from issue_snapshot import IssueSnapshot
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _measure(pages: list[bytes], decode: Callable[[bytes], dict], build: Callable[[dict], object]) -> float:
+    started = time.perf_counter()
+    for page in pages:
+        [build(raw) for raw in decode(page)["issues"]]
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--issues", type=int, default=10000)
+    parser.add_argument("--page-size", type=int, default=100)
+    args = parser.parse_args()
+
+    options = {"server": "https://jira.example.com"}
+    variants = {
+        "json + jira.Issue": (json.loads, lambda raw: Issue(options, None, raw=raw)),
+        "json + IssueSnapshot": (json.loads, lambda raw: IssueSnapshot.from_json(raw, CLOSED_STATUSES)),
+    }
+    if orjson is not None:
+        variants["orjson + IssueSnapshot"] = (orjson.loads, lambda raw: IssueSnapshot.from_json(raw, CLOSED_STATUSES))
+    else:
+        print("orjson не установлен: вариант orjson пропущен")
+
+    for profile, with_changelog in (("monitor", False), ("analytics", True)):
+        issues = [_raw_issue(number, with_changelog) for number in range(args.issues)]
+        pages = [
+            json.dumps(
+                {"startAt": start, "total": args.issues, "issues": issues[start : start + args.page_size]}
+            ).encode()
+            for start in range(0, args.issues, args.page_size)
+        ]
+        for name, (decode, build) in variants.items():
+            elapsed = _measure(pages, decode, build)
+            print(
+                f"{profile:<10} {name:<24} {args.issues} задач: {elapsed * 1000:8.1f} мс "
+                f"({elapsed / args.issues * 1e6:6.1f} мкс на задачу)"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -31,6 +31,7 @@ class BotCommandHandler:
             "status": self.cmd_status,
             "analytics": self.cmd_analytics,
             "list_users": self.cmd_list_users,
+            "db_stats": self.cmd_db_stats,
         }
 
     def handle_message(
@@ -162,6 +163,8 @@ class BotCommandHandler:
             "пользователи": "list_users",
             "список пользователей": "list_users",
             "кто подключен": "list_users",
+            "db_stats": "db_stats",
+            "статистика бд": "db_stats",
         }
 
         # Преобразуем алиас в основную команду
@@ -181,7 +184,7 @@ class BotCommandHandler:
                 break
 
         # Проверяем права доступа для админских команд
-        admin_commands = ["monitor_now", "all_subscriptions", "delete_subscription", "list_users"]
+        admin_commands = ["monitor_now", "all_subscriptions", "delete_subscription", "list_users", "db_stats"]
         if command in admin_commands and not mattermost_client.is_user_admin(user_email):
             return "❌ У вас нет прав для выполнения этой команды"
 
@@ -295,6 +298,7 @@ class BotCommandHandler:
 • `all_subscriptions` - просмотреть все подписки в системе
 • `delete_subscription <PROJECT_KEY> <CHANNEL_ID>` - удалить подписку
 • `list_users` - список пользователей с настройками Jira
+• `db_stats [N]` - топ-N методов базы данных по суммарному времени
 
 """
         else:
@@ -345,8 +349,13 @@ class BotCommandHandler:
         try:
             from user_jira_client import user_jira_client
 
-            # Проверяем существование проекта в Jira через персональное подключение
-            project_info = user_jira_client.get_project_info(user_email, project_key)
+            # Проект из закешированного списка проектов пользователя проверяется без запроса к Jira.
+            # Иначе (список не загружен или устарел) — через персональное подключение
+            catalog = user_jira_client.get_cached_project_catalog(user_email)
+            if catalog and project_key in catalog:
+                project_info = (project_key, catalog[project_key])
+            else:
+                project_info = user_jira_client.get_project_info(user_email, project_key)
             if not project_info:
                 return f"❌ Проект {project_key} не найден в Jira или нет доступа"
 
@@ -410,7 +419,7 @@ class BotCommandHandler:
         if not channel_id:
             return "❌ Команда доступна только в каналах"
 
-        subscriptions = db_manager.get_subscriptions_by_channel(channel_id)
+        subscriptions = db_manager.subscriptions.by_channel(channel_id)
 
         if not subscriptions:
             return (
@@ -420,9 +429,9 @@ class BotCommandHandler:
 
         result = f"📋 **Активные подписки в канале ({len(subscriptions)}):**\n\n"
 
-        for project_key, project_name, subscribed_by, created_at, _active in subscriptions:
-            result += f"• **{project_key}** - {project_name}\n"
-            result += f"  _Подписал: {subscribed_by}, {created_at[:10]}_\n\n"
+        for subscription in subscriptions:
+            result += f"• **{subscription.project_key}** - {subscription.project_name}\n"
+            result += f"  _Подписал: {subscription.subscribed_by_email}, {(subscription.created_at or '')[:10]}_\n\n"
 
         result += "Для отписки используйте: `unsubscribe PROJECT_KEY`"
 
@@ -440,67 +449,10 @@ class BotCommandHandler:
 
 Сначала настройте подключение командой: `setup_jira username password`"""
 
-            # Получаем все проекты через paginated endpoint
-            # Jira API отдает проекты страницами, поэтому идем по всем страницам
-            all_projects = []
-            start_at = 0
-            max_results = 50
-
-            # Простой класс для представления проекта
-            class Project:
-                def __init__(self, data):
-                    self.key = data.get("key", "")
-                    self.name = data.get("name", "")
-                    self.id = data.get("id", "")
-
-            try:
-                while True:
-                    # Используем endpoint с поддержкой пагинации
-                    url = jira_client._options["server"] + "/rest/api/2/project/search"
-                    params = {
-                        "startAt": start_at,
-                        "maxResults": max_results,
-                        "expand": "description,lead,url,projectKeys",
-                    }
-
-                    response = jira_client._session.get(url, params=params)
-                    response.raise_for_status()
-                    payload = response.json()
-
-                    # /project/search возвращает {"values": [...], ...}, но для совместимости
-                    # поддерживаем и старый формат списка.
-                    if isinstance(payload, dict):
-                        projects_data = payload.get("values", [])
-                        is_last = payload.get("isLast")
-                    else:
-                        projects_data = payload
-                        is_last = None
-
-                    if not projects_data:
-                        break
-
-                    # Преобразуем данные в объекты Project
-                    for project_data in projects_data:
-                        all_projects.append(Project(project_data))
-
-                    # Если Jira явно сообщает конец или данных меньше страницы — выходим
-                    if is_last is True or len(projects_data) < max_results:
-                        break
-
-                    start_at += max_results
-
-                projects = all_projects
-                logger.info(f"Получено {len(projects)} проектов через API с пагинацией")
-
-            except Exception as api_error:
-                # Если прямой вызов API не сработал, используем стандартный метод
-                logger.warning(f"Не удалось получить все проекты через API, используем стандартный метод: {api_error}")
-                try:
-                    projects = list(jira_client.projects())
-                    logger.info(f"Получено {len(projects)} проектов через стандартный метод")
-                except Exception as e:
-                    logger.error(f"Ошибка получения проектов: {e}")
-                    return f"❌ **Ошибка получения списка проектов:** {e!s}"
+            # Список проектов кешируется: повторные вызовы при настройке подписок не обращаются к Jira
+            projects = user_jira_client.get_project_catalog(user_email)
+            if projects is None:
+                return "❌ **Ошибка получения списка проектов**"
 
             if not projects:
                 return "ℹ️ **Доступные проекты не найдены**"
@@ -510,22 +462,21 @@ class BotCommandHandler:
 
             # Группируем проекты по первым буквам для удобства
             projects_by_letter = {}
-            for project in projects:
-                first_letter = project.key[0].upper()
+            for project_key in projects:
+                first_letter = project_key[0].upper()
                 if first_letter not in projects_by_letter:
                     projects_by_letter[first_letter] = []
-                projects_by_letter[first_letter].append(project)
+                projects_by_letter[first_letter].append(project_key)
 
             # Сортируем по ключам
             for letter in sorted(projects_by_letter.keys()):
                 result += f"**{letter}:**\n"
-                for project in sorted(projects_by_letter[letter], key=lambda x: x.key):
-                    result += f"• `{project.key}` - {project.name}\n"
+                for project_key in sorted(projects_by_letter[letter]):
+                    result += f"• `{project_key}` - {projects[project_key]}\n"
                 result += "\n"
 
             result += "💡 **Для подписки на проект используйте:** `subscribe PROJECT_KEY`\n"
-            if projects:
-                result += f"**Пример:** `subscribe {projects[0].key}`"
+            result += f"**Пример:** `subscribe {next(iter(projects))}`"
 
             return result
 
@@ -700,12 +651,7 @@ class BotCommandHandler:
         """Показать список пользователей с настройками Jira"""
         # Получаем всех пользователей с настройками Jira из БД
         try:
-            import sqlite3
-
-            with sqlite3.connect(db_manager.db_path) as conn:
-                cursor = conn.cursor()
-                cursor.execute("SELECT user_email, jira_username FROM user_jira_settings")
-                users = cursor.fetchall()
+            users = db_manager.get_jira_users()
         except Exception as e:
             return f"❌ Ошибка получения списка пользователей: {e}"
 
@@ -721,6 +667,36 @@ class BotCommandHandler:
 
         return "\n".join(message_parts)
 
+    def cmd_db_stats(self, args: list[str], user_email: str) -> str:
+        """Показать методы базы данных с наибольшим суммарным временем (только для администраторов)"""
+        limit = 10
+        if args:
+            try:
+                limit = int(args[0])
+                if limit < 1 or limit > 50:
+                    return "❌ Количество методов должно быть от 1 до 50"
+            except ValueError:
+                return "❌ Некорректное количество методов"
+
+        stats = db_manager.get_db_metrics(limit)
+        if not stats:
+            return "📊 Обращений к базе данных пока не было"
+
+        result = f"📊 **Топ-{len(stats)} методов БД по времени:**\n\n"
+        for item in stats:
+            result += (
+                f"• `{item['method']}` — {item['calls']} вызовов, всего {item['total_ms']:.1f} мс, "
+                f"p95 {item['p95_ms']:.1f} мс, строк {item['rows']}"
+            )
+            if item["slow"]:
+                result += f", медленных {item['slow']}"
+            if item["errors"]:
+                result += f", ошибок {item['errors']}"
+            result += "\n"
+
+        result += f"\n_Порог медленного вызова: {db_manager.metrics.slow_query_ms:.0f} мс_"
+        return result
+
     def cmd_run_subscriptions(
         self,
         args: list[str],
@@ -733,22 +709,16 @@ class BotCommandHandler:
         if not channel_id:
             return "❌ Команда доступна только в каналах"
 
-        # Проверяем, есть ли подписки для данного канала
-        subscriptions = db_manager.get_subscriptions_by_channel(channel_id)
+        # Проверяем, есть ли активные подписки для данного канала (реестр содержит только активные)
+        subscriptions = db_manager.subscriptions.by_channel(channel_id)
         if not subscriptions:
             return "ℹ️ В этом канале нет активных подписок на проекты. Используйте `subscribe PROJECT_KEY` для добавления подписок."
 
-        # Все подписки уже активные (фильтр в SQL)
-        active_subscriptions = subscriptions
-        if not active_subscriptions:
-            return "ℹ️ В этом канале нет активных подписок. Активируйте подписки или добавьте новые."
-
         try:
             from project_monitor import project_monitor
 
             # Запускаем мониторинг только для подписок этого канала
-            # subscription: (project_key, project_name, subscribed_by_email, created_at, active)
-            project_keys = [sub[0] for sub in active_subscriptions]  # sub[0] - project_key
+            project_keys = [subscription.project_key for subscription in subscriptions]
 
             logger.info(f"Запуск ручной проверки подписок канала {channel_id}: {project_keys}")
 
@@ -789,47 +759,40 @@ class BotCommandHandler:
             return f"❌ Ошибка запуска мониторинга: {e!s}"
 
     def cmd_history(self, args: list[str], user_email: str) -> str:
-        """Показать историю проверок"""
+        """Показать историю уведомлений"""
         days = 7  # По умолчанию за неделю
 
         if args:
             try:
                 days = int(args[0])
-                if days < 1 or days > 30:
-                    return "❌ Количество дней должно быть от 1 до 30"
+                if days < 1 or days > 365:
+                    return "❌ Количество дней должно быть от 1 до 365"
             except ValueError:
                 return "❌ Некорректное количество дней"
 
-        history = db_manager.get_check_history(days)
-
-        if not history:
-            return f"📊 Нет данных за последние {days} дней"
-
-        # Группируем по датам
-        by_date = {}
-        for check_date, email, name, has_worklog, hours in history:
-            if check_date not in by_date:
-                by_date[check_date] = {"with": [], "without": []}
-
-            user_info = f"{name or email}"
-            if has_worklog:
-                user_info += f" ({hours:.1f}ч)"
-                by_date[check_date]["with"].append(user_info)
-            else:
-                by_date[check_date]["without"].append(user_info)
-
-        message_parts = [f"📊 **История проверок за {days} дней:**\n"]
+        stats = db_manager.get_notification_stats(days)
 
-        for date in sorted(by_date.keys(), reverse=True):
-            data = by_date[date]
-            message_parts.append(f"**{date}:**")
+        if not stats:
+            return f"📊 Нет уведомлений за последние {days} дней"
 
-            if data["with"]:
-                message_parts.append(f"  ✅ Заполнили ({len(data['with'])}): {', '.join(data['with'])}")
+        # Группируем по датам и проектам
+        by_date: dict[str, dict[str, dict[str, int]]] = {}
+        for notification_date, project_key, notification_type, count in stats:
+            by_project = by_date.setdefault(notification_date, {})
+            by_type = by_project.setdefault(project_key, {})
+            by_type[notification_type] = by_type.get(notification_type, 0) + count
 
-            if data["without"]:
-                message_parts.append(f"  ❌ Не заполнили ({len(data['without'])}): {', '.join(data['without'])}")
+        type_labels = {"time_exceeded": "🚨 трудозатраты", "deadline_overdue": "⏰ сроки"}
+        message_parts = [f"📊 **История уведомлений за {days} дней:**\n"]
 
+        for notification_date in sorted(by_date.keys(), reverse=True):
+            message_parts.append(f"**{notification_date}:**")
+            for project_key, by_type in sorted(by_date[notification_date].items()):
+                counts = ", ".join(
+                    f"{type_labels.get(notification_type, notification_type)}: {count}"
+                    for notification_type, count in sorted(by_type.items())
+                )
+                message_parts.append(f"  • {project_key} — {counts}")
             message_parts.append("")
 
         return "\n".join(message_parts)
@@ -868,9 +831,50 @@ class BotCommandHandler:
         message_parts.append(f"**Jira:** {jira_status}")
 
         # Статистика подписок
-        subscriptions = db_manager.get_all_subscriptions()
-        active_subscriptions = [s for s in subscriptions if s[5]]  # активные подписки
-        message_parts.append(f"**Активные подписки:** {len(active_subscriptions)}")
+        message_parts.append(f"**Активные подписки:** {len(db_manager.subscriptions.all())}")
+
+        # Пул подключений к базе данных
+        pool_stats = db_manager.get_pool_stats()
+        message_parts.append(
+            f"**База данных:** подключений {pool_stats['active']} "
+            f"(создано {pool_stats['created']}, переиспользовано {pool_stats['reused']})"
+        )
+
+        # Кеш персональных подключений к Jira
+        try:
+            from user_jira_client import user_jira_client
+
+            cache_stats = user_jira_client.get_cache_stats()
+            message_parts.append(
+                f"**Подключения к Jira:** {cache_stats['size']} из {cache_stats['max_size']} "
+                f"(попаданий {cache_stats['hits']}, промахов {cache_stats['misses']}, "
+                f"вытеснено {cache_stats['evictions']}, закрыто по простою {cache_stats['expired']})"
+            )
+
+            from jira_transport import jira_transport
+
+            pool_stats = jira_transport.get_stats()
+            message_parts.append(
+                f"**HTTP-пул Jira:** соединений открыто {pool_stats['connections']}, "
+                f"запросов {pool_stats['requests']} (по открытым соединениям {pool_stats['reused']})"
+            )
+
+            from jira_governor import jira_governor
+
+            governor_stats = jira_governor.get_stats()
+            rate = ", ".join(
+                f"{host}: {host_stats['rate']:g} запр/с"
+                + (f", пауза {host_stats['paused_for']:g} с" if host_stats["paused_for"] else "")
+                for host, host_stats in governor_stats["hosts"].items()
+            )
+            message_parts.append(
+                f"**Ограничитель Jira:** {rate or 'запросов не было'}; "
+                f"ответов 429/503 {governor_stats['throttled']}, ожидание {governor_stats['wait_seconds']:g} с; "
+                f"параллельность по пользователям {governor_stats['limits'] or '—'} "
+                f"из {governor_stats['max_concurrency']}, выполняется {governor_stats['in_flight']}"
+            )
+        except Exception as e:
+            logger.error(f"Ошибка получения статистики подключений к Jira: {e}")
 
         # Последняя проверка
         history = db_manager.get_check_history(1)
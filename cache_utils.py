@@ -0,0 +1,215 @@
+"""
+Кеши в памяти процесса
+"""
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable, Hashable
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+
+class TTLCache:
+    """Потокобезопасный кеш с ограниченным временем жизни записей"""
+
+    def __init__(self, ttl_seconds: float, max_size: int = 1024):
+        self.ttl_seconds = ttl_seconds
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        # ключ -> (момент истечения по time.monotonic(), значение)
+        self._entries: dict[Hashable, tuple[float, Any]] = {}
+        self._hits = 0
+        self._misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl_seconds > 0 and self.max_size > 0
+
+    def get(self, key: Hashable) -> Any | None:
+        """Получить значение; None — записи нет или она устарела"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= now:
+                if entry is not None:
+                    del self._entries[key]
+                self._misses += 1
+                return None
+            self._hits += 1
+            return entry[1]
+
+    def set(self, key: Hashable, value: Any):
+        """Сохранить значение на ttl_seconds"""
+        if not self.enabled:
+            return
+        now = time.monotonic()
+        with self._lock:
+            if key not in self._entries and len(self._entries) >= self.max_size:
+                self._evict_expired(now)
+                if len(self._entries) >= self.max_size:
+                    # Вытесняем запись, которая истекает раньше всех
+                    del self._entries[min(self._entries, key=lambda k: self._entries[k][0])]
+            self._entries[key] = (now + self.ttl_seconds, value)
+
+    def update(self, key: Hashable, func: Callable[[Any], Any]) -> bool:
+        """Заменить значение существующей записи на func(значение), не продлевая срок жизни"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= now:
+                return False
+            self._entries[key] = (entry[0], func(entry[1]))
+            return True
+
+    def invalidate(self, key: Hashable):
+        """Удалить запись"""
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        """Удалить все записи"""
+        with self._lock:
+            self._entries.clear()
+
+    def get_stats(self) -> dict:
+        """Получить статистику кеша"""
+        with self._lock:
+            return {"size": len(self._entries), "hits": self._hits, "misses": self._misses}
+
+    def _evict_expired(self, now: float):
+        """Удалить устаревшие записи (вызывается под блокировкой)"""
+        for key in [key for key, (expires_at, _) in self._entries.items() if expires_at <= now]:
+            del self._entries[key]
+
+
+class LRUCache:
+    """
+    Потокобезопасный LRU-кеш с вытеснением по размеру и по простою (idle_ttl_seconds с последнего обращения).
+    on_evict(ключ, значение) вызывается для каждой удаленной записи вне блокировки — например, чтобы закрыть сессию.
+    """
+
+    def __init__(
+        self,
+        max_size: int,
+        idle_ttl_seconds: float = 0,
+        on_evict: Callable[[Hashable, Any], None] | None = None,
+    ):
+        self.max_size = max_size
+        self.idle_ttl_seconds = idle_ttl_seconds
+        self._on_evict = on_evict
+        self._lock = threading.Lock()
+        # ключ -> (момент последнего обращения по time.monotonic(), значение); порядок — от давних к свежим
+        self._entries: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expirations = 0
+
+    def get(self, key: Hashable) -> Any | None:
+        """Получить значение и отметить обращение; None — записи нет или она простаивала дольше idle_ttl"""
+        now = time.monotonic()
+        expired = None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self._is_idle(entry, now):
+                expired = (key, self._entries.pop(key)[1])
+                self._expirations += 1
+                entry = None
+            if entry is None:
+                self._misses += 1
+            else:
+                self._hits += 1
+                self._entries[key] = (now, entry[1])
+                self._entries.move_to_end(key)
+
+        if expired:
+            self._evict([expired])
+        return None if entry is None else entry[1]
+
+    def set(self, key: Hashable, value: Any):
+        """Сохранить значение; при переполнении вытесняется запись, к которой дольше всего не обращались"""
+        now = time.monotonic()
+        evicted = []
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None and previous[1] is not value:
+                evicted.append((key, previous[1]))
+            evicted.extend(self._pop_idle(now))
+            while self._entries and len(self._entries) >= self.max_size:
+                oldest_key, (_, oldest_value) = self._entries.popitem(last=False)
+                evicted.append((oldest_key, oldest_value))
+                self._evictions += 1
+            self._entries[key] = (now, value)
+
+        self._evict(evicted)
+
+    def invalidate(self, key: Hashable) -> bool:
+        """Удалить запись; True — запись была"""
+        with self._lock:
+            entry = self._entries.pop(key, None)
+        if entry is None:
+            return False
+        self._evict([(key, entry[1])])
+        return True
+
+    def cleanup(self) -> int:
+        """Удалить записи, простаивающие дольше idle_ttl; возвращает количество удаленных"""
+        with self._lock:
+            expired = self._pop_idle(time.monotonic())
+        self._evict(expired)
+        return len(expired)
+
+    def clear(self):
+        """Удалить все записи"""
+        with self._lock:
+            entries = [(key, value) for key, (_, value) in self._entries.items()]
+            self._entries.clear()
+        self._evict(entries)
+
+    def keys(self) -> list[Hashable]:
+        """Ключи от давно использованных к недавно использованным"""
+        with self._lock:
+            return list(self._entries)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def get_stats(self) -> dict:
+        """Получить статистику кеша"""
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "hits": self._hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+                "expired": self._expirations,
+            }
+
+    def _is_idle(self, entry: tuple[float, Any], now: float) -> bool:
+        return self.idle_ttl_seconds > 0 and now - entry[0] >= self.idle_ttl_seconds
+
+    def _pop_idle(self, now: float) -> list[tuple[Hashable, Any]]:
+        """Извлечь простаивающие записи (вызывается под блокировкой): они в начале порядка"""
+        expired = []
+        while self._entries:
+            key, entry = next(iter(self._entries.items()))
+            if not self._is_idle(entry, now):
+                break
+            del self._entries[key]
+            expired.append((key, entry[1]))
+            self._expirations += 1
+        return expired
+
+    def _evict(self, entries: list[tuple[Hashable, Any]]):
+        if not self._on_evict:
+            return
+        for key, value in entries:
+            try:
+                self._on_evict(key, value)
+            except Exception as e:
+                logger.warning(f"Ошибка освобождения записи кеша {key}: {e}")
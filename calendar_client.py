@@ -15,14 +15,18 @@ from datetime import date, datetime, timedelta
 
 import requests
 
+from calendar_index import ProductionCalendarIndex
 from config import config
+from database import db_manager
 
 logger = logging.getLogger(__name__)
 
 
 class CalendarClient:
-    def __init__(self, api_url: str | None = None):
+    def __init__(self, api_url: str | None = None, index: ProductionCalendarIndex | None = None):
         self.api_url = api_url or getattr(config, "CALENDAR_API_URL", "https://calendar.kuzyak.in")
+        # Индекс загруженного из БД календаря: для загруженных лет API не вызывается
+        self.index = index
         self.session = requests.Session()
         self.session.timeout = 10
 
@@ -59,8 +63,9 @@ class CalendarClient:
         """
         Проверить, является ли день рабочим.
         1) weekday >= 5 → выходной (быстрая проверка без API)
-        2) Запрос к API → поле isWorkingDay
-        3) При ошибке API будний день считается рабочим
+        2) Год загружен в индекс производственного календаря → ответ из памяти
+        3) Запрос к API → поле isWorkingDay
+        4) При ошибке API будний день считается рабочим
         """
         if check_date is None:
             check_date = date.today()
@@ -69,6 +74,11 @@ class CalendarClient:
         if check_date.weekday() >= 5:
             return False
 
+        if self.index is not None:
+            is_working = self.index.is_working_day(check_date)
+            if is_working is not None:
+                return is_working
+
         try:
             day_info = self.get_day_info(check_date.year, check_date.month, check_date.day)
             if not day_info:
@@ -179,4 +189,4 @@ class CalendarClient:
 
 
 # Глобальный экземпляр клиента календаря
-calendar_client = CalendarClient()
+calendar_client = CalendarClient(index=db_manager.calendar_index)
@@ -0,0 +1,63 @@
+"""
+Индекс производственного календаря в памяти: битовая маска нерабочих дней на каждый год
+"""
+
+import threading
+from collections.abc import Iterable
+from datetime import date
+
+
+class ProductionCalendarIndex:
+    def __init__(self):
+        # год -> целое число, где бит (день_года - 1) установлен для нерабочего дня
+        self._years: dict[int, int] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _bit(day: date) -> int:
+        return 1 << (day.timetuple().tm_yday - 1)
+
+    def load_year(self, year: int, non_working_days: Iterable[date]):
+        """Загрузить (или заменить) нерабочие дни года"""
+        mask = 0
+        for day in non_working_days:
+            if day.year == year:
+                mask |= self._bit(day)
+        with self._lock:
+            self._years[year] = mask
+
+    def replace_all(self, non_working_days_by_year: dict[int, Iterable[date]]):
+        """Полностью заменить содержимое индекса"""
+        masks = {}
+        for year, days in non_working_days_by_year.items():
+            mask = 0
+            for day in days:
+                if day.year == year:
+                    mask |= self._bit(day)
+            masks[year] = mask
+        with self._lock:
+            self._years = masks
+
+    def is_loaded(self, year: int) -> bool:
+        """Загружен ли календарь на год"""
+        return year in self._years
+
+    def loaded_years(self) -> list[int]:
+        """Список загруженных лет"""
+        return sorted(self._years)
+
+    def is_non_working_day(self, day: date) -> bool | None:
+        """Нерабочий ли день; None — календарь на этот год не загружен"""
+        mask = self._years.get(day.year)
+        if mask is None:
+            return None
+        return bool(mask & self._bit(day))
+
+    def is_working_day(self, day: date) -> bool | None:
+        """Рабочий ли день; None — календарь на этот год не загружен"""
+        non_working = self.is_non_working_day(day)
+        return None if non_working is None else not non_working
+
+    def count_non_working_days(self, year: int) -> int:
+        """Количество нерабочих дней в году (0, если год не загружен)"""
+        return self._years.get(year, 0).bit_count()
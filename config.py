@@ -39,6 +39,38 @@ class Config:
     # Jira настройки (on-premise)
     JIRA_URL = os.getenv("JIRA_URL", "https://jira.your-company.com")
     JIRA_VERIFY_SSL = os.getenv("JIRA_VERIFY_SSL", "true").lower() == "true"
+    # Размер страницы при постраничной выборке задач (startAt/maxResults)
+    JIRA_PAGE_SIZE = int(os.getenv("JIRA_PAGE_SIZE", "100"))
+    # Подключение пользователя к Jira закрывается после простоя (0 — только вытеснение по размеру кеша)
+    JIRA_CLIENT_IDLE_TTL = float(os.getenv("JIRA_CLIENT_IDLE_TTL", "1800"))  # секунд
+    # Общий пул HTTP-соединений к Jira для всех пользователей: размер и TCP keep-alive (0 — выключен)
+    JIRA_POOL_MAXSIZE = int(os.getenv("JIRA_POOL_MAXSIZE", "20"))
+    JIRA_TCP_KEEPALIVE = int(os.getenv("JIRA_TCP_KEEPALIVE", "60"))  # секунд простоя до проверки соединения
+    # Параллельных запросов страниц одной выборки (1 — последовательно); общий лимит на пользователя — ниже
+    JIRA_PAGE_CONCURRENCY = int(os.getenv("JIRA_PAGE_CONCURRENCY", "4"))
+    # Ограничитель запросов к Jira: темп на хост (запросов в секунду, 0 — без ограничения) и запас
+    JIRA_RATE_LIMIT = float(os.getenv("JIRA_RATE_LIMIT", "20"))
+    JIRA_RATE_BURST = int(os.getenv("JIRA_RATE_BURST", "20"))
+    # Верхняя граница адаптивной параллельности на учетные данные (начальное значение — JIRA_PAGE_CONCURRENCY)
+    JIRA_MAX_CONCURRENCY = int(os.getenv("JIRA_MAX_CONCURRENCY", "8"))
+    # Задержка ответа, выше которой параллельность снижается вдвое (0 — только по ответам 429/503)
+    JIRA_LATENCY_TARGET_MS = float(os.getenv("JIRA_LATENCY_TARGET_MS", "5000"))
+    # Максимальная пауза по заголовку Retry-After
+    JIRA_RETRY_AFTER_MAX = float(os.getenv("JIRA_RETRY_AFTER_MAX", "120"))  # секунд
+    # Выборки задач (мониторинг, аналитика, инкрементальная синхронизация) прямым запросом /rest/api/2/search
+    # с разбором JSON в IssueSnapshot; false — через search_issues библиотеки jira
+    JIRA_RAW_SEARCH = os.getenv("JIRA_RAW_SEARCH", "true").lower() == "true"
+    # Повторов неудачной страницы перед прерыванием выборки
+    JIRA_PAGE_RETRIES = int(os.getenv("JIRA_PAGE_RETRIES", "2"))
+    # Время жизни расшифрованных настроек Jira в памяти (0 — не кешировать)
+    JIRA_SETTINGS_CACHE_TTL = float(os.getenv("JIRA_SETTINGS_CACHE_TTL", "300"))  # секунд
+    # Время жизни списка проектов пользователя (list_projects, проверка subscribe), 0 — не кешировать
+    JIRA_PROJECT_CATALOG_TTL = float(os.getenv("JIRA_PROJECT_CATALOG_TTL", "600"))  # секунд
+    # Инкрементальная синхронизация: между полными выборками загружаются только измененные задачи.
+    # Полная выборка (удаленные задачи, смена прав доступа) — не реже раза в указанный период, 0 — всегда полная
+    JIRA_FULL_RESYNC_HOURS = float(os.getenv("JIRA_FULL_RESYNC_HOURS", "168"))
+    # Запас окна "updated >=" на расхождение часов и задержку индексации Jira
+    JIRA_SYNC_OVERLAP_MINUTES = int(os.getenv("JIRA_SYNC_OVERLAP_MINUTES", "15"))
 
     # Tempo API настройки (опциональные)
     TEMPO_API_URL = os.getenv("TEMPO_API_URL")
@@ -47,6 +79,27 @@ class Config:
     # База данных
     DATABASE_PATH = _resolve_writable_file_path(os.getenv("DATABASE_PATH", "standup_bot.db"), "standup_bot.db")
 
+    # Пул подключений SQLite (одно долгоживущее подключение на поток, режим WAL)
+    DB_MMAP_SIZE = int(os.getenv("DB_MMAP_SIZE", str(64 * 1024 * 1024)))  # байт
+    DB_CACHE_SIZE_KB = int(os.getenv("DB_CACHE_SIZE_KB", "16384"))
+    DB_STATEMENT_CACHE_SIZE = int(os.getenv("DB_STATEMENT_CACHE_SIZE", "256"))
+    DB_BUSY_TIMEOUT_MS = int(os.getenv("DB_BUSY_TIMEOUT_MS", "5000"))
+
+    # Фоновая запись истории уведомлений и кеша задач
+    DB_WRITE_QUEUE_SIZE = int(os.getenv("DB_WRITE_QUEUE_SIZE", "10000"))
+    DB_WRITE_FLUSH_INTERVAL = float(os.getenv("DB_WRITE_FLUSH_INTERVAL", "1.0"))  # секунд
+
+    # Срок хранения подробной истории уведомлений (дни); старые строки сворачиваются в дневные агрегаты
+    NOTIFICATION_RETENTION_DAYS = int(os.getenv("NOTIFICATION_RETENTION_DAYS", "90"))  # 0 — не сворачивать
+
+    # Метрики обращений к БД: порог медленного вызова и отдельный файл журнала медленных вызовов
+    DB_SLOW_QUERY_MS = float(os.getenv("DB_SLOW_QUERY_MS", "200"))  # миллисекунд, 0 — не журналировать
+    DB_SLOW_QUERY_LOG = (
+        _resolve_writable_file_path(os.getenv("DB_SLOW_QUERY_LOG"), "db_slow_queries.log")
+        if os.getenv("DB_SLOW_QUERY_LOG")
+        else None
+    )
+
     # Администраторы (email адреса, разделенные запятыми)
     ADMIN_EMAILS = os.getenv("ADMIN_EMAILS", "").split(",")
 
@@ -3,6 +3,7 @@
 """
 
 import base64
+import binascii
 import hashlib
 import logging
 import os
@@ -152,14 +153,19 @@ class PasswordCrypto:
             raise e from None
 
     def is_encrypted(self, password_data: str) -> bool:
-        """Проверить, зашифрован ли пароль"""
+        """Проверить, зашифрован ли пароль (по формату токена Fernet, без расшифровки)"""
+        if not password_data:
+            return False
         try:
-            # Попытаемся расшифровать
-            self.decrypt_password(password_data)
-            return True
-        except Exception:
+            token = base64.urlsafe_b64decode(password_data.encode("utf-8"))
+            payload = base64.urlsafe_b64decode(token)
+        except (binascii.Error, ValueError):
             return False
 
+        # Токен Fernet: версия 0x80, 8 байт времени, 16 байт IV, шифротекст (блоки по 16 байт), 32 байта HMAC
+        ciphertext_length = len(payload) - 57
+        return payload[:1] == b"\x80" and ciphertext_length >= 16 and ciphertext_length % 16 == 0
+
 
 # Глобальный экземпляр для использования в приложении
 password_crypto = PasswordCrypto()
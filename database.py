@@ -2,165 +2,79 @@
 Модуль для работы с базой данных SQLite
 """
 
-import contextlib
 import logging
 import re
 import sqlite3
-from datetime import date
+import threading
+from collections.abc import Iterable
+from datetime import date, timedelta
 
+from cache_utils import TTLCache
+from calendar_index import ProductionCalendarIndex
 from config import config
 from crypto_utils import password_crypto
+from db_metrics import DatabaseMetrics, instrument_methods
+from db_migrations import LATEST_VERSION, get_schema_version, migrate
+from db_pool import SQLiteConnectionPool
+from subscription_registry import Subscription, SubscriptionRegistry
 
 logger = logging.getLogger(__name__)
 
 
+@instrument_methods(exclude={"close", "get_pool_stats", "get_db_metrics", "is_user_blocked"}, error_logger=logger)
 class DatabaseManager:
     def __init__(self, db_path: str | None = None):
         self.db_path = db_path or config.DATABASE_PATH
+        self.pool = SQLiteConnectionPool(
+            self.db_path,
+            mmap_size=config.DB_MMAP_SIZE,
+            cache_size_kb=config.DB_CACHE_SIZE_KB,
+            statement_cache_size=config.DB_STATEMENT_CACHE_SIZE,
+            busy_timeout_ms=config.DB_BUSY_TIMEOUT_MS,
+        )
+        self.metrics = DatabaseMetrics(slow_query_ms=config.DB_SLOW_QUERY_MS)
+        self.calendar_index = ProductionCalendarIndex()
+        self.subscriptions = SubscriptionRegistry(self._load_active_subscriptions)
+        # Расшифрованные настройки Jira: пароль расшифровывается не чаще раза за TTL
+        self.jira_settings_cache = TTLCache(config.JIRA_SETTINGS_CACHE_TTL)
+        # Заблокированные пользователи: проверка перед каждым обращением к Jira без запроса к БД.
+        # Изменения блокировки выполняются под _block_lock: запись в БД и обновление множества атомарны
+        self._blocked_users: set[str] = set()
+        self._block_lock = threading.Lock()
         self.init_database()
+        self.load_calendar_index()
+        self.load_blocked_users()
 
-    def init_database(self):
-        """Инициализация базы данных и создание таблиц"""
-        try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-
-                # Таблица настроек подключения к Jira для пользователей
-                cursor.execute("""
-                    CREATE TABLE IF NOT EXISTS user_jira_settings (
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        user_email TEXT UNIQUE NOT NULL,
-                        user_id TEXT NOT NULL,
-                        jira_username TEXT NOT NULL,
-                        jira_password TEXT NOT NULL,
-                        last_test_success BOOLEAN DEFAULT 0,
-                        last_test_at TIMESTAMP,
-                        connection_attempts INTEGER DEFAULT 0,
-                        is_blocked BOOLEAN DEFAULT 0,
-                        blocked_at TIMESTAMP,
-                        last_connection_error TEXT,
-                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                    )
-                """)
-
-                # Добавляем новые поля, если таблица уже существует (миграция)
-                with contextlib.suppress(sqlite3.OperationalError):
-                    cursor.execute("ALTER TABLE user_jira_settings ADD COLUMN connection_attempts INTEGER DEFAULT 0")
-
-                with contextlib.suppress(sqlite3.OperationalError):
-                    cursor.execute("ALTER TABLE user_jira_settings ADD COLUMN is_blocked BOOLEAN DEFAULT 0")
-
-                with contextlib.suppress(sqlite3.OperationalError):
-                    cursor.execute("ALTER TABLE user_jira_settings ADD COLUMN blocked_at TIMESTAMP")
-
-                with contextlib.suppress(sqlite3.OperationalError):
-                    cursor.execute("ALTER TABLE user_jira_settings ADD COLUMN last_connection_error TEXT")
-
-                # Таблица подписок на проекты
-                cursor.execute("""
-                    CREATE TABLE IF NOT EXISTS project_subscriptions (
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        project_key TEXT NOT NULL,
-                        project_name TEXT,
-                        mattermost_channel_id TEXT NOT NULL,
-                        mattermost_team_id TEXT,
-                        subscribed_by_user_id TEXT NOT NULL,
-                        subscribed_by_email TEXT,
-                        active BOOLEAN DEFAULT 1,
-                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                        UNIQUE(project_key, mattermost_channel_id)
-                    )
-                """)
-
-                # Таблица для истории уведомлений
-                cursor.execute("""
-                    CREATE TABLE IF NOT EXISTS notification_history (
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        project_key TEXT NOT NULL,
-                        issue_key TEXT NOT NULL,
-                        notification_type TEXT NOT NULL, -- 'time_exceeded' или 'deadline_overdue'
-                        assignee_email TEXT,
-                        assignee_name TEXT,
-                        channel_id TEXT NOT NULL,
-                        issue_summary TEXT,
-                        planned_hours REAL DEFAULT 0,
-                        actual_hours REAL DEFAULT 0,
-                        due_date DATE,
-                        notification_date DATE NOT NULL,
-                        sent_to_channel BOOLEAN DEFAULT 0,
-                        sent_to_assignee BOOLEAN DEFAULT 0,
-                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                        UNIQUE(issue_key, notification_type, notification_date)
-                    )
-                """)
+    def get_pool_stats(self) -> dict:
+        """Получить статистику пула подключений"""
+        return self.pool.get_stats()
 
-                # Таблица для кеширования информации о задачах
-                cursor.execute("""
-                    CREATE TABLE IF NOT EXISTS issue_cache (
-                        issue_key TEXT PRIMARY KEY,
-                        project_key TEXT NOT NULL,
-                        summary TEXT,
-                        assignee_email TEXT,
-                        assignee_name TEXT,
-                        status TEXT,
-                        due_date DATE,
-                        original_estimate REAL DEFAULT 0,
-                        time_spent REAL DEFAULT 0,
-                        remaining_estimate REAL DEFAULT 0,
-                        last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                    )
-                """)
-
-                # Таблица для хранения производственного календаря
-                cursor.execute("""
-                    CREATE TABLE IF NOT EXISTS production_calendar (
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        year INTEGER NOT NULL,
-                        holiday_date DATE NOT NULL,
-                        is_holiday BOOLEAN DEFAULT 1,
-                        is_weekend BOOLEAN DEFAULT 0,
-                        description TEXT,
-                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                        UNIQUE(year, holiday_date)
-                    )
-                """)
+    def get_db_metrics(self, limit: int | None = None) -> list[dict]:
+        """Получить статистику вызовов методов, отсортированную по суммарному времени"""
+        return self.metrics.get_stats(limit)
 
-                # Таблица для отслеживания загрузки календарей
-                cursor.execute("""
-                    CREATE TABLE IF NOT EXISTS calendar_metadata (
-                        year INTEGER PRIMARY KEY,
-                        is_loaded BOOLEAN DEFAULT 0,
-                        last_check_date DATE,
-                        last_update_date DATE,
-                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                    )
-                """)
+    def close(self):
+        """Закрыть все подключения к базе данных"""
+        self.pool.close_all()
+        logger.info("Подключения к базе данных закрыты")
 
-                # Индексы для оптимизации
-                cursor.execute("CREATE INDEX IF NOT EXISTS idx_user_email ON user_jira_settings(user_email)")
-                cursor.execute("CREATE INDEX IF NOT EXISTS idx_project_key ON project_subscriptions(project_key)")
-                cursor.execute(
-                    "CREATE INDEX IF NOT EXISTS idx_channel_id ON project_subscriptions(mattermost_channel_id)"
-                )
-                cursor.execute(
-                    "CREATE INDEX IF NOT EXISTS idx_notification_date ON notification_history(notification_date)"
-                )
-                cursor.execute("CREATE INDEX IF NOT EXISTS idx_issue_project ON issue_cache(project_key)")
-                cursor.execute("CREATE INDEX IF NOT EXISTS idx_issue_assignee ON issue_cache(assignee_email)")
-                cursor.execute("CREATE INDEX IF NOT EXISTS idx_calendar_year ON production_calendar(year)")
-                cursor.execute("CREATE INDEX IF NOT EXISTS idx_calendar_date ON production_calendar(holiday_date)")
-
-                conn.commit()
-                logger.info("База данных инициализирована успешно")
+    def init_database(self):
+        """Инициализация базы данных: применение недостающих миграций схемы"""
+        try:
+            applied = migrate(self.pool.connection())
+            if applied:
+                logger.info(f"База данных инициализирована успешно (применено миграций: {applied})")
+            else:
+                logger.debug(f"Схема базы данных актуальна (версия {LATEST_VERSION})")
 
         except Exception as e:
             logger.error(f"Ошибка инициализации базы данных: {e}")
             raise
 
+    def get_schema_version(self) -> int:
+        """Получить номер версии схемы базы данных"""
+        return get_schema_version(self.pool.connection())
+
     def _validate_email(self, email: str) -> bool:
         """Валидация email адреса"""
         pattern = r"^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$"
@@ -200,7 +114,7 @@ class DatabaseManager:
             # Шифруем пароль перед сохранением
             encrypted_password = password_crypto.encrypt_password(jira_password)
 
-            with sqlite3.connect(self.db_path) as conn:
+            with self._block_lock, self.pool.connection() as conn:
                 cursor = conn.cursor()
                 # Проверяем, существует ли уже запись для этого пользователя
                 cursor.execute("SELECT id FROM user_jira_settings WHERE user_email = ?", (user_email,))
@@ -230,18 +144,25 @@ class DatabaseManager:
                         (user_email, user_id, jira_username, encrypted_password),
                     )
                 conn.commit()
-                logger.info(
-                    f"Настройки Jira сохранены для пользователя {user_email} (пароль зашифрован, счетчик попыток сброшен)"
-                )
-                return True
+                self._blocked_users.discard(user_email)
+            # Запись может быть закеширована и под псевдонимом user_<id>, поэтому сбрасываем весь кеш
+            self.jira_settings_cache.clear()
+            logger.info(
+                f"Настройки Jira сохранены для пользователя {user_email} (пароль зашифрован, счетчик попыток сброшен)"
+            )
+            return True
         except Exception as e:
             logger.error(f"Ошибка сохранения настроек Jira для {user_email}: {e}")
             return False
 
     def get_user_jira_settings(self, user_email: str) -> tuple[str, str, str, str] | None:
         """Получить настройки подключения к Jira для пользователя"""
+        cached = self.jira_settings_cache.get(user_email)
+        if cached is not None:
+            return cached
+
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self.pool.connection() as conn:
                 cursor = conn.cursor()
 
                 # Сначала пробуем найти по email
@@ -282,7 +203,9 @@ class DatabaseManager:
                             decrypted_password = encrypted_password
                             logger.warning(f"Пароль для {user_email} не зашифрован - требуется обновление")
 
-                        return (user_id, jira_username, decrypted_password, last_test_success)
+                        settings = (user_id, jira_username, decrypted_password, last_test_success)
+                        self.jira_settings_cache.set(user_email, settings)
+                        return settings
 
                     except Exception as decrypt_error:
                         logger.error(f"Ошибка расшифровки пароля для {user_email}: {decrypt_error}")
@@ -296,7 +219,7 @@ class DatabaseManager:
     def update_jira_test_result(self, user_email: str, success: bool) -> bool:
         """Обновить результат тестирования подключения к Jira"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._block_lock, self.pool.connection() as conn:
                 cursor = conn.cursor()
                 if success:
                     # При успешном подключении сбрасываем счетчик попыток и разблокируем
@@ -320,7 +243,11 @@ class DatabaseManager:
                         (success, user_email),
                     )
                 conn.commit()
-                return cursor.rowcount > 0
+                if success:
+                    self._blocked_users.discard(user_email)
+            # Результат теста не требует повторной расшифровки: обновляем флаг в закешированной записи
+            self.jira_settings_cache.update(user_email, lambda settings: (*settings[:3], int(bool(success))))
+            return cursor.rowcount > 0
         except Exception as e:
             logger.error(f"Ошибка обновления результата теста для {user_email}: {e}")
             return False
@@ -328,7 +255,7 @@ class DatabaseManager:
     def increment_connection_attempts(self, user_email: str, error_message: str | None = None) -> tuple[int, bool]:
         """Увеличить счетчик попыток подключения и проверить, нужно ли заблокировать"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._block_lock, self.pool.connection() as conn:
                 cursor = conn.cursor()
                 # Получаем текущее количество попыток
                 cursor.execute(
@@ -348,6 +275,7 @@ class DatabaseManager:
 
                 # Если уже заблокирован, не увеличиваем счетчик
                 if is_blocked:
+                    self._blocked_users.add(user_email)
                     return current_attempts, True
 
                 # Увеличиваем счетчик
@@ -380,6 +308,8 @@ class DatabaseManager:
                     )
 
                 conn.commit()
+                if should_block:
+                    self._blocked_users.add(user_email)
                 return new_attempts, should_block
         except Exception as e:
             logger.error(f"Ошибка обновления счетчика попыток для {user_email}: {e}")
@@ -388,7 +318,7 @@ class DatabaseManager:
     def reset_connection_attempts(self, user_email: str) -> bool:
         """Сбросить счетчик попыток подключения (при смене пароля)"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._block_lock, self.pool.connection() as conn:
                 cursor = conn.cursor()
                 cursor.execute(
                     """
@@ -400,32 +330,35 @@ class DatabaseManager:
                     (user_email,),
                 )
                 conn.commit()
-                return cursor.rowcount > 0
+                self._blocked_users.discard(user_email)
+            self.jira_settings_cache.clear()
+            return cursor.rowcount > 0
         except Exception as e:
             logger.error(f"Ошибка сброса счетчика попыток для {user_email}: {e}")
             return False
 
-    def is_user_blocked(self, user_email: str) -> bool:
-        """Проверить, заблокирован ли пользователь"""
+    def load_blocked_users(self) -> bool:
+        """Загрузить заблокированных пользователей из БД в память"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._block_lock, self.pool.connection() as conn:
                 cursor = conn.cursor()
-                cursor.execute(
-                    """
-                    SELECT is_blocked FROM user_jira_settings WHERE user_email = ?
-                """,
-                    (user_email,),
-                )
-                result = cursor.fetchone()
-                return result[0] if result else False
+                cursor.execute("SELECT user_email FROM user_jira_settings WHERE is_blocked = 1")
+                self._blocked_users = {row[0] for row in cursor.fetchall()}
+            if self._blocked_users:
+                logger.info(f"Заблокированных пользователей Jira: {len(self._blocked_users)}")
+            return True
         except Exception as e:
-            logger.error(f"Ошибка проверки блокировки для {user_email}: {e}")
+            logger.error(f"Ошибка загрузки заблокированных пользователей: {e}")
             return False
 
+    def is_user_blocked(self, user_email: str) -> bool:
+        """Проверить, заблокирован ли пользователь (по состоянию в памяти, без запроса к БД)"""
+        return user_email in self._blocked_users
+
     def get_user_block_info(self, user_email: str) -> tuple[int, bool, str | None] | None:
         """Получить информацию о блокировке пользователя: (попытки, заблокирован, дата блокировки)"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self.pool.connection() as conn:
                 cursor = conn.cursor()
                 cursor.execute(
                     """
@@ -442,13 +375,26 @@ class DatabaseManager:
             logger.error(f"Ошибка получения информации о блокировке для {user_email}: {e}")
             return None
 
+    def get_jira_users(self) -> list[tuple]:
+        """Получить список пользователей с настройками Jira: (email, jira_username)"""
+        try:
+            with self.pool.connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute("SELECT user_email, jira_username FROM user_jira_settings")
+                return cursor.fetchall()
+        except Exception as e:
+            logger.error(f"Ошибка получения списка пользователей Jira: {e}")
+            raise
+
     def delete_user_jira_settings(self, user_email: str) -> bool:
         """Удалить настройки Jira пользователя"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._block_lock, self.pool.connection() as conn:
                 cursor = conn.cursor()
                 cursor.execute("DELETE FROM user_jira_settings WHERE user_email = ?", (user_email,))
                 conn.commit()
+                self._blocked_users.discard(user_email)
+                self.jira_settings_cache.clear()
                 if cursor.rowcount > 0:
                     logger.info(f"Настройки Jira удалены для пользователя {user_email}")
                     return True
@@ -462,7 +408,7 @@ class DatabaseManager:
     ) -> bool:
         """Подписать канал на мониторинг проекта"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self.pool.connection() as conn:
                 cursor = conn.cursor()
                 cursor.execute(
                     """
@@ -474,8 +420,9 @@ class DatabaseManager:
                     (project_key, project_name, channel_id, team_id, user_id, user_email),
                 )
                 conn.commit()
-                logger.info(f"Канал {channel_id} подписан на проект {project_key}")
-                return True
+            self.subscriptions.invalidate()
+            logger.info(f"Канал {channel_id} подписан на проект {project_key}")
+            return True
         except Exception as e:
             logger.error(f"Ошибка подписки на проект {project_key}: {e}")
             return False
@@ -483,7 +430,7 @@ class DatabaseManager:
     def unsubscribe_from_project(self, project_key: str, channel_id: str) -> bool:
         """Отписать канал от мониторинга проекта"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self.pool.connection() as conn:
                 cursor = conn.cursor()
                 cursor.execute(
                     """
@@ -495,6 +442,7 @@ class DatabaseManager:
                 )
                 if cursor.rowcount > 0:
                     conn.commit()
+                    self.subscriptions.invalidate()
                     logger.info(f"Канал {channel_id} отписан от проекта {project_key}")
                     return True
                 else:
@@ -504,46 +452,30 @@ class DatabaseManager:
             logger.error(f"Ошибка отписки от проекта {project_key}: {e}")
             return False
 
+    def _load_active_subscriptions(self) -> list[Subscription]:
+        """Загрузить все активные подписки одним запросом (источник данных реестра подписок)"""
+        with self.pool.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT project_key, project_name, mattermost_channel_id,
+                       mattermost_team_id, subscribed_by_email, created_at
+                FROM project_subscriptions
+                WHERE active = 1
+                ORDER BY project_key
+            """)
+            return [Subscription(*row) for row in cursor.fetchall()]
+
     def get_active_subscriptions(self) -> list[tuple]:
         """Получить список активных подписок на проекты"""
-        try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                cursor.execute("""
-                    SELECT project_key, project_name, mattermost_channel_id,
-                           mattermost_team_id, subscribed_by_email
-                    FROM project_subscriptions
-                    WHERE active = 1
-                    ORDER BY project_key
-                """)
-                return cursor.fetchall()
-        except Exception as e:
-            logger.error(f"Ошибка получения списка подписок: {e}")
-            return []
-
-    def get_subscriptions_by_channel(self, channel_id: str) -> list[tuple]:
-        """Получить подписки для конкретного канала"""
-        try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                cursor.execute(
-                    """
-                    SELECT project_key, project_name, subscribed_by_email, created_at, active
-                    FROM project_subscriptions
-                    WHERE mattermost_channel_id = ? AND active = 1
-                    ORDER BY created_at DESC
-                """,
-                    (channel_id,),
-                )
-                return cursor.fetchall()
-        except Exception as e:
-            logger.error(f"Ошибка получения подписок для канала {channel_id}: {e}")
-            return []
+        return [
+            (s.project_key, s.project_name, s.channel_id, s.team_id, s.subscribed_by_email)
+            for s in self.subscriptions.all()
+        ]
 
     def get_all_subscriptions(self) -> list[tuple]:
         """Получить все подписки (для администраторов)"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self.pool.connection() as conn:
                 cursor = conn.cursor()
                 cursor.execute("""
                     SELECT project_key, project_name, mattermost_channel_id,
@@ -559,7 +491,7 @@ class DatabaseManager:
     def delete_subscription_by_id(self, project_key: str, channel_id: str) -> bool:
         """Удалить конкретную подписку (для администраторов)"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self.pool.connection() as conn:
                 cursor = conn.cursor()
                 cursor.execute(
                     """
@@ -570,6 +502,7 @@ class DatabaseManager:
                 )
                 conn.commit()
                 if cursor.rowcount > 0:
+                    self.subscriptions.invalidate()
                     logger.info(f"Подписка {project_key} в канале {channel_id} удалена")
                     return True
                 return False
@@ -582,7 +515,7 @@ class DatabaseManager:
     ) -> bool:
         """Обновить ID пользователя в Mattermost и Jira"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self.pool.connection() as conn:
                 cursor = conn.cursor()
                 updates = []
                 params = []
@@ -614,96 +547,239 @@ class DatabaseManager:
             logger.error(f"Ошибка обновления пользователя {email}: {e}")
             return False
 
-    def save_notification(
+    def update_issue_cache_many(
+        self, project_key: str, rows: list[tuple], remove_missing: bool = True, keep_keys: Iterable[str] = ()
+    ) -> bool:
+        """
+        Обновить кеш задач проекта одной транзакцией.
+        rows: (issue_key, project_key, summary, assignee_email, assignee_name, status,
+               due_date, original_estimate, time_spent, remaining_estimate, fingerprint, jira_updated)
+        remove_missing: удалить из кеша задачи проекта, которых нет в rows и keep_keys (полный снимок проекта)
+        keep_keys: задачи снимка, которые не изменились и поэтому не перезаписываются
+        """
+        try:
+            with self.pool.connection() as conn:
+                cursor = conn.cursor()
+                self._apply_issue_cache_snapshot(cursor, project_key, rows, remove_missing, keep_keys)
+                return True
+        except Exception as e:
+            logger.error(f"Ошибка пакетного обновления кеша проекта {project_key}: {e}")
+            return False
+
+    def apply_write_batch(self, notifications: list[tuple], cache_ops: list[tuple]) -> bool:
+        """
+        Записать накопленный пакет изменений одной транзакцией (используется фоновым DatabaseWriter).
+        notifications: строки notification_history с явной notification_date последним элементом
+        cache_ops: операции с кешем задач в порядке поступления:
+            ("row", строка issue_cache) или ("snapshot", (project_key, rows, remove_missing, keep_keys))
+        """
+        try:
+            with self.pool.connection() as conn:
+                cursor = conn.cursor()
+                if notifications:
+                    cursor.executemany(
+                        """
+                        INSERT OR REPLACE INTO notification_history
+                        (project_key, issue_key, notification_type, assignee_email, assignee_name,
+                         channel_id, issue_summary, planned_hours, actual_hours, due_date, notification_date)
+                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    """,
+                        notifications,
+                    )
+
+                # Подряд идущие одиночные строки кеша пишем одним executemany
+                pending_rows: list[tuple] = []
+                for kind, payload in cache_ops:
+                    if kind == "row":
+                        pending_rows.append(payload)
+                        continue
+                    self._upsert_issue_cache_rows(cursor, pending_rows)
+                    pending_rows = []
+                    self._apply_issue_cache_snapshot(cursor, *payload)
+                self._upsert_issue_cache_rows(cursor, pending_rows)
+                return True
+        except Exception as e:
+            logger.error(f"Ошибка пакетной записи в базу данных: {e}")
+            return False
+
+    def _upsert_issue_cache_rows(self, cursor: sqlite3.Cursor, rows: list[tuple]):
+        """Вставить или заменить строки issue_cache"""
+        if not rows:
+            return
+        cursor.executemany(
+            """
+            INSERT OR REPLACE INTO issue_cache
+            (issue_key, project_key, summary, assignee_email, assignee_name, status,
+             due_date, original_estimate, time_spent, remaining_estimate, fingerprint, jira_updated, last_updated)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+        """,
+            rows,
+        )
+
+    def _apply_issue_cache_snapshot(
         self,
+        cursor: sqlite3.Cursor,
         project_key: str,
-        issue_key: str,
-        notification_type: str,
-        assignee_email: str,
-        assignee_name: str,
-        channel_id: str,
-        issue_summary: str,
-        planned_hours: float,
-        actual_hours: float,
-        due_date: str | None = None,
-    ) -> bool:
-        """Сохранить информацию об отправленном уведомлении"""
+        rows: list[tuple],
+        remove_missing: bool,
+        keep_keys: Iterable[str] = (),
+    ) -> int:
+        """Записать снимок проекта в issue_cache; возвращает количество удаленных задач"""
+        self._upsert_issue_cache_rows(cursor, rows)
+
+        removed = 0
+        if remove_missing:
+            snapshot_keys = {row[0] for row in rows}
+            snapshot_keys.update(keep_keys)
+            cursor.execute("SELECT issue_key FROM issue_cache WHERE project_key = ?", (project_key,))
+            missing = [(key,) for (key,) in cursor.fetchall() if key not in snapshot_keys]
+            if missing:
+                cursor.executemany("DELETE FROM issue_cache WHERE issue_key = ?", missing)
+                removed = len(missing)
+
+        logger.debug(f"Кеш проекта {project_key}: обновлено {len(rows)} задач, удалено {removed}")
+        return removed
+
+    def get_cached_issues(self, project_key: str) -> list[tuple]:
+        """
+        Получить задачи проекта из кеша:
+        (issue_key, summary, assignee_email, assignee_name, status, due_date, original_estimate,
+         time_spent, remaining_estimate, fingerprint, last_updated, jira_updated)
+        """
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self.pool.connection() as conn:
                 cursor = conn.cursor()
                 cursor.execute(
                     """
-                    INSERT OR REPLACE INTO notification_history
-                    (project_key, issue_key, notification_type, assignee_email, assignee_name,
-                     channel_id, issue_summary, planned_hours, actual_hours, due_date, notification_date)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, DATE('now'))
+                    SELECT issue_key, summary, assignee_email, assignee_name, status, due_date, original_estimate,
+                           time_spent, remaining_estimate, fingerprint, last_updated, jira_updated
+                    FROM issue_cache
+                    WHERE project_key = ?
                 """,
-                    (
-                        project_key,
-                        issue_key,
-                        notification_type,
-                        assignee_email,
-                        assignee_name,
-                        channel_id,
-                        issue_summary,
-                        planned_hours,
-                        actual_hours,
-                        due_date,
-                    ),
+                    (project_key,),
                 )
-                conn.commit()
-                return True
+                return cursor.fetchall()
         except Exception as e:
-            logger.error(f"Ошибка сохранения уведомления для {issue_key}: {e}")
-            return False
+            logger.error(f"Ошибка получения задач проекта {project_key} из кеша: {e}")
+            return []
 
-    def update_issue_cache(
-        self,
-        issue_key: str,
-        project_key: str,
-        summary: str,
-        assignee_email: str,
-        assignee_name: str,
-        status: str,
-        due_date: str,
-        original_estimate: float,
-        time_spent: float,
-        remaining_estimate: float,
-    ) -> bool:
-        """Обновить кеш информации о задаче"""
+    def get_issue_sync_state(self, project_key: str) -> tuple[str | None, str | None, str | None] | None:
+        """Получить состояние синхронизации проекта: (synced_by_email, last_sync_at, last_full_sync_at) в UTC"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self.pool.connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute(
+                    "SELECT synced_by_email, last_sync_at, last_full_sync_at FROM issue_sync_state WHERE project_key = ?",
+                    (project_key,),
+                )
+                return cursor.fetchone()
+        except Exception as e:
+            logger.error(f"Ошибка получения состояния синхронизации проекта {project_key}: {e}")
+            return None
+
+    def save_issue_sync_state(self, project_key: str, user_email: str, synced_at: str, full_sync: bool) -> bool:
+        """Сохранить точку синхронизации проекта (synced_at — UTC "YYYY-MM-DD HH:MM:SS" начала выборки)"""
+        try:
+            with self.pool.connection() as conn:
                 cursor = conn.cursor()
                 cursor.execute(
                     """
-                    INSERT OR REPLACE INTO issue_cache
-                    (issue_key, project_key, summary, assignee_email, assignee_name, status,
-                     due_date, original_estimate, time_spent, remaining_estimate, last_updated)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+                    INSERT INTO issue_sync_state (project_key, synced_by_email, last_sync_at, last_full_sync_at)
+                    VALUES (?, ?, ?, ?)
+                    ON CONFLICT(project_key) DO UPDATE SET
+                        synced_by_email = excluded.synced_by_email,
+                        last_sync_at = excluded.last_sync_at,
+                        last_full_sync_at = COALESCE(excluded.last_full_sync_at, last_full_sync_at)
                 """,
-                    (
-                        issue_key,
-                        project_key,
-                        summary,
-                        assignee_email,
-                        assignee_name,
-                        status,
-                        due_date,
-                        original_estimate,
-                        time_spent,
-                        remaining_estimate,
-                    ),
+                    (project_key, user_email, synced_at, synced_at if full_sync else None),
                 )
                 conn.commit()
                 return True
         except Exception as e:
-            logger.error(f"Ошибка обновления кеша для задачи {issue_key}: {e}")
+            logger.error(f"Ошибка сохранения состояния синхронизации проекта {project_key}: {e}")
             return False
 
+    def get_notification_stats(self, days: int = 7) -> list[tuple]:
+        """
+        Получить количество уведомлений за последние дни: (дата, проект, тип, количество).
+        Свежие дни считаются по notification_history, старые — берутся из дневных агрегатов.
+        """
+        try:
+            since = (date.today() - timedelta(days=days - 1)).isoformat()
+            with self.pool.connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute(
+                    """
+                    SELECT notification_date, project_key, notification_type, COUNT(*)
+                    FROM notification_history
+                    WHERE notification_date >= ?
+                    GROUP BY notification_date, project_key, notification_type
+                    UNION ALL
+                    SELECT notification_date, project_key, notification_type, notifications_count
+                    FROM notification_daily_stats
+                    WHERE notification_date >= ?
+                    ORDER BY 1 DESC, 2, 3
+                """,
+                    (since, since),
+                )
+                return cursor.fetchall()
+        except Exception as e:
+            logger.error(f"Ошибка получения статистики уведомлений: {e}")
+            return []
+
+    def compact_notification_history(self, retention_days: int) -> tuple[int, int] | None:
+        """
+        Перенести строки notification_history старше retention_days в дневные агрегаты
+        и вернуть освободившееся место (incremental vacuum).
+        Возвращает (перенесено строк, освобождено страниц) или None при ошибке.
+        """
+        try:
+            cutoff = (date.today() - timedelta(days=retention_days)).isoformat()
+            conn = self.pool.connection()
+            with conn:
+                cursor = conn.cursor()
+                cursor.execute(
+                    """
+                    INSERT INTO notification_daily_stats
+                    (notification_date, project_key, notification_type, notifications_count,
+                     planned_hours, actual_hours)
+                    SELECT notification_date, project_key, notification_type, COUNT(*),
+                           SUM(planned_hours), SUM(actual_hours)
+                    FROM notification_history
+                    WHERE notification_date < ?
+                    GROUP BY notification_date, project_key, notification_type
+                    ON CONFLICT (notification_date, project_key, notification_type) DO UPDATE SET
+                        notifications_count = notifications_count + excluded.notifications_count,
+                        planned_hours = planned_hours + excluded.planned_hours,
+                        actual_hours = actual_hours + excluded.actual_hours
+                """,
+                    (cutoff,),
+                )
+                cursor.execute("DELETE FROM notification_history WHERE notification_date < ?", (cutoff,))
+                archived = cursor.rowcount
+
+            freed_pages = conn.execute("PRAGMA freelist_count").fetchone()[0]
+            if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+                # Перевод существующей базы в режим INCREMENTAL требует одного полного VACUUM
+                conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+                conn.execute("VACUUM")
+                logger.info("База данных переведена в режим auto_vacuum=INCREMENTAL")
+            elif freed_pages:
+                conn.execute("PRAGMA incremental_vacuum").fetchall()
+
+            logger.info(
+                f"Компактация истории уведомлений: перенесено в агрегаты {archived} строк старше {cutoff}, "
+                f"освобождено страниц {freed_pages}"
+            )
+            return archived, freed_pages
+        except Exception as e:
+            logger.error(f"Ошибка компактации истории уведомлений: {e}")
+            return None
+
     def get_check_history(self, days: int = 7) -> list[tuple]:
         """Получить историю проверок за последние дни"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self.pool.connection() as conn:
                 cursor = conn.cursor()
                 # Используем параметризованный запрос для безопасности
                 cursor.execute(
@@ -730,27 +806,29 @@ class DatabaseManager:
     ) -> bool:
         """Сохранить выходные и праздничные дни календаря на год"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self.pool.connection() as conn:
                 cursor = conn.cursor()
 
                 # Удаляем старые данные для этого года
                 cursor.execute("DELETE FROM production_calendar WHERE year = ?", (year,))
 
                 # Сохраняем новые данные
+                rows = []
                 for holiday_date in holidays:
                     description = descriptions.get(holiday_date, "") if descriptions else ""
                     # Определяем, является ли день выходным (суббота/воскресенье) или праздничным
                     is_weekend = holiday_date.weekday() >= 5  # 5 = суббота, 6 = воскресенье
                     is_holiday = not is_weekend  # Если не выходной, то праздничный
+                    rows.append((year, holiday_date.isoformat(), is_holiday, is_weekend, description))
 
-                    cursor.execute(
-                        """
-                        INSERT OR REPLACE INTO production_calendar
-                        (year, holiday_date, is_holiday, is_weekend, description)
-                        VALUES (?, ?, ?, ?, ?)
-                    """,
-                        (year, holiday_date.isoformat(), is_holiday, is_weekend, description),
-                    )
+                cursor.executemany(
+                    """
+                    INSERT OR REPLACE INTO production_calendar
+                    (year, holiday_date, is_holiday, is_weekend, description)
+                    VALUES (?, ?, ?, ?, ?)
+                """,
+                    rows,
+                )
 
                 # Обновляем метаданные
                 cursor.execute(
@@ -763,16 +841,42 @@ class DatabaseManager:
                 )
 
                 conn.commit()
-                logger.info(f"Сохранено {len(holidays)} выходных и праздничных дней для {year} года")
-                return True
+
+            # Индекс обновляем только после успешной фиксации транзакции
+            self.calendar_index.load_year(year, holidays)
+            logger.info(f"Сохранено {len(holidays)} выходных и праздничных дней для {year} года")
+            return True
         except Exception as e:
             logger.error(f"Ошибка сохранения календаря для {year} года: {e}")
             return False
 
+    def load_calendar_index(self) -> bool:
+        """Загрузить производственный календарь из БД в индекс в памяти"""
+        try:
+            with self.pool.connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute("SELECT year, holiday_date FROM production_calendar")
+                days_by_year: dict[int, list[date]] = {}
+                for year, holiday_date in cursor.fetchall():
+                    days_by_year.setdefault(year, []).append(date.fromisoformat(holiday_date))
+
+            self.calendar_index.replace_all(days_by_year)
+            if days_by_year:
+                logger.info(f"Производственный календарь загружен в память: {sorted(days_by_year)}")
+            return True
+        except Exception as e:
+            logger.error(f"Ошибка загрузки производственного календаря в память: {e}")
+            return False
+
     def is_holiday(self, check_date: date) -> bool:
         """Проверить, является ли день выходным или праздничным"""
+        # Загруженные годы проверяем по индексу в памяти, без запроса к БД
+        cached = self.calendar_index.is_non_working_day(check_date)
+        if cached is not None:
+            return cached
+
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self.pool.connection() as conn:
                 cursor = conn.cursor()
                 cursor.execute(
                     """
@@ -789,8 +893,11 @@ class DatabaseManager:
 
     def is_calendar_loaded(self, year: int) -> bool:
         """Проверить, загружен ли календарь на год"""
+        if self.calendar_index.is_loaded(year):
+            return True
+
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self.pool.connection() as conn:
                 cursor = conn.cursor()
                 cursor.execute(
                     """
@@ -807,7 +914,7 @@ class DatabaseManager:
     def update_calendar_check_date(self, year: int) -> bool:
         """Обновить дату последней проверки календаря"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self.pool.connection() as conn:
                 cursor = conn.cursor()
                 cursor.execute(
                     """
@@ -826,7 +933,7 @@ class DatabaseManager:
     def get_calendar_check_date(self, year: int) -> str | None:
         """Получить дату последней проверки календаря"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self.pool.connection() as conn:
                 cursor = conn.cursor()
                 cursor.execute(
                     """
@@ -0,0 +1,162 @@
+"""
+Метрики обращений к базе данных: количество вызовов, время, p95, затронутые строки и журнал медленных запросов
+"""
+
+import functools
+import logging
+import threading
+import time
+from collections import deque
+
+logger = logging.getLogger(__name__)
+slow_query_logger = logging.getLogger("db.slow_queries")
+
+# Состояние текущего вызова в потоке: была ли записана ошибка
+_call_state = threading.local()
+
+
+class _ErrorMarker(logging.Handler):
+    """Отмечает текущий вызов неудачным по записи уровня ERROR в журнал модуля"""
+
+    def __init__(self):
+        super().__init__(level=logging.ERROR)
+
+    def emit(self, record: logging.LogRecord):
+        if getattr(_call_state, "active", False):
+            _call_state.failed = True
+
+
+class _MethodStats:
+    __slots__ = ("calls", "errors", "rows", "samples", "slow", "total_ms")
+
+    def __init__(self, sample_size: int):
+        self.calls = 0
+        self.errors = 0
+        self.slow = 0
+        self.rows = 0
+        self.total_ms = 0.0
+        # Последние замеры для расчета p95
+        self.samples: deque[float] = deque(maxlen=sample_size)
+
+
+class DatabaseMetrics:
+    def __init__(self, slow_query_ms: float = 200.0, sample_size: int = 1000):
+        self.slow_query_ms = slow_query_ms
+        self.sample_size = sample_size
+        self._lock = threading.Lock()
+        self._methods: dict[str, _MethodStats] = {}
+
+    def record(self, method: str, duration_ms: float, rows: int = 0, failed: bool = False):
+        """Учесть один вызов метода"""
+        is_slow = self.slow_query_ms > 0 and duration_ms >= self.slow_query_ms
+        with self._lock:
+            stats = self._methods.get(method)
+            if stats is None:
+                stats = self._methods[method] = _MethodStats(self.sample_size)
+            stats.calls += 1
+            stats.total_ms += duration_ms
+            stats.rows += rows
+            stats.samples.append(duration_ms)
+            if failed:
+                stats.errors += 1
+            if is_slow:
+                stats.slow += 1
+
+        if is_slow:
+            # Аргументы не пишем: среди них бывают пароли и персональные данные
+            slow_query_logger.warning(f"Медленный вызов БД: {method} — {duration_ms:.1f} мс, строк {rows}")
+
+    def get_stats(self, limit: int | None = None) -> list[dict]:
+        """Статистика по методам, отсортированная по суммарному времени"""
+        with self._lock:
+            snapshot = [
+                (method, stats.calls, stats.errors, stats.slow, stats.rows, stats.total_ms, list(stats.samples))
+                for method, stats in self._methods.items()
+            ]
+
+        result = []
+        for method, calls, errors, slow, rows, total_ms, samples in snapshot:
+            samples.sort()
+            p95 = samples[max(0, int(len(samples) * 0.95 + 0.5) - 1)] if samples else 0.0
+            result.append(
+                {
+                    "method": method,
+                    "calls": calls,
+                    "errors": errors,
+                    "slow": slow,
+                    "rows": rows,
+                    "total_ms": total_ms,
+                    "avg_ms": total_ms / calls if calls else 0.0,
+                    "p95_ms": p95,
+                }
+            )
+        result.sort(key=lambda item: item["total_ms"], reverse=True)
+        return result[:limit] if limit else result
+
+    def reset(self):
+        """Сбросить накопленную статистику"""
+        with self._lock:
+            self._methods.clear()
+
+
+def configure_slow_query_log(path: str | None):
+    """Дублировать журнал медленных запросов в отдельный файл"""
+    if not path:
+        return
+    try:
+        handler = logging.FileHandler(path, encoding="utf-8")
+        handler.setFormatter(logging.Formatter("%(asctime)s - %(message)s"))
+        slow_query_logger.addHandler(handler)
+    except OSError as e:
+        logger.warning(f"Не удалось открыть журнал медленных запросов {path}: {e}")
+
+
+def instrument_methods(exclude: set[str] | frozenset[str] = frozenset(), error_logger: logging.Logger | None = None):
+    """
+    Декоратор класса: оборачивает публичные методы замером времени.
+    Экземпляр должен иметь атрибуты metrics (DatabaseMetrics) и pool (SQLiteConnectionPool).
+    Затронутые строки: изменение total_changes подключения, для чтения — длина возвращенного списка.
+    Ошибки: исключение из метода или запись уровня ERROR в error_logger во время вызова
+    (методы перехватывают исключения, пишут ошибку в журнал и возвращают False/None/[]).
+    """
+    if error_logger is not None and not any(isinstance(h, _ErrorMarker) for h in error_logger.handlers):
+        error_logger.addHandler(_ErrorMarker())
+
+    def decorate(cls):
+        for name, func in list(vars(cls).items()):
+            if name.startswith("_") or name in exclude or not callable(func):
+                continue
+            setattr(cls, name, _instrument(name, func))
+        return cls
+
+    return decorate
+
+
+def _instrument(name: str, func):
+    @functools.wraps(func)
+    def wrapper(self, *args, **kwargs):
+        metrics = getattr(self, "metrics", None)
+        if metrics is None:
+            return func(self, *args, **kwargs)
+
+        changes_before = self.pool.total_changes()
+        # Вложенный вызов другого метода учитывает свои ошибки отдельно от внешнего
+        outer_state = (getattr(_call_state, "active", False), getattr(_call_state, "failed", False))
+        _call_state.active, _call_state.failed = True, False
+        started = time.perf_counter()
+        failed = True
+        result = None
+        try:
+            result = func(self, *args, **kwargs)
+            failed = False
+            return result
+        finally:
+            duration_ms = (time.perf_counter() - started) * 1000
+            failed = failed or _call_state.failed
+            _call_state.active, _call_state.failed = outer_state
+            rows = max(0, self.pool.total_changes() - changes_before)
+            if not rows and isinstance(result, list | dict):
+                rows = len(result)
+            metrics.record(name, duration_ms, rows, failed)
+
+    return wrapper
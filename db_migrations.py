@@ -0,0 +1,250 @@
+"""
+Версионированные миграции схемы SQLite
+
+Номер примененной версии хранится в PRAGMA user_version: при теплом старте
+выполняется одно чтение версии и ни одного DDL-запроса.
+Новые изменения схемы добавляются в конец MIGRATIONS со следующим номером версии.
+"""
+
+import logging
+import sqlite3
+from collections.abc import Callable
+from typing import NamedTuple
+
+logger = logging.getLogger(__name__)
+
+
+class Migration(NamedTuple):
+    version: int
+    description: str
+    apply: Callable[[sqlite3.Cursor], None]
+
+
+def column_exists(cursor: sqlite3.Cursor, table: str, column: str) -> bool:
+    """Проверить наличие колонки в таблице"""
+    cursor.execute(f"PRAGMA table_info({table})")
+    return any(row[1] == column for row in cursor.fetchall())
+
+
+def _create_base_tables(cursor: sqlite3.Cursor):
+    # Таблица настроек подключения к Jira для пользователей
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS user_jira_settings (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_email TEXT UNIQUE NOT NULL,
+            user_id TEXT NOT NULL,
+            jira_username TEXT NOT NULL,
+            jira_password TEXT NOT NULL,
+            last_test_success BOOLEAN DEFAULT 0,
+            last_test_at TIMESTAMP,
+            connection_attempts INTEGER DEFAULT 0,
+            is_blocked BOOLEAN DEFAULT 0,
+            blocked_at TIMESTAMP,
+            last_connection_error TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+    # Таблица подписок на проекты
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS project_subscriptions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            project_key TEXT NOT NULL,
+            project_name TEXT,
+            mattermost_channel_id TEXT NOT NULL,
+            mattermost_team_id TEXT,
+            subscribed_by_user_id TEXT NOT NULL,
+            subscribed_by_email TEXT,
+            active BOOLEAN DEFAULT 1,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            UNIQUE(project_key, mattermost_channel_id)
+        )
+    """)
+
+    # Таблица для истории уведомлений
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS notification_history (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            project_key TEXT NOT NULL,
+            issue_key TEXT NOT NULL,
+            notification_type TEXT NOT NULL, -- 'time_exceeded' или 'deadline_overdue'
+            assignee_email TEXT,
+            assignee_name TEXT,
+            channel_id TEXT NOT NULL,
+            issue_summary TEXT,
+            planned_hours REAL DEFAULT 0,
+            actual_hours REAL DEFAULT 0,
+            due_date DATE,
+            notification_date DATE NOT NULL,
+            sent_to_channel BOOLEAN DEFAULT 0,
+            sent_to_assignee BOOLEAN DEFAULT 0,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            UNIQUE(issue_key, notification_type, notification_date)
+        )
+    """)
+
+    # Таблица для кеширования информации о задачах
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS issue_cache (
+            issue_key TEXT PRIMARY KEY,
+            project_key TEXT NOT NULL,
+            summary TEXT,
+            assignee_email TEXT,
+            assignee_name TEXT,
+            status TEXT,
+            due_date DATE,
+            original_estimate REAL DEFAULT 0,
+            time_spent REAL DEFAULT 0,
+            remaining_estimate REAL DEFAULT 0,
+            last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+    # Таблица для хранения производственного календаря
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS production_calendar (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            year INTEGER NOT NULL,
+            holiday_date DATE NOT NULL,
+            is_holiday BOOLEAN DEFAULT 1,
+            is_weekend BOOLEAN DEFAULT 0,
+            description TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            UNIQUE(year, holiday_date)
+        )
+    """)
+
+    # Таблица для отслеживания загрузки календарей
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS calendar_metadata (
+            year INTEGER PRIMARY KEY,
+            is_loaded BOOLEAN DEFAULT 0,
+            last_check_date DATE,
+            last_update_date DATE,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+
+def _add_connection_tracking_columns(cursor: sqlite3.Cursor):
+    # Базы, созданные до появления блокировки пользователей, не содержат этих колонок
+    columns = {
+        "connection_attempts": "INTEGER DEFAULT 0",
+        "is_blocked": "BOOLEAN DEFAULT 0",
+        "blocked_at": "TIMESTAMP",
+        "last_connection_error": "TEXT",
+    }
+    for column, definition in columns.items():
+        if not column_exists(cursor, "user_jira_settings", column):
+            cursor.execute(f"ALTER TABLE user_jira_settings ADD COLUMN {column} {definition}")
+
+
+def _create_indexes(cursor: sqlite3.Cursor):
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_user_email ON user_jira_settings(user_email)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_project_key ON project_subscriptions(project_key)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_channel_id ON project_subscriptions(mattermost_channel_id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_notification_date ON notification_history(notification_date)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_issue_project ON issue_cache(project_key)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_issue_assignee ON issue_cache(assignee_email)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_calendar_year ON production_calendar(year)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_calendar_date ON production_calendar(holiday_date)")
+
+
+def _add_issue_cache_fingerprint(cursor: sqlite3.Cursor):
+    # Отпечаток отслеживаемых полей задачи: неизменившиеся задачи не перезаписываются
+    if not column_exists(cursor, "issue_cache", "fingerprint"):
+        cursor.execute("ALTER TABLE issue_cache ADD COLUMN fingerprint TEXT")
+
+
+def _add_notification_daily_stats(cursor: sqlite3.Cursor):
+    # Дневные агрегаты по проектам: сюда переносятся строки notification_history старше срока хранения
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS notification_daily_stats (
+            notification_date DATE NOT NULL,
+            project_key TEXT NOT NULL,
+            notification_type TEXT NOT NULL,
+            notifications_count INTEGER NOT NULL DEFAULT 0,
+            planned_hours REAL DEFAULT 0,
+            actual_hours REAL DEFAULT 0,
+            PRIMARY KEY (notification_date, project_key, notification_type)
+        ) WITHOUT ROWID
+    """)
+
+    # Покрывающие индексы под отчеты: по датам (история, компактация) и по проекту за период
+    cursor.execute("DROP INDEX IF EXISTS idx_notification_date")
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_notification_date_project_type "
+        "ON notification_history(notification_date, project_key, notification_type)"
+    )
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_notification_project_date "
+        "ON notification_history(project_key, notification_date, notification_type)"
+    )
+
+
+def _add_issue_sync_state(cursor: sqlite3.Cursor):
+    # Время последнего изменения задачи в Jira: нужно правилам при проверке задач из кеша без загрузки
+    if not column_exists(cursor, "issue_cache", "jira_updated"):
+        cursor.execute("ALTER TABLE issue_cache ADD COLUMN jira_updated TEXT")
+        # Сброс отпечатков: следующая полная синхронизация перезапишет строки вместе с jira_updated
+        cursor.execute("UPDATE issue_cache SET fingerprint = NULL")
+
+    # Точка инкрементальной синхронизации проекта (UTC) и время последней полной синхронизации
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS issue_sync_state (
+            project_key TEXT PRIMARY KEY,
+            synced_by_email TEXT,
+            last_sync_at TIMESTAMP,
+            last_full_sync_at TIMESTAMP
+        )
+    """)
+
+
+# Шаги идемпотентны: базы без user_version (созданные до миграций) проходят их без потери данных
+MIGRATIONS: list[Migration] = [
+    Migration(1, "Базовые таблицы", _create_base_tables),
+    Migration(2, "Колонки блокировки в user_jira_settings", _add_connection_tracking_columns),
+    Migration(3, "Индексы", _create_indexes),
+    Migration(4, "Отпечаток полей задачи в issue_cache", _add_issue_cache_fingerprint),
+    Migration(5, "Агрегаты истории уведомлений и покрывающие индексы", _add_notification_daily_stats),
+    Migration(6, "Состояние инкрементальной синхронизации задач", _add_issue_sync_state),
+]
+
+LATEST_VERSION = MIGRATIONS[-1].version
+
+
+def get_schema_version(conn: sqlite3.Connection) -> int:
+    """Получить номер примененной версии схемы"""
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrate(conn: sqlite3.Connection, migrations: list[Migration] | None = None) -> int:
+    """Применить недостающие миграции одной транзакцией; возвращает количество примененных шагов"""
+    migrations = MIGRATIONS if migrations is None else migrations
+    target = migrations[-1].version if migrations else 0
+
+    if get_schema_version(conn) >= target:
+        return 0
+
+    # Блокировка на запись до повторного чтения версии: параллельный процесс не применит те же шаги
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        current = get_schema_version(conn)
+        cursor = conn.cursor()
+        applied = 0
+        for migration in migrations:
+            if migration.version <= current:
+                continue
+            migration.apply(cursor)
+            cursor.execute(f"PRAGMA user_version = {int(migration.version)}")
+            applied += 1
+            logger.info(f"Применена миграция схемы БД {migration.version}: {migration.description}")
+        conn.commit()
+        return applied
+    except Exception:
+        conn.rollback()
+        raise
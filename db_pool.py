@@ -0,0 +1,123 @@
+"""
+Пул долгоживущих подключений SQLite: одно подключение на поток, WAL и настроенные PRAGMA
+"""
+
+import logging
+import sqlite3
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class SQLiteConnectionPool:
+    def __init__(
+        self,
+        db_path: str,
+        mmap_size: int = 64 * 1024 * 1024,
+        cache_size_kb: int = 16384,
+        statement_cache_size: int = 256,
+        busy_timeout_ms: int = 5000,
+    ):
+        self.db_path = db_path
+        self.mmap_size = mmap_size
+        self.cache_size_kb = cache_size_kb
+        self.statement_cache_size = statement_cache_size
+        self.busy_timeout_ms = busy_timeout_ms
+
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        # thread ident -> (поток, подключение); нужен для статистики и закрытия подключений завершившихся потоков
+        self._connections: dict[int, tuple[threading.Thread, sqlite3.Connection]] = {}
+        self._created = 0
+        self._reused = 0
+        self._closed = 0
+
+    def connection(self) -> sqlite3.Connection:
+        """Получить подключение текущего потока (создается при первом обращении)"""
+        conn = getattr(self._local, "connection", None)
+        if conn is not None:
+            with self._lock:
+                self._reused += 1
+            return conn
+
+        conn = self._create_connection()
+        self._local.connection = conn
+
+        current = threading.current_thread()
+        with self._lock:
+            self._prune_dead_threads()
+            self._connections[current.ident] = (current, conn)
+            self._created += 1
+
+        logger.debug(f"Создано подключение SQLite для потока {current.name}")
+        return conn
+
+    def total_changes(self) -> int:
+        """
+        Количество строк, измененных через подключение текущего потока (0, если его еще нет).
+        Читает подключение потока напрямую, без connection(): замеры метрик не попадают в статистику пула.
+        """
+        conn = getattr(self._local, "connection", None)
+        return conn.total_changes if conn is not None else 0
+
+    def _create_connection(self) -> sqlite3.Connection:
+        """Открыть подключение и применить PRAGMA"""
+        # check_same_thread=False нужен только для закрытия подключений из другого потока в close_all();
+        # выполнять запросы через чужое подключение пул не позволяет
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=self.busy_timeout_ms / 1000.0,
+            cached_statements=self.statement_cache_size,
+            check_same_thread=False,
+        )
+
+        try:
+            journal_mode = conn.execute("PRAGMA journal_mode=WAL").fetchone()
+            if journal_mode and str(journal_mode[0]).lower() != "wal":
+                logger.warning(f"SQLite не перешла в режим WAL (текущий режим: {journal_mode[0]})")
+        except sqlite3.OperationalError as e:
+            logger.warning(f"Не удалось включить WAL для {self.db_path}: {e}")
+
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(f"PRAGMA mmap_size={int(self.mmap_size)}")
+        # Отрицательное значение cache_size задает размер в KiB, а не в страницах
+        conn.execute(f"PRAGMA cache_size=-{int(self.cache_size_kb)}")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        conn.execute(f"PRAGMA busy_timeout={int(self.busy_timeout_ms)}")
+        return conn
+
+    def _prune_dead_threads(self):
+        """Закрыть подключения потоков, которые уже завершились (вызывается под блокировкой)"""
+        for ident, (thread, conn) in list(self._connections.items()):
+            if thread.is_alive():
+                continue
+            try:
+                conn.close()
+            except Exception as e:
+                logger.debug(f"Ошибка закрытия подключения завершившегося потока {thread.name}: {e}")
+            del self._connections[ident]
+            self._closed += 1
+
+    def close_all(self):
+        """Закрыть все подключения пула"""
+        with self._lock:
+            for thread, conn in self._connections.values():
+                try:
+                    conn.close()
+                except Exception as e:
+                    logger.debug(f"Ошибка закрытия подключения потока {thread.name}: {e}")
+                self._closed += 1
+            self._connections.clear()
+        # Подключение текущего потока закрыто выше, следующий вызов connection() создаст новое
+        self._local = threading.local()
+
+    def get_stats(self) -> dict:
+        """Получить статистику пула"""
+        with self._lock:
+            return {
+                "active": len(self._connections),
+                "created": self._created,
+                "reused": self._reused,
+                "closed": self._closed,
+                "threads": [thread.name for thread, _ in self._connections.values()],
+            }
@@ -0,0 +1,268 @@
+"""
+Фоновая запись в базу данных (write-behind) для истории уведомлений и кеша задач
+"""
+
+import atexit
+import logging
+import queue
+import threading
+import time
+from collections.abc import Iterable
+from datetime import UTC, datetime
+
+from config import config
+from database import DatabaseManager, db_manager
+
+logger = logging.getLogger(__name__)
+
+
+class DatabaseWriter:
+    def __init__(
+        self,
+        database: DatabaseManager,
+        max_queue_size: int = 10000,
+        flush_interval: float = 1.0,
+        max_batch_size: int = 1000,
+    ):
+        self.database = database
+        self.flush_interval = flush_interval
+        self.max_batch_size = max_batch_size
+        self._queue: queue.Queue = queue.Queue(maxsize=max_queue_size)
+        self._lock = threading.Lock()
+        # Операции, прошедшие проверку остановки и еще не поставленные в очередь; stop() дожидается их
+        self._submitting = 0
+        self._submitted = threading.Condition(self._lock)
+        self._thread: threading.Thread | None = None
+        self._stopped = False
+        self._atexit_registered = False
+        self._stats = {"enqueued": 0, "written": 0, "batches": 0, "sync_writes": 0, "failed_batches": 0}
+
+    # ── Публичный API: постановка записей в очередь ─────────────
+
+    def save_notification(
+        self,
+        project_key: str,
+        issue_key: str,
+        notification_type: str,
+        assignee_email: str,
+        assignee_name: str,
+        channel_id: str,
+        issue_summary: str,
+        planned_hours: float,
+        actual_hours: float,
+        due_date: str | None = None,
+    ):
+        """Поставить в очередь запись об отправленном уведомлении"""
+        # Дату фиксируем в момент постановки в очередь (как DATE('now') в SQLite — по UTC)
+        notification_date = datetime.now(UTC).date().isoformat()
+        row = (
+            project_key,
+            issue_key,
+            notification_type,
+            assignee_email,
+            assignee_name,
+            channel_id,
+            issue_summary,
+            planned_hours,
+            actual_hours,
+            due_date,
+            notification_date,
+        )
+        self._submit(("notification", row))
+
+    def update_issue_cache(self, *row):
+        """Поставить в очередь обновление одной задачи в кеше (поля строки как у DatabaseManager.update_issue_cache_many)"""
+        self._submit(("row", tuple(row)))
+
+    def update_issue_cache_many(
+        self, project_key: str, rows: list[tuple], remove_missing: bool = True, keep_keys: Iterable[str] = ()
+    ):
+        """Поставить в очередь запись снимка проекта в кеш задач"""
+        self._submit(("snapshot", (project_key, list(rows), remove_missing, list(keep_keys))))
+
+    def failure_mark(self) -> int:
+        """Отметка для flush(since=...): количество неудачных пакетов на момент вызова"""
+        with self._lock:
+            return self._stats["failed_batches"]
+
+    def flush(self, timeout: float = 30.0, since: int | None = None) -> bool:
+        """
+        Дождаться записи всего, что было поставлено в очередь до вызова.
+        False — запись не завершилась за timeout или пакет не записан после отметки since
+        (failure_mark(), взятой до постановки операций в очередь; по умолчанию — момент вызова).
+        """
+        if since is None:
+            since = self.failure_mark()
+        with self._lock:
+            running = self._thread is not None and self._thread.is_alive() and not self._stopped
+
+        if running:
+            done = threading.Event()
+            self._queue.put(("flush", done))
+            if not done.wait(timeout):
+                logger.warning(f"Фоновая запись в БД не завершилась за {timeout} с")
+                return False
+
+        failed = self.failure_mark() - since
+        if failed > 0:
+            logger.warning(f"Фоновая запись в БД: не записано пакетов — {failed}")
+            return False
+        return True
+
+    def stop(self, timeout: float = 30.0):
+        """Записать все накопленные изменения и остановить фоновый поток"""
+        with self._lock:
+            if self._stopped:
+                return
+            self._stopped = True
+            thread = self._thread
+            # Иначе операция, прошедшая проверку до остановки, попадет в очередь после последнего сброса
+            if not self._submitted.wait_for(lambda: self._submitting == 0, timeout):
+                logger.error("Постановка операций в очередь записи в БД не завершилась вовремя")
+
+        if thread is not None and thread.is_alive():
+            self._queue.put(("stop", None))
+            thread.join(timeout)
+            if thread.is_alive():
+                logger.error("Фоновый поток записи в БД не остановился вовремя")
+                return
+
+        # Все, что могло попасть в очередь после остановки потока, пишем синхронно
+        items, waiters = self._drain_nowait()
+        self._write_batch(items)
+        for waiter in waiters:
+            waiter.set()
+        logger.info("Фоновая запись в БД остановлена, очередь сброшена")
+
+    def get_stats(self) -> dict:
+        """Получить статистику фоновой записи"""
+        with self._lock:
+            stats = dict(self._stats)
+        stats["queued"] = self._queue.qsize()
+        return stats
+
+    # ── Внутренняя логика ────────────────────────────────────────────────
+
+    def _submit(self, item: tuple):
+        """Поставить операцию в очередь; после остановки или при переполнении — писать синхронно"""
+        with self._lock:
+            stopped = self._stopped
+            if not stopped:
+                self._ensure_started()
+                self._stats["enqueued"] += 1
+                self._submitting += 1
+
+        if stopped:
+            self._write_sync(item)
+            return
+
+        try:
+            self._queue.put(item, timeout=self.flush_interval)
+            queued = True
+        except queue.Full:
+            queued = False
+        finally:
+            with self._lock:
+                self._submitting -= 1
+                self._submitted.notify_all()
+
+        if not queued:
+            logger.warning("Очередь фоновой записи в БД переполнена, записываем синхронно")
+            self._write_sync(item)
+
+    def _write_sync(self, item: tuple):
+        with self._lock:
+            self._stats["sync_writes"] += 1
+        self._write_batch([item])
+
+    def _ensure_started(self):
+        """Запустить фоновый поток при первой записи (вызывается под блокировкой)"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._thread = threading.Thread(target=self._run, name="db-writer", daemon=True)
+        self._thread.start()
+        if not self._atexit_registered:
+            atexit.register(self.stop)
+            self._atexit_registered = True
+
+    def _run(self):
+        """Основной цикл: копим операции не дольше flush_interval и пишем одной транзакцией"""
+        while True:
+            batch: list[tuple] = []
+            waiters: list[threading.Event] = []
+            stop_requested = False
+            deadline = time.monotonic() + self.flush_interval
+
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+
+                kind, payload = item
+                if kind == "flush":
+                    waiters.append(payload)
+                    break
+                if kind == "stop":
+                    stop_requested = True
+                    break
+                batch.append(item)
+
+            if stop_requested:
+                items, drained_waiters = self._drain_nowait()
+                batch.extend(items)
+                waiters.extend(drained_waiters)
+
+            self._write_batch(batch)
+            for waiter in waiters:
+                waiter.set()
+
+            if stop_requested:
+                return
+
+    def _drain_nowait(self) -> tuple[list[tuple], list[threading.Event]]:
+        """Забрать из очереди все операции и ожидающие flush без ожидания"""
+        items = []
+        waiters = []
+        while True:
+            try:
+                kind, payload = self._queue.get_nowait()
+            except queue.Empty:
+                return items, waiters
+            if kind == "flush":
+                waiters.append(payload)
+            elif kind != "stop":
+                items.append((kind, payload))
+
+    def _write_batch(self, batch: list[tuple]):
+        """Схлопнуть операции и записать их одной транзакцией"""
+        if not batch:
+            return
+
+        # Уведомления уникальны по (issue_key, notification_type, notification_date) — оставляем последнее
+        notifications: dict[tuple, tuple] = {}
+        cache_ops: list[tuple] = []
+        for kind, payload in batch:
+            if kind == "notification":
+                notifications[(payload[1], payload[2], payload[10])] = payload
+            else:
+                cache_ops.append((kind, payload))
+
+        success = self.database.apply_write_batch(list(notifications.values()), cache_ops)
+        with self._lock:
+            if success:
+                self._stats["written"] += len(batch)
+                self._stats["batches"] += 1
+            else:
+                self._stats["failed_batches"] += 1
+
+
+# Глобальный экземпляр фоновой записи
+db_writer = DatabaseWriter(
+    db_manager,
+    max_queue_size=config.DB_WRITE_QUEUE_SIZE,
+    flush_interval=config.DB_WRITE_FLUSH_INTERVAL,
+)
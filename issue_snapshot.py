@@ -0,0 +1,176 @@
+"""
+Компактная запись задачи Jira для правил мониторинга и аналитики.
+Строится один раз из JSON ответа поиска: даты разобраны, трудозатраты переведены в часы,
+статус и исполнитель интернированы, признак закрытия вычислен по списку закрытых статусов потребителя.
+"""
+
+import sys
+from collections.abc import Iterable
+from datetime import date, datetime
+
+UNASSIGNED = "Не назначен"
+JIRA_DATETIME_FORMAT = "%Y-%m-%dT%H:%M:%S.%f%z"
+
+
+def parse_jira_datetime(value: str | None) -> datetime | None:
+    """Разобрать время из ответа Jira (2026-10-16T09:30:00.000+0300); смещение сервера сохраняется"""
+    if not value:
+        return None
+    try:
+        return datetime.strptime(value, JIRA_DATETIME_FORMAT)
+    except ValueError:
+        return None
+
+
+def format_jira_datetime(value: datetime | None) -> str | None:
+    """Время в формате ответа Jira (миллисекунды, смещение без двоеточия)"""
+    if value is None:
+        return None
+    return f"{value:%Y-%m-%dT%H:%M:%S}.{value.microsecond // 1000:03d}{value:%z}"
+
+
+def parse_jira_date(value: str | None) -> date | None:
+    """Дата из поля Jira (2026-10-16 или начало значения времени) — по календарю сервера"""
+    if not value:
+        return None
+    try:
+        return date.fromisoformat(value[:10])
+    except ValueError:
+        return None
+
+
+def first_closed_date(histories: Iterable[dict], closed_statuses: frozenset[str]) -> date | None:
+    """Дата первого перехода в закрытый статус по истории изменений (changelog.histories из JSON)"""
+    for history in histories:
+        for item in history.get("items", ()):
+            if item.get("field") == "status" and item.get("toString") in closed_statuses:
+                return parse_jira_date(history.get("created"))
+    return None
+
+
+def _intern(value: str | None) -> str | None:
+    return sys.intern(value) if value else value
+
+
+class IssueSnapshot:
+    """Задача Jira: только поля, которые читают правила, уведомления, кеш и аналитика"""
+
+    __slots__ = (
+        "assignee_email",
+        "assignee_name",
+        "changelog_loaded",
+        "closed_on",
+        "created",
+        "due_date",
+        "is_closed",
+        "issue_type",
+        "key",
+        "original_hours",
+        "remaining_hours",
+        "spent_hours",
+        "status",
+        "summary",
+        "updated",
+    )
+
+    def __init__(
+        self,
+        key: str,
+        summary: str = "",
+        status: str = "",
+        is_closed: bool = False,
+        assignee_name: str | None = None,
+        assignee_email: str | None = None,
+        issue_type: str | None = None,
+        due_date: date | None = None,
+        created: date | None = None,
+        updated: datetime | None = None,
+        original_hours: float = 0.0,
+        spent_hours: float = 0.0,
+        remaining_hours: float = 0.0,
+        closed_on: date | None = None,
+        changelog_loaded: bool = False,
+    ):
+        self.key = key
+        self.summary = summary
+        self.status = status
+        self.is_closed = is_closed
+        self.assignee_name = assignee_name  # None — задача не назначена
+        self.assignee_email = assignee_email
+        self.issue_type = issue_type
+        self.due_date = due_date
+        self.created = created
+        self.updated = updated
+        self.original_hours = original_hours
+        self.spent_hours = spent_hours
+        self.remaining_hours = remaining_hours
+        # Дата первого закрытия по истории изменений; достоверна, только если changelog_loaded
+        self.closed_on = closed_on
+        self.changelog_loaded = changelog_loaded
+
+    @property
+    def assignee_label(self) -> str:
+        """Имя исполнителя для отчетов и уведомлений"""
+        return self.assignee_name or UNASSIGNED
+
+    def __repr__(self) -> str:
+        return f"IssueSnapshot({self.key!r}, status={self.status!r})"
+
+    @classmethod
+    def from_json(cls, raw: dict, closed_statuses: frozenset[str]) -> "IssueSnapshot":
+        """Собрать запись из задачи в JSON ответа /search (fields и, если запрошен, changelog)"""
+        fields = raw.get("fields") or {}
+        status = (fields.get("status") or {}).get("name") or ""
+        assignee = fields.get("assignee") or {}
+        changelog = raw.get("changelog")
+        return cls(
+            key=raw["key"],
+            summary=fields.get("summary") or "",
+            status=sys.intern(status),
+            is_closed=status in closed_statuses,
+            assignee_name=_intern(assignee.get("displayName")),
+            assignee_email=_intern(assignee.get("emailAddress")),
+            issue_type=_intern((fields.get("issuetype") or {}).get("name")),
+            due_date=parse_jira_date(fields.get("duedate")),
+            created=parse_jira_date(fields.get("created")),
+            updated=parse_jira_datetime(fields.get("updated")),
+            original_hours=(fields.get("timeoriginalestimate") or 0) / 3600.0,
+            spent_hours=(fields.get("timespent") or 0) / 3600.0,
+            remaining_hours=(fields.get("timeestimate") or 0) / 3600.0,
+            closed_on=first_closed_date(changelog.get("histories", ()), closed_statuses) if changelog else None,
+            changelog_loaded=changelog is not None,
+        )
+
+    @classmethod
+    def from_cache_row(cls, row: tuple, closed_statuses: frozenset[str]) -> "IssueSnapshot":
+        """Собрать запись из строки get_cached_issues (трудозатраты в кеше уже в часах)"""
+        (
+            issue_key,
+            summary,
+            assignee_email,
+            assignee_name,
+            status,
+            due_date,
+            original_hours,
+            spent_hours,
+            remaining_hours,
+            _fingerprint,
+            _last_updated,
+            jira_updated,
+        ) = row
+        status = status or ""
+        if assignee_name == UNASSIGNED and not assignee_email:
+            assignee_name = None
+        return cls(
+            key=issue_key,
+            summary=summary or "",
+            status=sys.intern(status),
+            is_closed=status in closed_statuses,
+            assignee_name=_intern(assignee_name),
+            assignee_email=_intern(assignee_email),
+            due_date=parse_jira_date(due_date),
+            updated=parse_jira_datetime(jira_updated),
+            original_hours=original_hours or 0.0,
+            spent_hours=spent_hours or 0.0,
+            remaining_hours=remaining_hours or 0.0,
+        )
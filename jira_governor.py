@@ -0,0 +1,240 @@
+"""
+Ограничитель исходящих запросов к Jira: темп запросов к хосту (token bucket), адаптивный лимит
+параллельных запросов на учетные данные (AIMD по задержке и ответам 429/503) и общая пауза по Retry-After
+"""
+
+import hashlib
+import logging
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from http import HTTPStatus
+
+from config import config
+
+logger = logging.getLogger(__name__)
+
+# Ответы, означающие перегрузку сервера: уменьшаем параллельность и выдерживаем Retry-After
+THROTTLE_STATUSES = frozenset({HTTPStatus.TOO_MANY_REQUESTS, HTTPStatus.SERVICE_UNAVAILABLE})
+
+
+def parse_retry_after(value: str | None, now: float | None = None) -> float | None:
+    """Задержка из заголовка Retry-After в секундах (число секунд или HTTP-дата)"""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        retry_at = parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, retry_at - (time.time() if now is None else now))
+
+
+def credential_key(authorization: str | None) -> str:
+    """Ключ учетных данных по заголовку Authorization (сам заголовок в памяти ограничителя не хранится)"""
+    if not authorization:
+        return "anonymous"
+    return hashlib.blake2b(authorization.encode(), digest_size=8).hexdigest()
+
+
+class TokenBucket:
+    """Темп запросов к хосту: rate запросов в секунду с запасом burst; rate <= 0 — без ограничения"""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._lock = threading.Lock()
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+
+    def acquire(self) -> float:
+        """Дождаться разрешения на запрос; возвращает время ожидания в секундах"""
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                if self._paused_until > now:
+                    delay = self._paused_until - now
+                elif self.rate <= 0:
+                    return waited
+                else:
+                    self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                    self._updated = now
+                    if self._tokens >= 1:
+                        self._tokens -= 1
+                        return waited
+                    delay = (1 - self._tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+    def pause(self, seconds: float):
+        """Не выдавать разрешений ближайшие seconds секунд (Retry-After)"""
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+            # После паузы запросы возобновляются без накопленного запаса
+            self._tokens = 0.0
+            self._updated = self._paused_until
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            now = time.monotonic()
+            tokens = self._tokens
+            if self.rate > 0 and now > self._updated:
+                tokens = min(self.burst, tokens + (now - self._updated) * self.rate)
+            return {
+                "rate": self.rate,
+                "tokens": round(max(0.0, tokens), 1),
+                "paused_for": round(max(0.0, self._paused_until - now), 1),
+            }
+
+
+class AdaptiveLimiter:
+    """
+    Лимит параллельных запросов (AIMD): быстрый ответ увеличивает лимит на 1/limit (примерно +1 за окно),
+    перегрузка (429/503, ошибка соединения, задержка выше целевой) уменьшает его вдвое, не чаще раза за cooldown
+    """
+
+    def __init__(self, initial: int, max_limit: int, latency_target: float, cooldown: float = 1.0):
+        self.max_limit = max(1, max_limit)
+        self.latency_target = latency_target
+        self.cooldown = cooldown
+        self._limit = float(min(max(1, initial), self.max_limit))
+        self._in_flight = 0
+        self._condition = threading.Condition()
+        self._last_decrease = 0.0
+        self.decreases = 0
+
+    @property
+    def limit(self) -> int:
+        return int(self._limit)
+
+    def acquire(self):
+        with self._condition:
+            while self._in_flight >= int(self._limit):
+                self._condition.wait()
+            self._in_flight += 1
+
+    def release(self, overloaded: bool, latency: float):
+        with self._condition:
+            self._in_flight -= 1
+            if overloaded or (self.latency_target > 0 and latency > self.latency_target):
+                now = time.monotonic()
+                # Ответы запросов, отправленных до снижения, не снижают лимит повторно
+                if now - self._last_decrease >= self.cooldown:
+                    self._limit = max(1.0, self._limit / 2)
+                    self._last_decrease = now
+                    self.decreases += 1
+            else:
+                self._limit = min(float(self.max_limit), self._limit + 1 / self._limit)
+            self._condition.notify_all()
+
+    def cancel(self):
+        """Освободить слот запроса, который не был отправлен"""
+        with self._condition:
+            self._in_flight -= 1
+            self._condition.notify_all()
+
+    def get_stats(self) -> dict:
+        with self._condition:
+            return {"limit": int(self._limit), "in_flight": self._in_flight, "decreases": self.decreases}
+
+
+class JiraGovernor:
+    def __init__(
+        self,
+        rate: float = 20,
+        burst: int = 20,
+        initial_concurrency: int = 4,
+        max_concurrency: int = 8,
+        latency_target_ms: float = 5000,
+        max_retry_after: float = 120,
+    ):
+        self.rate = rate
+        self.burst = burst
+        self.initial_concurrency = initial_concurrency
+        self.max_concurrency = max_concurrency
+        self.latency_target = latency_target_ms / 1000
+        self.max_retry_after = max_retry_after
+        self._lock = threading.Lock()
+        self._buckets: dict[str, TokenBucket] = {}
+        self._limiters: dict[str, AdaptiveLimiter] = {}
+        self._requests = 0
+        self._throttled = 0
+        self._wait_seconds = 0.0
+
+    def _bucket(self, host: str) -> TokenBucket:
+        with self._lock:
+            bucket = self._buckets.get(host)
+            if bucket is None:
+                bucket = self._buckets[host] = TokenBucket(self.rate, self.burst)
+            return bucket
+
+    def _limiter(self, credential: str) -> AdaptiveLimiter:
+        with self._lock:
+            limiter = self._limiters.get(credential)
+            if limiter is None:
+                limiter = self._limiters[credential] = AdaptiveLimiter(
+                    self.initial_concurrency, self.max_concurrency, self.latency_target
+                )
+            return limiter
+
+    def acquire(self, host: str, credential: str):
+        """Занять слот учетных данных и дождаться разрешения темпа хоста"""
+        limiter = self._limiter(credential)
+        limiter.acquire()
+        try:
+            waited = self._bucket(host).acquire()
+        except BaseException:
+            limiter.cancel()
+            raise
+        with self._lock:
+            self._requests += 1
+            self._wait_seconds += waited
+
+    def release(self, host: str, credential: str, status: int | None, latency: float, retry_after: str | None = None):
+        """Освободить слот и учесть ответ: status None — запрос завершился ошибкой соединения"""
+        throttled = status in THROTTLE_STATUSES
+        self._limiter(credential).release(overloaded=status is None or throttled, latency=latency)
+        if not throttled:
+            return
+
+        with self._lock:
+            self._throttled += 1
+        delay = parse_retry_after(retry_after)
+        if delay is not None:
+            delay = min(delay, self.max_retry_after)
+            # Пауза общая для хоста: остальные пользователи тоже не отправляют запросы до ее окончания
+            self._bucket(host).pause(delay)
+        logger.warning(f"Jira {host} ответила {status}: параллельность снижена, пауза {delay or 0:.0f} с")
+
+    def get_stats(self) -> dict:
+        """Состояние ограничителя для команды status"""
+        with self._lock:
+            buckets = dict(self._buckets)
+            limiters = list(self._limiters.values())
+            stats = {
+                "requests": self._requests,
+                "throttled": self._throttled,
+                "wait_seconds": round(self._wait_seconds, 1),
+            }
+        limiter_stats = [limiter.get_stats() for limiter in limiters]
+        stats["hosts"] = {host: bucket.get_stats() for host, bucket in buckets.items()}
+        stats["credentials"] = len(limiter_stats)
+        stats["in_flight"] = sum(item["in_flight"] for item in limiter_stats)
+        stats["limits"] = sorted(item["limit"] for item in limiter_stats)
+        stats["max_concurrency"] = self.max_concurrency
+        return stats
+
+
+# Глобальный экземпляр
+jira_governor = JiraGovernor(
+    rate=config.JIRA_RATE_LIMIT,
+    burst=config.JIRA_RATE_BURST,
+    initial_concurrency=config.JIRA_PAGE_CONCURRENCY,
+    max_concurrency=config.JIRA_MAX_CONCURRENCY,
+    latency_target_ms=config.JIRA_LATENCY_TARGET_MS,
+    max_retry_after=config.JIRA_RETRY_AFTER_MAX,
+)
@@ -0,0 +1,313 @@
+"""
+Постраничная потоковая выборка задач Jira по JQL
+"""
+
+import itertools
+import json
+import logging
+import time
+from collections import deque
+from collections.abc import Callable, Generator, Iterable, Iterator
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, NamedTuple
+
+from jira import JIRA
+from jira.client import ResultList
+
+try:
+    import orjson
+except ImportError:  # Необязательная зависимость: без нее ответы разбираются стандартным json
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+
+class FetchProfile(NamedTuple):
+    fields: tuple[str, ...]
+    expand: str | None = None
+
+
+# Набор полей под каждого потребителя: Jira не отдает лишние поля, worklog и changelog
+FETCH_PROFILES: dict[str, FetchProfile] = {
+    # Мониторинг: changelog догружается по требованию только для закрытых задач с перерасходом
+    "monitor": FetchProfile(
+        fields=(
+            "summary",
+            "status",
+            "assignee",
+            "duedate",
+            "timeoriginalestimate",
+            "timespent",
+            "timeestimate",
+            "updated",
+        ),
+    ),
+    # Аналитика: changelog нужен для дат закрытия большинства закрытых задач, поэтому сразу в выборке
+    "analytics": FetchProfile(
+        fields=("status", "assignee", "issuetype", "timeoriginalestimate", "timespent", "duedate", "created"),
+        expand="changelog",
+    ),
+}
+
+
+def jql_quote(value: str) -> str:
+    """Строковое значение для JQL в двойных кавычках"""
+    return '"' + value.replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+
+def json_loads(content: bytes):
+    """Разобрать тело ответа Jira: orjson, если установлен, иначе json"""
+    if orjson is not None:
+        return orjson.loads(content)
+    return json.loads(content)
+
+
+class RawSearchClient:
+    """
+    Поиск задач запросом GET /rest/api/2/search через сессию клиента jira (те же учетные данные,
+    пул соединений, ограничитель и повторы ResilientSession). В отличие от search_issues(json_result=True)
+    не загружает справочник полей (/field) для перевода имен и разбирает JSON без response.json().
+    Поддерживает только json_result=True: ответ — словарь {startAt, maxResults, total, issues}.
+    """
+
+    def __init__(self, jira_client: JIRA):
+        self.jira_client = jira_client
+        self.url = jira_client._get_url("search")
+
+    def search_issues(
+        self,
+        jql_str: str,
+        startAt: int = 0,
+        maxResults: int = 50,
+        fields: str | list[str] | tuple[str, ...] | None = "*all",
+        expand: str | None = None,
+        json_result: bool = True,
+    ) -> dict:
+        if not json_result:
+            raise ValueError("RawSearchClient возвращает только JSON ответа поиска")
+        params = {"jql": jql_str, "startAt": startAt, "maxResults": maxResults, "validateQuery": "true"}
+        if fields is not None:
+            params["fields"] = fields if isinstance(fields, str) else ",".join(fields)
+        if expand:
+            params["expand"] = expand
+        # Ошибочные ответы ResilientSession превращает в JIRAError, как и в search_issues
+        response = self.jira_client._session.get(self.url, params=params)
+        return json_loads(response.content)
+
+
+class IssueStream:
+    """
+    Итератор задач по JQL: страницы (startAt/maxResults) запрашиваются по мере потребления.
+    При concurrency > 1 после первой страницы (известен total) следующие страницы запрашиваются
+    параллельно волнами, результат выдается в исходном порядке; в памяти не больше concurrency страниц.
+    Неудачная страница повторяется отдельно до retries раз. Повторная итерация выполняет выборку заново.
+    parse — построитель записи из JSON задачи: страницы запрашиваются без объектов jira.Issue
+    (jira_client может быть RawSearchClient — тогда и без разбора ответа библиотекой jira).
+    """
+
+    def __init__(
+        self,
+        jira_client: JIRA | RawSearchClient,
+        jql: str,
+        page_size: int = 100,
+        fields: str | list[str] | tuple[str, ...] | None = "*all",
+        expand: str | None = None,
+        concurrency: int = 1,
+        retries: int = 0,
+        parse: Callable[[dict], Any] | None = None,
+    ):
+        self.jira_client = jira_client
+        self.jql = jql
+        self.page_size = page_size
+        self.fields = fields
+        self.expand = expand
+        self.concurrency = max(1, concurrency)
+        self.retries = max(0, retries)
+        self.parse = parse
+
+        self.total: int | None = None  # Известно после первой страницы
+        self.fetched = 0
+        self.pages = 0
+        self.complete = False  # Получены все задачи выборки
+        self.error: Exception | None = None
+
+    def __iter__(self) -> Iterator:
+        self.total = None
+        self.fetched = 0
+        self.pages = 0
+        self.complete = False
+        self.error = None
+
+        offset = 0
+        step = self.page_size
+        while True:
+            if self.concurrency > 1 and self.total is not None and offset < self.total:
+                # Оставшиеся страницы известны заранее: запрашиваем их параллельно
+                offsets = range(offset, self.total, step)
+                completed = yield from self._iter_parallel(offsets)
+                if not completed:
+                    return
+                offset = offsets[-1] + step
+                if offset >= self.total:
+                    break
+                continue
+
+            page = self._fetch_page(offset)
+            if page is None:
+                return
+            self._accept_page(page)
+            # Сервер мог ограничить maxResults: шаг следующих страниц — фактический размер страницы
+            if offset == 0 and 0 < len(page) < self.page_size and (self.total or 0) > len(page):
+                step = len(page)
+
+            yield from page
+            self.fetched += len(page)
+            offset += len(page)
+
+            if not page or (self.total is not None and offset >= self.total):
+                break
+            if self.total is None and len(page) < self.page_size:
+                break
+
+        self.complete = True
+        logger.debug(f"Получено {self.fetched} задач за {self.pages} страниц по запросу {self.jql}")
+
+    def _iter_parallel(self, offsets: range) -> Generator[Any, None, bool]:
+        """Выдать задачи страниц offsets по порядку; False — страница не получена после повторов"""
+        offsets_iter = iter(offsets)
+        executor = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="jira-pages")
+        try:
+            pending: deque[Future] = deque(
+                executor.submit(self._fetch_page, offset) for offset in itertools.islice(offsets_iter, self.concurrency)
+            )
+            while pending:
+                page = pending.popleft().result()
+                if page is None:
+                    return False
+                # Окно: новая страница запрашивается, когда предыдущая выдана потребителю
+                next_offset = next(offsets_iter, None)
+                if next_offset is not None:
+                    pending.append(executor.submit(self._fetch_page, next_offset))
+
+                self._accept_page(page)
+                yield from page
+                self.fetched += len(page)
+            return True
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    def _accept_page(self, page):
+        self.pages += 1
+        total = getattr(page, "total", None)
+        if total is not None:
+            self.total = total
+
+    def _fetch_page(self, offset: int):
+        """Запросить страницу с повторами; None — страница не получена (ошибка в self.error)"""
+        for attempt in range(self.retries + 1):
+            try:
+                return self._search(offset)
+            except Exception as e:
+                if attempt < self.retries:
+                    logger.warning(f"Повтор страницы задач (startAt={offset}) по запросу {self.jql}: {e}")
+                    time.sleep(min(0.5 * 2**attempt, 5.0))
+                    continue
+                # Выборка обрывается: потребитель видит complete=False и не считает снимок полным
+                self.error = e
+                logger.error(f"Ошибка получения страницы задач (startAt={offset}) по запросу {self.jql}: {e}")
+        return None
+
+    def _search(self, offset: int):
+        # Копия: клиент jira переводит имена полей на месте в переданном списке
+        fields = list(self.fields) if isinstance(self.fields, list | tuple) else self.fields
+        if self.parse is None:
+            return self.jira_client.search_issues(
+                self.jql, startAt=offset, maxResults=self.page_size, fields=fields, expand=self.expand
+            )
+
+        payload = self.jira_client.search_issues(
+            self.jql, startAt=offset, maxResults=self.page_size, fields=fields, expand=self.expand, json_result=True
+        )
+        return ResultList(
+            [self.parse(raw) for raw in payload.get("issues", [])],
+            _startAt=payload.get("startAt", offset),
+            _maxResults=payload.get("maxResults", self.page_size),
+            _total=payload.get("total"),
+        )
+
+
+def issue_project_key(issue) -> str:
+    """Ключ проекта по ключу задачи (PRJ-123 -> PRJ)"""
+    return issue.key.rsplit("-", 1)[0]
+
+
+class ProjectIssueSlice:
+    """
+    Задачи одного проекта из совместной выборки нескольких проектов. Итерируется один раз.
+    complete известен только после окончания всей выборки: задачи проекта могли прийти
+    еще одной группой позже (порядок выдачи нарушен между страницами) — тогда все группы проекта неполные.
+    """
+
+    def __init__(self, stream: IssueStream, project_key: str, issues: Iterable, repeated: set[str]):
+        self._stream = stream
+        self._issues = iter(issues)
+        self._repeated = repeated
+        self._finished = False
+        self.project_key = project_key
+        self.fetched = 0
+
+    @property
+    def complete(self) -> bool:
+        return self._finished and self._stream.complete and self.project_key not in self._repeated
+
+    @property
+    def pages(self) -> int:
+        return self._stream.pages
+
+    @property
+    def total(self) -> int | None:
+        return self.fetched if self.complete else None
+
+    def __iter__(self) -> Iterator:
+        for issue in self._issues:
+            self.fetched += 1
+            yield issue
+        self._finished = True
+
+
+def split_issues_by_project(
+    stream: IssueStream, project_keys: Iterable[str]
+) -> Iterator[tuple[str, ProjectIssueSlice]]:
+    """
+    Разделить совместную выборку (JQL "project in (...)" с сортировкой по проекту) на выборки по проектам.
+    Задачи проекта идут подряд, поэтому в памяти держится не больше страницы.
+    Проекты без задач возвращаются в конце с пустой выборкой.
+    Полнота выборок (complete) читается после окончания итерации по всем проектам.
+    """
+    remaining = list(dict.fromkeys(project_keys))
+    seen = set()
+    repeated: set[str] = set()
+
+    for project_key, group in itertools.groupby(stream, key=issue_project_key):
+        if project_key not in remaining and project_key not in seen:
+            # Задача перенесена в проект вне запроса между страницами — пропускаем
+            for _ in group:
+                pass
+            continue
+
+        if project_key in seen:
+            # Повторная группа проекта: ни одна из его групп не является полным снимком
+            repeated.add(project_key)
+            logger.warning(f"Задачи проекта {project_key} получены не подряд: снимок проекта неполный")
+        else:
+            remaining.remove(project_key)
+            seen.add(project_key)
+
+        project_issues = ProjectIssueSlice(stream, project_key, group, repeated)
+        yield project_key, project_issues
+        # Потребитель мог остановиться раньше: дочитываем группу, чтобы перейти к следующему проекту
+        for _ in project_issues:
+            pass
+
+    for project_key in remaining:
+        yield project_key, ProjectIssueSlice(stream, project_key, (), repeated)
@@ -0,0 +1,131 @@
+"""
+Общий HTTP-транспорт для персональных клиентов Jira: один пул TLS-соединений к config.JIRA_URL
+на всех пользователей. Авторизация и cookies остаются в сессии каждого клиента.
+Каждый запрос проходит через ограничитель jira_governor (темп, параллельность, Retry-After).
+"""
+
+import logging
+import socket
+import threading
+import time
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection
+
+from config import config
+from jira_governor import JiraGovernor, credential_key, jira_governor
+
+logger = logging.getLogger(__name__)
+
+
+def _keepalive_socket_options(idle_seconds: int) -> list[tuple[int, int, int]]:
+    """Опции сокета для TCP keep-alive (доступные на текущей платформе)"""
+    options = [*HTTPConnection.default_socket_options, (socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)]
+    idle_option = getattr(socket, "TCP_KEEPIDLE", None) or getattr(socket, "TCP_KEEPALIVE", None)
+    if idle_option is not None:
+        options.append((socket.IPPROTO_TCP, idle_option, idle_seconds))
+    if hasattr(socket, "TCP_KEEPINTVL"):
+        options.append((socket.IPPROTO_TCP, socket.TCP_KEEPINTVL, max(1, idle_seconds // 3)))
+    if hasattr(socket, "TCP_KEEPCNT"):
+        options.append((socket.IPPROTO_TCP, socket.TCP_KEEPCNT, 3))
+    return options
+
+
+class SharedHTTPAdapter(HTTPAdapter):
+    """Адаптер, который сессии клиентов не закрывают: пул живет до shutdown()"""
+
+    def __init__(self, pool_maxsize: int, keepalive_seconds: int = 0, governor: JiraGovernor | None = None):
+        self._socket_options = _keepalive_socket_options(keepalive_seconds) if keepalive_seconds > 0 else None
+        self.governor = governor
+        super().__init__(pool_connections=1, pool_maxsize=pool_maxsize)
+
+    def init_poolmanager(self, *args, **kwargs):
+        if self._socket_options is not None:
+            kwargs["socket_options"] = self._socket_options
+        super().init_poolmanager(*args, **kwargs)
+
+    def send(self, request, **kwargs):
+        if self.governor is None:
+            return super().send(request, **kwargs)
+
+        host = urlparse(request.url).netloc
+        credential = credential_key(request.headers.get("Authorization"))
+        self.governor.acquire(host, credential)
+        started = time.monotonic()
+        response = None
+        try:
+            response = super().send(request, **kwargs)
+            return response
+        finally:
+            # Повтор после 429/503 выполняет ResilientSession клиента jira: он снова проходит через ограничитель
+            self.governor.release(
+                host,
+                credential,
+                response.status_code if response is not None else None,
+                time.monotonic() - started,
+                response.headers.get("Retry-After") if response is not None else None,
+            )
+
+    def close(self):
+        # Вызывается из Session.close() при закрытии или сборке мусора клиента Jira
+        pass
+
+    def shutdown(self):
+        """Закрыть все соединения пула"""
+        super().close()
+
+
+class JiraTransport:
+    def __init__(
+        self,
+        base_url: str,
+        pool_maxsize: int = 20,
+        keepalive_seconds: int = 60,
+        governor: JiraGovernor | None = None,
+    ):
+        parsed = urlparse(base_url)
+        # Префикс на уровне хоста: все запросы клиента к серверу Jira идут через общий пул
+        self.prefix = f"{parsed.scheme}://{parsed.netloc}/"
+        self.adapter = SharedHTTPAdapter(pool_maxsize, keepalive_seconds, governor)
+        self._lock = threading.Lock()
+        self._attached = 0
+
+    def attach(self, session: requests.Session):
+        """Направить запросы сессии к серверу Jira через общий пул"""
+        session.mount(self.prefix, self.adapter)
+        with self._lock:
+            self._attached += 1
+
+    def get_stats(self) -> dict:
+        """Статистика пула: открыто соединений, выполнено запросов, из них по уже открытым соединениям"""
+        connections = 0
+        requests_count = 0
+        pools = self.adapter.poolmanager.pools
+        # RecentlyUsedContainer не поддерживает итерацию: keys() возвращает копию под блокировкой
+        for key in pools.keys():  # noqa: SIM118
+            pool = pools.get(key)
+            if pool is None:
+                continue
+            connections += pool.num_connections
+            requests_count += pool.num_requests
+
+        with self._lock:
+            attached = self._attached
+        return {
+            "sessions": attached,
+            "connections": connections,
+            "requests": requests_count,
+            "reused": max(0, requests_count - connections),
+        }
+
+    def shutdown(self):
+        """Закрыть соединения общего пула"""
+        self.adapter.shutdown()
+
+
+# Глобальный экземпляр
+jira_transport = JiraTransport(
+    config.JIRA_URL, config.JIRA_POOL_MAXSIZE, config.JIRA_TCP_KEEPALIVE, governor=jira_governor
+)
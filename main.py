@@ -14,6 +14,9 @@ from datetime import datetime
 from bot_commands import command_handler
 from config import config
 from database import db_manager
+from db_metrics import configure_slow_query_log
+from db_writer import db_writer
+from jira_transport import jira_transport
 from mattermost_client import mattermost_client
 from scheduler import scheduler
 
@@ -35,6 +38,9 @@ def setup_logging():
     logging.getLogger("requests").setLevel(logging.WARNING)
     logging.getLogger("mattermostdriver").setLevel(logging.WARNING)
 
+    # Отдельный журнал медленных обращений к БД (если задан)
+    configure_slow_query_log(config.DB_SLOW_QUERY_LOG)
+
 
 class StandupBot:
     def __init__(self):
@@ -94,6 +100,13 @@ class StandupBot:
             with contextlib.suppress(Exception):
                 mattermost_client.driver.disconnect()
 
+        # Дописываем отложенные изменения и закрываем подключения к базе данных
+        db_writer.stop()
+        db_manager.close()
+
+        # Закрываем общий пул соединений к Jira
+        jira_transport.shutdown()
+
         self.logger.info("✅ Бот остановлен")
 
     def _validate_config(self):
@@ -4,7 +4,7 @@
 
 import logging
 import os
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 
 import matplotlib
 
@@ -23,12 +23,8 @@ class ProjectAnalytics:
 
     def build_project_analytics(self, user_email: str, project_key: str) -> tuple[str, str | None]:
         """Собрать текстовый отчет и сгенерировать .jpg с графиками"""
-        issues = user_jira_client.get_project_issues(user_email, project_key, max_results=1000)
-        if not issues:
-            return f"ℹ️ Нет данных по проекту {project_key} или нет доступа", None
-
         # Метрики
-        total = len(issues)
+        total = 0
         closed_statuses = [
             "Done",
             "Closed",
@@ -40,6 +36,14 @@ class ProjectAnalytics:
             "Отклонено",
             "Отложено",
         ]
+
+        # Задачи обрабатываются потоком по страницам, без ограничения количества
+        issues = user_jira_client.get_project_issues(
+            user_email, project_key, profile="analytics", closed_statuses=closed_statuses
+        )
+        if issues is None:
+            return f"ℹ️ Нет данных по проекту {project_key} или нет доступа", None
+
         closed = 0
         overdue_count = 0
         over_estimate_count = 0
@@ -55,7 +59,7 @@ class ProjectAnalytics:
         points_x: list[float] = []  # оценка (часы)
         points_y: list[float] = []  # факт (часы)
 
-        today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+        today = date.today()
 
         created_per_month: dict[str, int] = {}
         closed_per_month: dict[str, int] = {}
@@ -66,93 +70,55 @@ class ProjectAnalytics:
         type_counts: dict[str, int] = {}
 
         for issue in issues:
-            fields = issue.fields
+            total += 1
 
-            status_name = getattr(fields.status, "name", "") if getattr(fields, "status", None) else ""
-            is_closed = status_name in closed_statuses
+            is_closed = issue.is_closed
             if is_closed:
                 closed += 1
             # Исполнители: считаем всего и активные
-            assignee_name = None
-            if getattr(fields, "assignee", None):
-                assignee_name = getattr(fields.assignee, "displayName", None) or "Не назначен"
-            else:
-                assignee_name = "Не назначен"
+            assignee_name = issue.assignee_label
             assignee_total[assignee_name] = assignee_total.get(assignee_name, 0) + 1
             if not is_closed:
                 assignee_open[assignee_name] = assignee_open.get(assignee_name, 0) + 1
 
             # Тип задачи
-            issue_type = getattr(getattr(fields, "issuetype", None), "name", "Unknown") or "Unknown"
+            issue_type = issue.issue_type or "Unknown"
             type_counts[issue_type] = type_counts.get(issue_type, 0) + 1
 
-            # Оценка и факт (секунды -> часы)
-            orig = (getattr(fields, "timeoriginalestimate", 0) or 0) / 3600.0
-            spent = (getattr(fields, "timespent", 0) or 0) / 3600.0
+            # Оценка и факт (часы)
+            orig = issue.original_hours
+            spent = issue.spent_hours
             if orig > 0 and spent >= 0:
                 points_x.append(orig)
                 points_y.append(spent)
                 if spent > orig:
                     over_estimate_count += 1
-                    assignee_name = None
-                    if getattr(fields, "assignee", None):
-                        assignee_name = getattr(fields.assignee, "displayName", None) or "Не назначен"
-                    over_by_user[assignee_name or "Не назначен"] = (
-                        over_by_user.get(assignee_name or "Не назначен", 0) + 1
-                    )
+                    over_by_user[assignee_name] = over_by_user.get(assignee_name, 0) + 1
                     if not is_closed:
                         open_over_estimate_count += 1
-                        open_over_by_user[assignee_name or "Не назначен"] = (
-                            open_over_by_user.get(assignee_name or "Не назначен", 0) + 1
-                        )
+                        open_over_by_user[assignee_name] = open_over_by_user.get(assignee_name, 0) + 1
 
             # Просрочки
-            due_date = getattr(fields, "duedate", None)
-            if due_date and not is_closed:
-                try:
-                    due_dt = datetime.strptime(due_date, "%Y-%m-%d")
-                    if due_dt <= today:
-                        overdue_count += 1
-                        assignee_name = None
-                        if getattr(fields, "assignee", None):
-                            assignee_name = getattr(fields.assignee, "displayName", None) or "Не назначен"
-                        overdue_by_user[assignee_name or "Не назначен"] = (
-                            overdue_by_user.get(assignee_name or "Не назначен", 0) + 1
-                        )
-                        open_overdue_count += 1
-                        open_overdue_by_user[assignee_name or "Не назначен"] = (
-                            open_overdue_by_user.get(assignee_name or "Не назначен", 0) + 1
-                        )
-                except Exception:
-                    pass
+            if issue.due_date and not is_closed and issue.due_date <= today:
+                overdue_count += 1
+                overdue_by_user[assignee_name] = overdue_by_user.get(assignee_name, 0) + 1
+                open_overdue_count += 1
+                open_overdue_by_user[assignee_name] = open_overdue_by_user.get(assignee_name, 0) + 1
 
             # Created/Closed per month (последние 6 мес)
-            try:
-                created_raw = getattr(fields, "created", None)
-                if created_raw:
-                    created_dt = datetime.strptime(created_raw[:10], "%Y-%m-%d")
-                    if created_dt >= six_months_ago:
-                        key = created_dt.strftime("%Y-%m")
-                        created_per_month[key] = created_per_month.get(key, 0) + 1
-            except Exception:
-                pass
-
-            # Определяем дату закрытия из changelog
-            try:
-                if hasattr(issue, "changelog") and issue.changelog:
-                    for history in issue.changelog.histories:
-                        for item in history.items:
-                            if item.field == "status" and item.toString in closed_statuses:
-                                closed_dt = datetime.strptime(history.created[:10], "%Y-%m-%d")
-                                if closed_dt >= six_months_ago:
-                                    key = closed_dt.strftime("%Y-%m")
-                                    closed_per_month[key] = closed_per_month.get(key, 0) + 1
-                                # берем только первое закрытие
-                                raise StopIteration
-            except StopIteration:
-                pass
-            except Exception:
-                pass
+            if issue.created and issue.created >= six_months_ago:
+                key = issue.created.strftime("%Y-%m")
+                created_per_month[key] = created_per_month.get(key, 0) + 1
+
+            # Дата первого закрытия из changelog
+            if issue.closed_on and issue.closed_on >= six_months_ago:
+                key = issue.closed_on.strftime("%Y-%m")
+                closed_per_month[key] = closed_per_month.get(key, 0) + 1
+
+        if not total:
+            return f"ℹ️ Нет данных по проекту {project_key} или нет доступа", None
+        if not issues.complete:
+            logger.warning(f"Аналитика {project_key}: получено {issues.fetched} из {issues.total} задач")
 
         open_ = total - closed
 
@@ -2,18 +2,40 @@
 Модуль мониторинга проектов - проверка превышения трудозатрат и просроченных сроков
 """
 
+import hashlib
 import logging
-from datetime import date, datetime, timedelta
+from datetime import UTC, date, datetime, timedelta
+from typing import NamedTuple
 
 from calendar_client import calendar_client
 from config import config
 from database import db_manager
+from db_writer import db_writer
+from issue_snapshot import IssueSnapshot, first_closed_date, format_jira_datetime
+from jira_search import IssueStream, ProjectIssueSlice, jql_quote, split_issues_by_project
 from mattermost_client import mattermost_client
+from subscription_registry import Subscription
 from user_jira_client import user_jira_client
 
 logger = logging.getLogger(__name__)
 
 
+class ProjectRunPlan(NamedTuple):
+    project_key: str
+    fetcher_email: str | None  # Подписчик, с чьими правами загружаются задачи
+    channel_ids: list[str]  # Каналы, получающие результат общей проверки
+    separate: list[Subscription]  # Подписки, проверяемые отдельно (другой набор видимых задач)
+
+
+class PendingSnapshot(NamedTuple):
+    """Проект совместной выборки: очистка кеша и точка синхронизации ждут окончания выборки"""
+
+    project_key: str
+    issues: ProjectIssueSlice
+    seen_keys: set[str]  # Задачи проекта, полученные в выборке
+    cached_keys: set[str]  # Задачи проекта в кеше до выборки
+
+
 class ProjectMonitor:
     def __init__(self):
         self.closed_statuses = [
@@ -36,6 +58,10 @@ class ProjectMonitor:
             "Прошел испытательный срок",
             "Отказ от оффера ",
         ]
+        self.closed_status_set = frozenset(self.closed_statuses)
+        # Через сколько дней без изменений закрытая задача перестает проверяться правилами
+        # (правило трудозатрат срабатывает для задач, закрытых не раньше вчера)
+        self.unchanged_closed_skip_days = 2
 
     def monitor_all_projects(self):
         """Мониторинг всех активных проектов"""
@@ -61,8 +87,8 @@ class ProjectMonitor:
                 logger.info(f"Сегодня ({today}) нерабочий день (проверено через API) - мониторинг пропущен")
                 return
 
-            # Получаем все активные подписки
-            subscriptions = db_manager.get_active_subscriptions()
+            # Получаем все активные подписки (из реестра в памяти)
+            subscriptions = db_manager.subscriptions.all()
 
             if not subscriptions:
                 logger.info("Нет активных подписок на проекты")
@@ -70,130 +96,452 @@ class ProjectMonitor:
 
             logger.info(f"Найдено {len(subscriptions)} активных подписок")
 
-            for project_key, project_name, channel_id, _team_id, _subscribed_by in subscriptions:
+            # Подписки заблокированных пользователей не планируются: их запросы к Jira заведомо отклоняются
+            active = [
+                subscription
+                for subscription in subscriptions
+                if not db_manager.is_user_blocked((subscription.subscribed_by_email or "").strip().lower())
+            ]
+            if len(active) < len(subscriptions):
+                logger.info(f"Пропущено {len(subscriptions) - len(active)} подписок заблокированных пользователей Jira")
+            subscriptions = active
+            if not subscriptions:
+                return
+
+            # Каждый проект загружается и проверяется один раз, результат рассылается во все его каналы
+            plans = self.plan_run(subscriptions)
+
+            # Проекты одного подписчика запрашиваются совместными выборками с его учетными данными
+            plans_by_user: dict[str | None, list[ProjectRunPlan]] = {}
+            for plan in plans:
+                plans_by_user.setdefault(plan.fetcher_email, []).append(plan)
+
+            for user_email, user_plans in plans_by_user.items():
                 try:
-                    logger.info(f"Мониторинг проекта {project_key}")
-                    self.monitor_project(project_key, project_name, channel_id)
+                    self.monitor_user_projects(user_email, user_plans)
                 except Exception as e:
-                    logger.error(f"Ошибка мониторинга проекта {project_key}: {e}")
+                    logger.error(f"Ошибка мониторинга проектов пользователя {user_email}: {e}")
                     continue
 
+            # Подписчики, которые видят в проекте другой набор задач, проверяются со своими правами
+            for plan in plans:
+                for subscription in plan.separate:
+                    try:
+                        logger.info(
+                            f"Отдельная проверка проекта {subscription.project_key} для канала {subscription.channel_id}"
+                        )
+                        result = self.monitor_project_for_channel(subscription.project_key, subscription.channel_id)
+                        logger.info(f"Проект {subscription.project_key}, канал {subscription.channel_id}: {result}")
+                    except Exception as e:
+                        logger.error(f"Ошибка мониторинга проекта {subscription.project_key}: {e}")
+                        continue
+
         except Exception as e:
             logger.error(f"Ошибка мониторинга проектов: {e}")
 
-    def monitor_project(self, project_key: str, project_name: str, channel_id: str):
-        """Мониторинг конкретного проекта"""
-        logger.info(f"Проверяем проект {project_key}")
+    def plan_run(self, subscriptions: list[Subscription]) -> list[ProjectRunPlan]:
+        """
+        Составить план прогона: по одной выборке на проект независимо от числа подписанных каналов.
+        Основной подписчик — тот, с чьими правами заполнен кеш проекта (сохраняется инкрементальная синхронизация).
+        Общий результат получают только каналы подписчиков с теми же правами: тот же email или та же
+        учетная запись Jira. Остальные подписки проверяются отдельно со своими учетными данными.
+        """
+        by_project: dict[str, list[Subscription]] = {}
+        for subscription in subscriptions:
+            by_project.setdefault(subscription.project_key, []).append(subscription)
+
+        identities: dict[str | None, str | None] = {}
+        plans = []
+        for project_key, project_subscriptions in by_project.items():
+            emails = list(dict.fromkeys(subscription.subscribed_by_email for subscription in project_subscriptions))
+            sync_state = db_manager.get_issue_sync_state(project_key)
+            fetcher_email = sync_state[0] if sync_state and sync_state[0] in emails else emails[0]
+
+            if len(emails) == 1:
+                channel_ids = [subscription.channel_id for subscription in project_subscriptions]
+                plans.append(ProjectRunPlan(project_key, fetcher_email, channel_ids, []))
+                continue
+
+            for email in emails:
+                if email not in identities:
+                    identities[email] = self.get_jira_identity(email)
+            if identities[fetcher_email] is None:
+                # У основного подписчика нет настроек Jira: выборку выполняет подписчик с подключением
+                fetcher_email = next((email for email in emails if identities[email] is not None), fetcher_email)
+            fetcher_identity = identities[fetcher_email]
+
+            channel_ids = []
+            separate = []
+            for subscription in project_subscriptions:
+                email = subscription.subscribed_by_email
+                if email == fetcher_email or (fetcher_identity is not None and identities[email] == fetcher_identity):
+                    channel_ids.append(subscription.channel_id)
+                else:
+                    separate.append(subscription)
+
+            if separate:
+                logger.info(
+                    f"Проект {project_key}: подписчики с другими учетными записями Jira, "
+                    f"отдельно проверяется каналов: {len(separate)}"
+                )
+            plans.append(ProjectRunPlan(project_key, fetcher_email, channel_ids, separate))
+
+        return plans
+
+    def get_jira_identity(self, user_email: str | None) -> str | None:
+        """Учетная запись Jira подписчика (имя пользователя без учета регистра); None — настроек нет"""
+        if not user_email:
+            return None
+        settings = db_manager.get_user_jira_settings(user_email)
+        if not settings or not settings[1]:
+            return None
+        return settings[1].strip().lower()
+
+    def monitor_user_projects(self, user_email: str | None, plans: list[ProjectRunPlan]):
+        """
+        Мониторинг проектов одного подписчика: полные и инкрементальные выборки выполняются
+        совместными запросами "project in (...)", результат делится по проектам.
+        """
+        planned = {plan.project_key: plan for plan in plans}
+
+        sync_started = datetime.now(UTC)
+        windows = {
+            project_key: self.get_incremental_window(project_key, user_email, sync_started) for project_key in planned
+        }
+        full_keys = [project_key for project_key, window in windows.items() if window is None]
+        incremental_keys = [project_key for project_key, window in windows.items() if window is not None]
+
+        # Для инкрементальной группы берем наибольшее окно: лишние задачи лишь повторно сверятся с кешем
+        batches = [
+            (full_keys, None),
+            (incremental_keys, max((windows[key] for key in incremental_keys), default=None)),
+        ]
+        for project_keys, updated_within in batches:
+            if len(project_keys) == 1:
+                plan = planned[project_keys[0]]
+                self.sync_project(plan.project_key, user_email, plan.channel_ids)
+            elif project_keys:
+                self._monitor_project_batch(user_email, project_keys, planned, updated_within, sync_started)
+
+    def _monitor_project_batch(
+        self,
+        user_email: str | None,
+        project_keys: list[str],
+        planned: dict[str, ProjectRunPlan],
+        updated_within: int | None,
+        sync_started: datetime,
+    ):
+        """Проверить несколько проектов подписчика по одной совместной выборке"""
+        logger.info(f"Совместная выборка задач проектов {', '.join(project_keys)} для {user_email}")
+
+        issues = user_jira_client.get_projects_issues(
+            user_email, project_keys, updated_within_minutes=updated_within, closed_statuses=self.closed_statuses
+        )
+        if issues is None:
+            logger.warning(f"Нет доступа к задачам проектов {', '.join(project_keys)}")
+            return
+
+        write_mark = db_writer.failure_mark()
+        pending: list[PendingSnapshot] = []
+        for project_key, project_issues in split_issues_by_project(issues, project_keys):
+            channel_ids = planned[project_key].channel_ids
+            if issues.error is not None and issues.fetched == 0:
+                # Совместный запрос отклонен целиком (например, пропал доступ к одному из проектов)
+                self.sync_project(project_key, user_email, channel_ids)
+                continue
+
+            logger.info(f"Мониторинг проекта {project_key}")
+            self.process_project_issues(
+                project_key, channel_ids, user_email, project_issues, updated_within, sync_started, pending
+            )
+
+        self.finish_pending_snapshots(user_email, pending, updated_within, sync_started, write_mark)
+
+    def finish_pending_snapshots(
+        self,
+        user_email: str | None,
+        pending: list[PendingSnapshot],
+        updated_within: int | None,
+        sync_started: datetime,
+        write_mark: int,
+    ):
+        """
+        После окончания совместной выборки: удалить из кеша отсутствующие задачи полностью полученных проектов
+        и сдвинуть их точки синхронизации, если все записи выборки сохранены
+        """
+        is_incremental = updated_within is not None
+        for snapshot in pending:
+            if not snapshot.issues.complete:
+                logger.warning(f"Проект {snapshot.project_key}: выборка неполная, кеш не очищается")
+            elif not is_incremental:
+                db_writer.update_issue_cache_many(
+                    snapshot.project_key, [], remove_missing=True, keep_keys=snapshot.seen_keys
+                )
+                removed_count = len(snapshot.cached_keys - snapshot.seen_keys)
+                if removed_count:
+                    logger.info(f"Проект {snapshot.project_key}: удалено из кеша {removed_count} задач")
+
+        if not db_writer.flush(since=write_mark):
+            return
+
+        for snapshot in pending:
+            if snapshot.issues.complete:
+                db_manager.save_issue_sync_state(
+                    snapshot.project_key,
+                    user_email,
+                    sync_started.strftime("%Y-%m-%d %H:%M:%S"),
+                    full_sync=not is_incremental,
+                )
 
+    def sync_project(self, project_key: str, user_email: str | None, channel_ids: list[str]):
+        """
+        Загрузить задачи проекта с правами user_email, проверить их и разослать уведомления в каналы.
+        Между полными выборками из Jira загружаются только задачи, измененные с прошлой синхронизации;
+        правила проверяются по кешу задач, дополненному этими изменениями.
+        """
         try:
-            # Получаем подписку для определения пользователя, создавшего её
-            subscriptions = db_manager.get_subscriptions_by_channel(channel_id)
-            project_subscription = None
+            sync_started = datetime.now(UTC)
+            updated_within = self.get_incremental_window(project_key, user_email, sync_started)
 
-            for subscription in subscriptions:
-                if subscription[0] == project_key:  # project_key
-                    project_subscription = subscription
-                    break
+            # Задачи проекта через персональное подключение: страницы загружаются по ходу цикла
+            issues = self.get_project_issues(user_email, project_key, updated_within)
 
-            if not project_subscription:
-                logger.error(f"Подписка на проект {project_key} не найдена в канале {channel_id}")
+            if issues is None:
+                logger.warning(f"Нет доступа к задачам проекта {project_key}")
                 return
 
-            # Извлекаем email пользователя, создавшего подписку
-            subscribed_by_email = project_subscription[2]  # subscribed_by_email
+            self.process_project_issues(project_key, channel_ids, user_email, issues, updated_within, sync_started)
 
-            # Получаем все задачи проекта через персональное подключение
-            issues = self.get_project_issues(subscribed_by_email, project_key)
-
-            if not issues:
-                logger.warning(f"Нет задач в проекте {project_key} или нет доступа")
-                return
+        except Exception as e:
+            logger.error(f"Ошибка мониторинга проекта {project_key}: {e}")
 
-            logger.info(f"Найдено {len(issues)} задач в проекте {project_key}")
+    def process_project_issues(
+        self,
+        project_key: str,
+        channel_ids: list[str],
+        subscribed_by_email: str | None,
+        issues: IssueStream | ProjectIssueSlice,
+        updated_within: int | None,
+        sync_started: datetime,
+        pending: list[PendingSnapshot] | None = None,
+    ):
+        """
+        Проверить задачи проекта из выборки, обновить кеш и точку синхронизации.
+        Найденные проблемы рассылаются во все каналы channel_ids.
+        updated_within — окно инкрементальной выборки в минутах (None — полная выборка проекта).
+        pending — проект из совместной выборки: строки кеша записываются сразу, а очистка кеша и точка
+        синхронизации откладываются в pending до окончания выборки (finish_pending_snapshots).
+        """
+        is_incremental = updated_within is not None
 
+        try:
+            # Неудачная запись любой операции проекта (уведомления, кеш) не дает сдвинуть точку синхронизации
+            write_mark = db_writer.failure_mark()
             notifications_sent = 0
+            cache_rows = []
+            unchanged_keys = []
+            seen_keys = set()
+            new_count = 0
+            skipped_count = 0
+
+            # Задачи из кеша: изменившиеся задачи перезаписываются, остальные — нет
+            cached_issues = db_manager.get_cached_issues(project_key)
+            cached_state = {row[0]: (row[9], row[10]) for row in cached_issues}
+            stale_before = (datetime.now(UTC) - timedelta(days=self.unchanged_closed_skip_days)).strftime(
+                "%Y-%m-%d %H:%M:%S"
+            )
 
             for issue in issues:
+                seen_keys.add(issue.key)
+                row = None
                 try:
-                    # Проверяем превышение трудозатрат
-                    if self.check_time_exceeded(issue):
-                        self.send_time_exceeded_notification(issue, project_key, channel_id)
-                        notifications_sent += 1
-
-                    # Проверяем просроченные сроки
-                    if self.check_deadline_overdue(issue):
-                        self.send_deadline_notification(issue, project_key, channel_id)
-                        notifications_sent += 1
-
-                    # Обновляем кеш задачи
-                    self.update_issue_in_cache(issue, project_key)
+                    # Собираем строки кеша, запись в БД — одной транзакцией после цикла
+                    row = self.build_issue_cache_row(issue, project_key)
+                    cached = cached_state.get(issue.key)
+                    if cached is None:
+                        new_count += 1
+                        cache_rows.append(row)
+                    elif cached[0] != row[-2]:
+                        cache_rows.append(row)
+                    else:
+                        unchanged_keys.append(issue.key)
+                        # Закрытая задача без изменений дольше окна "закрыта недавно": правила не сработают
+                        if (cached[1] or "") < stale_before and self.is_issue_closed(issue):
+                            skipped_count += 1
+                            continue
+
+                    notifications_sent += self.check_issue(issue, project_key, channel_ids, subscribed_by_email)
 
                 except Exception as e:
                     logger.error(f"Ошибка проверки задачи {issue.key}: {e}")
+                    # Задача есть в снимке: если ее строка еще не учтена, строка кеша не удаляется
+                    if row is None:
+                        unchanged_keys.append(issue.key)
                     continue
 
+            if is_incremental:
+                # Остальные задачи проекта не менялись с прошлой синхронизации: проверяем их по кешу
+                for cached_row in cached_issues:
+                    if cached_row[0] in seen_keys:
+                        continue
+                    try:
+                        issue = self.issue_from_cache_row(cached_row)
+                        if (cached_row[10] or "") < stale_before and self.is_issue_closed(issue):
+                            skipped_count += 1
+                            continue
+                        notifications_sent += self.check_issue(issue, project_key, channel_ids, subscribed_by_email)
+                    except Exception as e:
+                        logger.error(f"Ошибка проверки задачи {cached_row[0]} из кеша: {e}")
+                        continue
+                total_count = len(seen_keys | cached_state.keys())
+            else:
+                total_count = len(seen_keys)
+
+            if not total_count:
+                logger.warning(f"Нет задач в проекте {project_key} или нет доступа")
+                return
+
+            mode = f"инкрементально, изменено за {updated_within} мин." if is_incremental else "полная выборка"
+            logger.info(
+                f"Найдено {total_count} задач в проекте {project_key} "
+                f"(загружено {len(seen_keys)}, страниц: {issues.pages}, {mode})"
+            )
+
+            if pending is not None:
+                # Полнота проекта в совместной выборке известна только после ее окончания
+                is_full_snapshot = False
+                db_writer.update_issue_cache_many(project_key, cache_rows, remove_missing=False)
+                pending.append(PendingSnapshot(project_key, issues, seen_keys, set(cached_state)))
+            else:
+                # Удалять из кеша отсутствующие задачи можно только при полном снимке проекта
+                is_full_snapshot = issues.complete and not is_incremental
+                if not issues.complete:
+                    logger.warning(f"Проект {project_key}: получено {issues.fetched} из {issues.total} задач")
+                db_writer.update_issue_cache_many(
+                    project_key, cache_rows, remove_missing=is_full_snapshot, keep_keys=unchanged_keys
+                )
+
+                # Точка сброса: история уведомлений и кеш проекта записаны до перехода к следующему проекту
+                written = db_writer.flush(since=write_mark)
+
+                # Точку синхронизации сдвигаем, только если выборка получена целиком и записана в кеш
+                if issues.complete and written:
+                    db_manager.save_issue_sync_state(
+                        project_key,
+                        subscribed_by_email,
+                        sync_started.strftime("%Y-%m-%d %H:%M:%S"),
+                        full_sync=not is_incremental,
+                    )
+
+            removed_count = len(cached_state.keys() - seen_keys) if is_full_snapshot else 0
+            logger.info(
+                f"Проект {project_key}: новых {new_count}, изменено {len(cache_rows) - new_count}, "
+                f"без изменений {len(unchanged_keys)} (правила пропущены для {skipped_count}), "
+                f"удалено {removed_count}"
+            )
             logger.info(f"Проект {project_key}: отправлено {notifications_sent} уведомлений")
 
         except Exception as e:
             logger.error(f"Ошибка мониторинга проекта {project_key}: {e}")
 
+    def get_incremental_window(self, project_key: str, user_email: str, now: datetime) -> int | None:
+        """
+        Окно инкрементальной выборки в минутах с прошлой синхронизации проекта (с запасом).
+        None — нужна полная выборка: синхронизации не было, подошел срок полной или сменился подписчик
+        (кеш заполнен с правами другого пользователя).
+        """
+        if config.JIRA_FULL_RESYNC_HOURS <= 0:
+            return None
+
+        sync_state = db_manager.get_issue_sync_state(project_key)
+        if not sync_state:
+            return None
+
+        synced_by_email, last_sync_at, last_full_sync_at = sync_state
+        if not last_sync_at or not last_full_sync_at or synced_by_email != user_email:
+            return None
+
+        try:
+            last_sync = datetime.strptime(last_sync_at, "%Y-%m-%d %H:%M:%S").replace(tzinfo=UTC)
+            last_full_sync = datetime.strptime(last_full_sync_at, "%Y-%m-%d %H:%M:%S").replace(tzinfo=UTC)
+        except ValueError:
+            return None
+
+        if now - last_full_sync >= timedelta(hours=config.JIRA_FULL_RESYNC_HOURS):
+            return None
+
+        elapsed_minutes = max(0, int((now - last_sync).total_seconds() // 60) + 1)
+        return elapsed_minutes + config.JIRA_SYNC_OVERLAP_MINUTES
+
+    def check_issue(
+        self, issue: IssueSnapshot, project_key: str, channel_ids: list[str], user_email: str | None
+    ) -> int:
+        """Проверить задачу по правилам и отправить уведомления; возвращает количество уведомлений"""
+        sent = 0
+
+        # Проверяем превышение трудозатрат
+        if self.check_time_exceeded(issue, user_email):
+            self.send_time_exceeded_notification(issue, project_key, channel_ids)
+            sent += 1
+
+        # Проверяем просроченные сроки
+        if self.check_deadline_overdue(issue):
+            self.send_deadline_notification(issue, project_key, channel_ids)
+            sent += 1
+
+        return sent
+
     def monitor_project_for_channel(self, project_key: str, channel_id: str) -> str:
         """Мониторинг конкретного проекта для канала с возвратом результата"""
         logger.info(f"Ручная проверка проекта {project_key} для канала {channel_id}")
 
         try:
             # Получаем подписку для определения пользователя, создавшего её
-            subscriptions = db_manager.get_subscriptions_by_channel(channel_id)
-            project_subscription = None
-
-            for subscription in subscriptions:
-                if subscription[0] == project_key:  # project_key в позиции 0
-                    project_subscription = subscription
-                    break
+            project_subscription = db_manager.subscriptions.get(project_key, channel_id)
 
             if not project_subscription:
                 return "Подписка на проект не найдена в канале"
 
-            # Извлекаем данные подписки
-            # subscription: (project_key, project_name, subscribed_by_email, created_at, active)
-            subscribed_by_email = project_subscription[2]  # subscribed_by_email
+            subscribed_by_email = project_subscription.subscribed_by_email
 
-            # Получаем все задачи проекта через персональное подключение
-            issues = self.get_project_issues(subscribed_by_email, project_key)
+            # Только задачи-кандидаты: правила применяются к ним так же, как при полном просмотре проекта
+            candidate_jql = self.build_candidate_jql(user_jira_client.get_status_names(subscribed_by_email))
+            issues = self.get_project_issues(subscribed_by_email, project_key, jql_filter=candidate_jql)
 
-            if not issues:
+            if issues is None:
                 return "Нет задач в проекте или нет доступа"
 
-            logger.info(f"Найдено {len(issues)} задач в проекте {project_key}")
-
             problems_found = []
 
+            # Один проход: проверяем задачу и сразу отправляем уведомления по найденным проблемам
             for issue in issues:
                 try:
                     # Проверяем превышение трудозатрат
-                    if self.check_time_exceeded(issue):
+                    if self.check_time_exceeded(issue, subscribed_by_email):
                         problems_found.append(f"⏱️ {issue.key}: превышение трудозатрат")
+                        self.send_time_exceeded_notification(issue, project_key, [channel_id])
 
                     # Проверяем просроченные сроки
                     if self.check_deadline_overdue(issue):
                         problems_found.append(f"📅 {issue.key}: просроченный срок")
+                        self.send_deadline_notification(issue, project_key, [channel_id])
 
                 except Exception as e:
                     logger.error(f"Ошибка проверки задачи {issue.key}: {e}")
                     problems_found.append(f"❌ {issue.key}: ошибка проверки")
                     continue
 
+            if issues.fetched == 0 and (issues.error is not None or candidate_jql is None):
+                return "Нет задач в проекте или нет доступа"
+
+            logger.info(
+                f"Найдено {issues.fetched} задач в проекте {project_key}"
+                + (" (кандидаты по JQL-фильтру)" if candidate_jql else "")
+            )
+
             if problems_found:
                 result = f"найдено проблем: {len(problems_found)}"
-                # Отправляем уведомления для найденных проблем
-                for issue in issues:
-                    try:
-                        if self.check_time_exceeded(issue):
-                            self.send_time_exceeded_notification(issue, project_key, channel_id)
-                        if self.check_deadline_overdue(issue):
-                            self.send_deadline_notification(issue, project_key, channel_id)
-                    except Exception as e:
-                        logger.error(f"Ошибка отправки уведомления для {issue.key}: {e}")
+                db_writer.flush()
             else:
                 result = "проблем не найдено"
 
@@ -204,101 +552,137 @@ class ProjectMonitor:
             logger.error(f"Ошибка мониторинга проекта {project_key}: {e}")
             return f"ошибка проверки: {e!s}"
 
-    def get_project_issues(self, user_email: str, project_key: str) -> list:
-        """Получить все задачи проекта через персональное подключение"""
+    def get_project_issues(
+        self,
+        user_email: str,
+        project_key: str,
+        updated_within_minutes: int | None = None,
+        jql_filter: str | None = None,
+    ) -> IssueStream | None:
+        """
+        Получить поток задач проекта через персональное подключение (None — нет подключения).
+        updated_within_minutes — только задачи, измененные за последние N минут.
+        jql_filter — дополнительное условие отбора задач на сервере Jira.
+        """
         try:
             # Используем персональное подключение пользователя
-            issues = user_jira_client.get_project_issues(user_email, project_key)
+            issues = user_jira_client.get_project_issues(
+                user_email,
+                project_key,
+                updated_within_minutes=updated_within_minutes,
+                jql_filter=jql_filter,
+                closed_statuses=self.closed_statuses,
+            )
 
             if issues is None:
                 logger.error(f"Не удалось получить задачи проекта {project_key} для пользователя {user_email}")
-                return []
-
-            logger.debug(f"Получено {len(issues)} задач для проекта {project_key}")
             return issues
 
         except Exception as e:
             logger.error(f"Ошибка получения задач проекта {project_key}: {e}")
-            return []
-
-    def check_time_exceeded(self, issue) -> bool:
-        """Проверить превышение трудозатрат"""
+            return None
+
+    def get_recently_closed_since(self, now: datetime | None = None) -> datetime:
+        """
+        Начало окна закрытых задач для JQL-отбора: полночь позавчера по времени бота.
+        Правило "закрыта не раньше вчера" сравнивает даты; лишние сутки покрывают разницу часовых поясов Jira и бота.
+        """
+        now = now or datetime.now()
+        return (now - timedelta(days=2)).replace(hour=0, minute=0, second=0, microsecond=0)
+
+    def build_candidate_jql(self, server_statuses: set[str] | None, now: datetime | None = None) -> str | None:
+        """
+        JQL-условие отбора задач, которые могут сработать по правилам check_deadline_overdue и check_time_exceeded.
+        Условие не уже правил: задачи вне отбора заведомо не дают уведомлений.
+        server_statuses — статусы сервера: JQL отклоняет запрос с несуществующим статусом.
+        None — отбор невозможен (статусы неизвестны), нужен полный просмотр проекта.
+        """
+        if server_statuses is None:
+            return None
+
+        now = now or datetime.now()
+        closed = [status for status in self.closed_statuses if status in server_statuses]
+        open_clause = f"status not in ({', '.join(jql_quote(status) for status in closed)})" if closed else None
+
+        # Срок наступил, задача не закрыта
+        deadline = f'duedate <= "{now:%Y-%m-%d}"'
+        if open_clause:
+            deadline += f" AND {open_clause}"
+
+        # Есть оценка и списания; задача не закрыта или менялась в окне "закрыта недавно"
+        overrun = "originalEstimate > 0 AND timespent > 0"
+        if open_clause:
+            recent_minutes = int((now - self.get_recently_closed_since(now)).total_seconds() // 60) + 1
+            overrun += f' AND ({open_clause} OR updated >= "-{recent_minutes}m")'
+
+        return f"({deadline}) OR ({overrun})"
+
+    def check_time_exceeded(self, issue: IssueSnapshot, user_email: str | None = None) -> bool:
+        """Проверить превышение трудозатрат (user_email — для догрузки истории изменений закрытой задачи)"""
         try:
-            # Получаем временные данные
-            original_estimate = getattr(issue.fields, "timeoriginalestimate", 0) or 0
-            time_spent = getattr(issue.fields, "timespent", 0) or 0
-
-            if original_estimate == 0:
+            if issue.original_hours == 0:
                 return False  # Нет плановой оценки - не проверяем
 
             # Проверяем превышение (факт > план)
-            return time_spent > original_estimate and (
-                self.is_issue_closed_recently(issue) or not self.is_issue_closed(issue)
+            return issue.spent_hours > issue.original_hours and (
+                not issue.is_closed or self.is_issue_closed_recently(issue, user_email)
             )
 
         except Exception as e:
             logger.error(f"Ошибка проверки трудозатрат для {issue.key}: {e}")
             return False
 
-    def check_deadline_overdue(self, issue) -> bool:
+    def check_deadline_overdue(self, issue: IssueSnapshot) -> bool:
         """Проверить просроченные сроки"""
         try:
-            # Проверяем срок выполнения
-            due_date = getattr(issue.fields, "duedate", None)
-
-            if not due_date:
+            if not issue.due_date:
                 return False  # Нет срока - не проверяем
 
-            # Парсим дату
-            due_datetime = datetime.strptime(due_date, "%Y-%m-%d")
-            today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
-
             # Проверяем: срок <= сегодня И задача не закрыта
-            return due_datetime <= today and not self.is_issue_closed(issue)
+            return issue.due_date <= date.today() and not issue.is_closed
 
         except Exception as e:
             logger.error(f"Ошибка проверки сроков для {issue.key}: {e}")
             return False
 
-    def is_issue_closed(self, issue) -> bool:
+    def is_issue_closed(self, issue: IssueSnapshot) -> bool:
         """Проверить, закрыта ли задача"""
-        try:
-            status_name = issue.fields.status.name
-            return status_name in self.closed_statuses
-        except Exception:
-            return False
+        return issue.is_closed
 
-    def is_issue_closed_recently(self, issue) -> bool:
-        """Проверить, была ли задача закрыта недавно (не позднее вчера)"""
+    def is_issue_closed_recently(self, issue: IssueSnapshot, user_email: str | None = None) -> bool:
+        """
+        Проверить, была ли задача закрыта недавно (не позднее вчера).
+        Если задача получена без changelog, история догружается по требованию через user_email.
+        """
         try:
-            if not self.is_issue_closed(issue):
+            if not issue.is_closed:
                 return False
 
-            # Ищем в истории изменений когда задача была закрыта
-            if hasattr(issue, "changelog") and issue.changelog:
-                for history in issue.changelog.histories:
-                    for item in history.items:
-                        if item.field == "status" and item.toString in self.closed_statuses:
-                            # Парсим дату изменения статуса
-                            changed_date = datetime.strptime(history.created[:10], "%Y-%m-%d")
-                            yesterday = datetime.now() - timedelta(days=1)
-                            yesterday = yesterday.replace(hour=0, minute=0, second=0, microsecond=0)
+            yesterday = date.today() - timedelta(days=1)
+
+            # Задача не менялась со вчерашнего дня — значит, и закрыта раньше: история не нужна
+            if issue.updated is not None and issue.updated.date() < yesterday:
+                return False
 
-                            # Задача закрыта не раньше вчера
-                            return changed_date >= yesterday
+            if not issue.changelog_loaded and user_email:
+                changelog = user_jira_client.get_issue_changelog(user_email, issue.key)
+                if changelog is not None:
+                    issue.closed_on = first_closed_date(changelog.get("histories", ()), self.closed_status_set)
+                    issue.changelog_loaded = True
 
-            return False
+            # Дата первого перехода в закрытый статус: задача закрыта не раньше вчера
+            return issue.closed_on is not None and issue.closed_on >= yesterday
 
         except Exception as e:
             logger.error(f"Ошибка проверки даты закрытия для {issue.key}: {e}")
             return False
 
-    def send_time_exceeded_notification(self, issue, project_key: str, channel_id: str):
+    def send_time_exceeded_notification(self, issue: IssueSnapshot, project_key: str, channel_ids: list[str]):
         """Отправить уведомление о превышении трудозатрат"""
         try:
             # Получаем данные о времени
-            original_estimate = (getattr(issue.fields, "timeoriginalestimate", 0) or 0) / 3600.0
-            time_spent = (getattr(issue.fields, "timespent", 0) or 0) / 3600.0
+            original_estimate = issue.original_hours
+            time_spent = issue.spent_hours
 
             # Получаем информацию об ответственном
             assignee_email, assignee_name = self.get_assignee_info(issue)
@@ -306,7 +690,7 @@ class ProjectMonitor:
             # Формируем сообщения
             channel_message = self.format_time_exceeded_message(
                 issue.key,
-                issue.fields.summary,
+                issue.summary,
                 assignee_name,
                 original_estimate,
                 time_spent,
@@ -315,29 +699,30 @@ class ProjectMonitor:
 
             personal_message = self.format_time_exceeded_message(
                 issue.key,
-                issue.fields.summary,
+                issue.summary,
                 assignee_name,
                 original_estimate,
                 time_spent,
                 False,  # для личного сообщения
             )
 
-            # Отправляем уведомления в канал
-            mattermost_client.send_channel_message(channel_id, channel_message)
+            # Отправляем уведомления во все подписанные каналы
+            for channel_id in channel_ids:
+                mattermost_client.send_channel_message(channel_id, channel_message)
 
-            # Личные сообщения ответственному
+            # Личное сообщение ответственному — одно на задачу, сколько бы каналов ни было подписано
             if assignee_email:
                 mattermost_client.send_direct_message_by_email(assignee_email, personal_message)
 
             # Сохраняем в историю
-            db_manager.save_notification(
+            db_writer.save_notification(
                 project_key,
                 issue.key,
                 "time_exceeded",
                 assignee_email,
                 assignee_name,
-                channel_id,
-                issue.fields.summary,
+                channel_ids[0],
+                issue.summary,
                 original_estimate,
                 time_spent,
             )
@@ -347,39 +732,36 @@ class ProjectMonitor:
         except Exception as e:
             logger.error(f"Ошибка отправки уведомления о времени для {issue.key}: {e}")
 
-    def send_deadline_notification(self, issue, project_key: str, channel_id: str):
+    def send_deadline_notification(self, issue: IssueSnapshot, project_key: str, channel_ids: list[str]):
         """Отправить уведомление о просроченном сроке"""
         try:
             # Получаем информацию об ответственном
             assignee_email, assignee_name = self.get_assignee_info(issue)
 
-            due_date = getattr(issue.fields, "duedate", None)
+            due_date = issue.due_date.isoformat() if issue.due_date else None
 
             # Формируем сообщения
-            channel_message = self.format_deadline_message(
-                issue.key, issue.fields.summary, assignee_name, due_date, True
-            )
+            channel_message = self.format_deadline_message(issue.key, issue.summary, assignee_name, due_date, True)
 
-            personal_message = self.format_deadline_message(
-                issue.key, issue.fields.summary, assignee_name, due_date, False
-            )
+            personal_message = self.format_deadline_message(issue.key, issue.summary, assignee_name, due_date, False)
 
-            # Отправляем уведомления в канал
-            mattermost_client.send_channel_message(channel_id, channel_message)
+            # Отправляем уведомления во все подписанные каналы
+            for channel_id in channel_ids:
+                mattermost_client.send_channel_message(channel_id, channel_message)
 
-            # Личные сообщения ответственному
+            # Личное сообщение ответственному — одно на задачу, сколько бы каналов ни было подписано
             if assignee_email:
                 mattermost_client.send_direct_message_by_email(assignee_email, personal_message)
 
             # Сохраняем в историю
-            db_manager.save_notification(
+            db_writer.save_notification(
                 project_key,
                 issue.key,
                 "deadline_overdue",
                 assignee_email,
                 assignee_name,
-                channel_id,
-                issue.fields.summary,
+                channel_ids[0],
+                issue.summary,
                 0,
                 0,
                 due_date,
@@ -390,45 +772,45 @@ class ProjectMonitor:
         except Exception as e:
             logger.error(f"Ошибка отправки уведомления о сроке для {issue.key}: {e}")
 
-    def get_assignee_info(self, issue) -> tuple[str | None, str]:
+    def get_assignee_info(self, issue: IssueSnapshot) -> tuple[str | None, str]:
         """Получить информацию об ответственном за задачу"""
-        try:
-            if issue.fields.assignee:
-                assignee_name = issue.fields.assignee.displayName
-                assignee_email = getattr(issue.fields.assignee, "emailAddress", None)
-                return assignee_email, assignee_name
-            else:
-                return None, "Не назначен"
-        except Exception:
-            return None, "Не назначен"
-
-    def update_issue_in_cache(self, issue, project_key: str):
-        """Обновить информацию о задаче в кеше"""
-        try:
-            assignee_email, assignee_name = self.get_assignee_info(issue)
-
-            original_estimate = (getattr(issue.fields, "timeoriginalestimate", 0) or 0) / 3600.0
-            time_spent = (getattr(issue.fields, "timespent", 0) or 0) / 3600.0
-            remaining_estimate = (getattr(issue.fields, "timeestimate", 0) or 0) / 3600.0
-
-            due_date = getattr(issue.fields, "duedate", None)
-            status = issue.fields.status.name
-
-            db_manager.update_issue_cache(
-                issue.key,
-                project_key,
-                issue.fields.summary,
-                assignee_email,
-                assignee_name,
-                status,
-                due_date,
-                original_estimate,
-                time_spent,
-                remaining_estimate,
-            )
-
-        except Exception as e:
-            logger.error(f"Ошибка обновления кеша для {issue.key}: {e}")
+        if issue.assignee_name is None:
+            return None, issue.assignee_label
+        return issue.assignee_email, issue.assignee_name
+
+    def build_issue_cache_row(self, issue: IssueSnapshot, project_key: str) -> tuple:
+        """Сформировать строку issue_cache для задачи"""
+        assignee_email, assignee_name = self.get_assignee_info(issue)
+
+        fields = (
+            issue.summary,
+            assignee_email,
+            assignee_name,
+            issue.status,
+            issue.due_date.isoformat() if issue.due_date else None,
+            issue.original_hours,
+            issue.spent_hours,
+            issue.remaining_hours,
+        )
+        return (
+            issue.key,
+            project_key,
+            *fields,
+            self.build_issue_fingerprint(fields),
+            format_jira_datetime(issue.updated),
+        )
+
+    def issue_from_cache_row(self, row: tuple) -> IssueSnapshot:
+        """
+        Восстановить задачу из строки get_cached_issues для правил и уведомлений.
+        История изменений при необходимости догружается в is_issue_closed_recently.
+        """
+        return IssueSnapshot.from_cache_row(row, self.closed_status_set)
+
+    @staticmethod
+    def build_issue_fingerprint(fields: tuple) -> str:
+        """Отпечаток отслеживаемых полей задачи (статус, ответственный, оценки, трудозатраты, срок)"""
+        return hashlib.blake2b(repr(fields).encode("utf-8"), digest_size=16).hexdigest()
 
     def format_time_exceeded_message(
         self, issue_key: str, summary: str, assignee: str, planned_hours: float, actual_hours: float, for_channel: bool
@@ -35,6 +35,10 @@ class StandupScheduler:
         # Настраиваем еженедельную проверку календаря (каждый понедельник в 08:00)
         schedule.every().monday.at("08:00").do(self.check_calendar_updates)
 
+        # Еженедельная компактация истории уведомлений (каждое воскресенье в 03:00)
+        if config.NOTIFICATION_RETENTION_DAYS > 0:
+            schedule.every().sunday.at("03:00").do(self.compact_notification_history)
+
         # Загружаем календарь при старте, если еще не загружен
         self._ensure_calendar_loaded()
 
@@ -133,6 +137,13 @@ class StandupScheduler:
         except Exception as e:
             logger.error(f"Ошибка при проверке календаря: {e}")
 
+    def compact_notification_history(self):
+        """Свернуть старую историю уведомлений в дневные агрегаты и освободить место в БД"""
+        logger.info("Запуск еженедельной компактации истории уведомлений")
+        result = db_manager.compact_notification_history(config.NOTIFICATION_RETENTION_DAYS)
+        if result is None:
+            logger.error("Компактация истории уведомлений завершилась с ошибкой")
+
     def _ensure_calendar_loaded(self):
         """Убедиться, что календарь загружен для текущего и следующего года"""
         try:
@@ -0,0 +1,105 @@
+"""
+Реестр активных подписок в памяти: загружается одним запросом и сбрасывается при изменении подписок
+"""
+
+import logging
+import threading
+from collections.abc import Callable
+from typing import NamedTuple
+
+logger = logging.getLogger(__name__)
+
+
+class Subscription(NamedTuple):
+    project_key: str
+    project_name: str | None
+    channel_id: str
+    team_id: str | None
+    subscribed_by_email: str | None
+    created_at: str | None
+
+
+class _Snapshot(NamedTuple):
+    ordered: list[Subscription]
+    by_key: dict[tuple[str, str], Subscription]
+    by_project: dict[str, list[Subscription]]
+    by_channel: dict[str, list[Subscription]]
+
+
+class SubscriptionRegistry:
+    def __init__(self, loader: Callable[[], list[Subscription]]):
+        # loader возвращает все активные подписки, упорядоченные по project_key
+        self._loader = loader
+        self._lock = threading.Lock()
+        self._snapshot: _Snapshot | None = None
+        # Увеличивается при каждом сбросе: снимок, загруженный до сброса, не сохраняется
+        self._generation = 0
+        self._loads = 0
+
+    def invalidate(self):
+        """Сбросить реестр; следующее обращение загрузит подписки из БД"""
+        with self._lock:
+            self._snapshot = None
+            self._generation += 1
+
+    def get(self, project_key: str, channel_id: str) -> Subscription | None:
+        """Получить активную подписку канала на проект"""
+        return self._get_snapshot().by_key.get((project_key, channel_id))
+
+    def by_project(self, project_key: str) -> list[Subscription]:
+        """Получить активные подписки на проект"""
+        return list(self._get_snapshot().by_project.get(project_key, ()))
+
+    def by_channel(self, channel_id: str) -> list[Subscription]:
+        """Получить активные подписки канала (сначала новые)"""
+        return list(self._get_snapshot().by_channel.get(channel_id, ()))
+
+    def all(self) -> list[Subscription]:
+        """Получить все активные подписки, упорядоченные по ключу проекта"""
+        return list(self._get_snapshot().ordered)
+
+    def get_stats(self) -> dict:
+        """Получить статистику реестра"""
+        with self._lock:
+            snapshot = self._snapshot
+            return {
+                "loaded": snapshot is not None,
+                "subscriptions": len(snapshot.ordered) if snapshot else 0,
+                "loads": self._loads,
+            }
+
+    def _get_snapshot(self) -> _Snapshot:
+        with self._lock:
+            snapshot = self._snapshot
+            generation = self._generation
+        if snapshot is not None:
+            return snapshot
+
+        try:
+            subscriptions = self._loader()
+        except Exception as e:
+            # Ошибку не кешируем: следующее обращение повторит загрузку
+            logger.error(f"Ошибка загрузки реестра подписок: {e}")
+            return _Snapshot([], {}, {}, {})
+
+        snapshot = self._build(subscriptions)
+        with self._lock:
+            self._loads += 1
+            if self._generation == generation:
+                self._snapshot = snapshot
+        return snapshot
+
+    @staticmethod
+    def _build(subscriptions: list[Subscription]) -> _Snapshot:
+        by_key = {}
+        by_project: dict[str, list[Subscription]] = {}
+        by_channel: dict[str, list[Subscription]] = {}
+        for subscription in subscriptions:
+            by_key[(subscription.project_key, subscription.channel_id)] = subscription
+            by_project.setdefault(subscription.project_key, []).append(subscription)
+            by_channel.setdefault(subscription.channel_id, []).append(subscription)
+
+        for channel_subscriptions in by_channel.values():
+            channel_subscriptions.sort(key=lambda s: s.created_at or "", reverse=True)
+
+        return _Snapshot(list(subscriptions), by_key, by_project, by_channel)
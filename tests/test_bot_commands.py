@@ -3,6 +3,18 @@ import types
 import unittest
 from unittest.mock import patch
 
+import database  # noqa: F401 — загружается до подмены sys.modules, чтобы не импортироваться повторно
+
+with patch.dict(
+    sys.modules,
+    {
+        "mattermost_client": types.SimpleNamespace(mattermost_client=types.SimpleNamespace()),
+        "scheduler": types.SimpleNamespace(scheduler=types.SimpleNamespace()),
+    },
+):
+    from bot_commands import BotCommandHandler
+    from user_jira_client import UserJiraClient
+
 
 class _FakeResponse:
     def __init__(self, payload):
@@ -38,17 +50,19 @@ class _FakeJiraClient:
         return []
 
 
-class TestListProjectsPagination(unittest.TestCase):
-    @patch.dict(
-        sys.modules,
-        {
-            "mattermost_client": types.SimpleNamespace(mattermost_client=types.SimpleNamespace()),
-            "scheduler": types.SimpleNamespace(scheduler=types.SimpleNamespace()),
-        },
-    )
-    def test_list_projects_uses_project_search_and_fetches_all_pages(self):
-        from bot_commands import BotCommandHandler
+class TestListProjects(unittest.TestCase):
+    def setUp(self):
+        self.client = UserJiraClient(max_cache_size=5, idle_ttl_seconds=0)
+        self.client.project_catalog_cache.ttl_seconds = 600
 
+    def _list_projects(self, fake_jira):
+        with (
+            patch.object(self.client, "get_jira_client", return_value=fake_jira),
+            patch.dict(sys.modules, {"user_jira_client": types.SimpleNamespace(user_jira_client=self.client)}),
+        ):
+            return BotCommandHandler().cmd_list_projects([], "user@example.com")
+
+    def test_list_projects_uses_project_search_and_fetches_all_pages(self):
         first_page_values = [{"key": f"A{i:03d}", "name": f"Project A{i:03d}", "id": str(i)} for i in range(50)]
         second_page_values = [{"key": f"B{i:03d}", "name": f"Project B{i:03d}", "id": str(i)} for i in range(10)]
         fake_jira = _FakeJiraClient(
@@ -57,16 +71,36 @@ class TestListProjectsPagination(unittest.TestCase):
                 50: {"values": second_page_values, "isLast": True},
             }
         )
-        fake_user_jira_client = types.SimpleNamespace(get_jira_client=lambda _email: fake_jira)
 
-        with patch.dict(
-            sys.modules,
-            {"user_jira_client": types.SimpleNamespace(user_jira_client=fake_user_jira_client)},
-        ):
-            result = BotCommandHandler().cmd_list_projects([], "user@example.com")
+        result = self._list_projects(fake_jira)
 
         self.assertIn("Доступные проекты в Jira (60)", result)
         self.assertEqual(2, len(fake_jira._session.call_urls))
         self.assertTrue(all(url.endswith("/rest/api/2/project/search") for url in fake_jira._session.call_urls))
         self.assertEqual(0, fake_jira._session.call_params[0]["startAt"])
         self.assertEqual(50, fake_jira._session.call_params[1]["startAt"])
+        # Описание, руководитель и ссылка проекта в списке не показываются
+        self.assertTrue(all("expand" not in params for params in fake_jira._session.call_params))
+
+    def test_pages_after_total_are_fetched_and_catalog_is_cached(self):
+        pages = {
+            start: {
+                "values": [{"key": f"P{i:03d}", "name": f"Project {i}"} for i in range(start, min(start + 50, 180))],
+                "total": 180,
+                "isLast": start + 50 >= 180,
+            }
+            for start in range(0, 180, 50)
+        }
+        fake_jira = _FakeJiraClient(pages)
+
+        first = self._list_projects(fake_jira)
+        second = self._list_projects(fake_jira)
+
+        self.assertEqual(first, second)
+        self.assertIn("Доступные проекты в Jira (180)", first)
+        self.assertEqual([0, 50, 100, 150], sorted(params["startAt"] for params in fake_jira._session.call_params))
+        self.assertEqual("Project 179", self.client.get_cached_project_catalog("User@Example.com")["P179"])
+
+
+if __name__ == "__main__":
+    unittest.main()
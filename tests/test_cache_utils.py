@@ -0,0 +1,89 @@
+import threading
+import unittest
+from unittest.mock import patch
+
+from cache_utils import LRUCache
+
+
+class TestLRUCache(unittest.TestCase):
+    def setUp(self):
+        self.evicted = []
+        self.now = 1000.0
+        patcher = patch("cache_utils.time.monotonic", side_effect=lambda: self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _cache(self, max_size=2, idle_ttl_seconds=0):
+        return LRUCache(max_size, idle_ttl_seconds, on_evict=lambda key, value: self.evicted.append(key))
+
+    def test_evicts_least_recently_used(self):
+        cache = self._cache()
+        cache.set("a", 1)
+        cache.set("b", 2)
+        self.assertEqual(1, cache.get("a"))
+
+        cache.set("c", 3)
+
+        self.assertEqual(["b"], self.evicted)
+        self.assertEqual(["a", "c"], cache.keys())
+        self.assertEqual(
+            {"size": 2, "max_size": 2, "hits": 1, "misses": 0, "evictions": 1, "expired": 0}, cache.get_stats()
+        )
+
+    def test_expires_idle_entries_on_access_and_cleanup(self):
+        cache = self._cache(max_size=10, idle_ttl_seconds=60)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        self.now += 30
+        cache.get("b")
+        self.now += 40
+
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual(2, cache.get("b"))
+        self.now += 60
+        self.assertEqual(1, cache.cleanup())
+
+        self.assertEqual(["a", "b"], self.evicted)
+        self.assertEqual(2, cache.get_stats()["expired"])
+
+    def test_replacing_value_releases_previous(self):
+        cache = self._cache()
+        cache.set("a", object())
+        cache.set("a", object())
+
+        self.assertEqual(["a"], self.evicted)
+        self.assertEqual(1, len(cache))
+
+    def test_invalidate_and_clear_release_entries(self):
+        cache = self._cache()
+        cache.set("a", 1)
+        cache.set("b", 2)
+
+        self.assertTrue(cache.invalidate("a"))
+        self.assertFalse(cache.invalidate("a"))
+        cache.clear()
+
+        self.assertEqual(["a", "b"], self.evicted)
+        self.assertEqual(0, len(cache))
+
+    def test_concurrent_access_keeps_size_bound(self):
+        cache = self._cache(max_size=8)
+
+        def worker(offset):
+            for i in range(500):
+                cache.set((offset + i) % 20, i)
+                cache.get((offset + i * 7) % 20)
+
+        threads = [threading.Thread(target=worker, args=(n,)) for n in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertLessEqual(len(cache), 8)
+        stats = cache.get_stats()
+        self.assertEqual(2000, stats["hits"] + stats["misses"])
+
+
+if __name__ == "__main__":
+    unittest.main()
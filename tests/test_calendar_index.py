@@ -0,0 +1,63 @@
+import tempfile
+import unittest
+from datetime import date
+from pathlib import Path
+from unittest.mock import patch
+
+from calendar_client import CalendarClient
+from calendar_index import ProductionCalendarIndex
+from database import DatabaseManager
+
+
+class TestProductionCalendarIndex(unittest.TestCase):
+    def test_answers_only_for_loaded_years(self):
+        index = ProductionCalendarIndex()
+        index.load_year(2026, [date(2026, 1, 1), date(2026, 12, 31), date(2025, 12, 31)])
+
+        self.assertTrue(index.is_non_working_day(date(2026, 1, 1)))
+        self.assertTrue(index.is_non_working_day(date(2026, 12, 31)))
+        self.assertFalse(index.is_non_working_day(date(2026, 1, 12)))
+        self.assertIsNone(index.is_non_working_day(date(2025, 12, 31)))
+        self.assertEqual(2, index.count_non_working_days(2026))
+        self.assertEqual([2026], index.loaded_years())
+
+
+class TestCalendarIndexIntegration(unittest.TestCase):
+    def setUp(self):
+        self._tmp_dir = tempfile.TemporaryDirectory()
+        self.db_path = str(Path(self._tmp_dir.name) / "test.db")
+        self.db = DatabaseManager(self.db_path)
+
+    def tearDown(self):
+        self.db.close()
+        self._tmp_dir.cleanup()
+
+    def test_save_refreshes_index_and_new_manager_loads_it(self):
+        self.assertTrue(self.db.save_calendar_holidays(2026, [date(2026, 1, 7)]))
+
+        self.assertTrue(self.db.calendar_index.is_loaded(2026))
+        self.assertTrue(self.db.is_holiday(date(2026, 1, 7)))
+        self.assertFalse(self.db.is_holiday(date(2026, 1, 12)))
+
+        reopened = DatabaseManager(self.db_path)
+        try:
+            self.assertTrue(reopened.calendar_index.is_non_working_day(date(2026, 1, 7)))
+        finally:
+            reopened.close()
+
+    def test_client_does_not_call_api_for_loaded_year(self):
+        self.db.save_calendar_holidays(2026, [date(2026, 1, 7)])
+        client = CalendarClient(api_url="http://calendar.test", index=self.db.calendar_index)
+
+        with patch.object(client, "get_day_info") as get_day_info:
+            self.assertFalse(client.is_working_day(date(2026, 1, 7)))
+            self.assertTrue(client.is_working_day(date(2026, 1, 12)))
+            get_day_info.assert_not_called()
+
+            get_day_info.return_value = {"isWorkingDay": True}
+            self.assertTrue(client.is_working_day(date(2027, 1, 12)))
+            get_day_info.assert_called_once_with(2027, 1, 12)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -101,3 +101,18 @@ class TestPasswordCryptoSaltPath(unittest.TestCase):
                 else:
                     os.environ["CRYPTO_SALT_FILE"] = original_salt_path
                 os.chdir(original_cwd)
+
+
+class TestPasswordCryptoFormat(unittest.TestCase):
+    def test_detects_encrypted_passwords_without_decrypting(self):
+        import crypto_utils
+
+        crypto = crypto_utils.password_crypto
+        encrypted = crypto.encrypt_password("secret")
+
+        with patch.object(crypto.cipher, "decrypt") as decrypt:
+            self.assertTrue(crypto.is_encrypted(encrypted))
+            self.assertFalse(crypto.is_encrypted("plain-password"))
+            self.assertFalse(crypto.is_encrypted(base64.urlsafe_b64encode(b"not a fernet token").decode()))
+            self.assertFalse(crypto.is_encrypted(""))
+            decrypt.assert_not_called()
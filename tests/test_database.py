@@ -0,0 +1,275 @@
+import tempfile
+import threading
+import unittest
+from datetime import date, timedelta
+from pathlib import Path
+from unittest.mock import patch
+
+import database
+from database import DatabaseManager
+
+
+class DatabaseTestCase(unittest.TestCase):
+    """База данных во временном каталоге, новая для каждого теста"""
+
+    def setUp(self):
+        self._tmp_dir = tempfile.TemporaryDirectory()
+        self.path = str(Path(self._tmp_dir.name) / "test.db")
+        self.db = DatabaseManager(self.path)
+
+    def tearDown(self):
+        self.db.close()
+        self._tmp_dir.cleanup()
+
+
+class TestDatabaseConnectionPool(DatabaseTestCase):
+    def test_reuses_connection_within_thread_and_enables_wal(self):
+        first = self.db.pool.connection()
+        second = self.db.pool.connection()
+
+        self.assertIs(first, second)
+        self.assertEqual("wal", first.execute("PRAGMA journal_mode").fetchone()[0].lower())
+        self.assertEqual(1, first.execute("PRAGMA synchronous").fetchone()[0])  # NORMAL
+
+    def test_uses_separate_connection_per_thread(self):
+        main_conn = self.db.pool.connection()
+        worker_conn = []
+
+        thread = threading.Thread(target=lambda: worker_conn.append(self.db.pool.connection()))
+        thread.start()
+        thread.join()
+
+        self.assertIsNot(main_conn, worker_conn[0])
+        self.assertEqual(2, self.db.get_pool_stats()["created"])
+
+    def test_many_calls_do_not_open_new_connections(self):
+        self.db.subscribe_to_project("PRJ", "Project", "channel", "team", "user", "user@example.com")
+        created_before = self.db.get_pool_stats()["created"]
+
+        for _ in range(50):
+            self.db.get_user_block_info("user@example.com")
+            self.db.get_all_subscriptions()
+
+        stats = self.db.get_pool_stats()
+        self.assertEqual(created_before, stats["created"])
+        self.assertGreaterEqual(stats["reused"], 100)
+
+
+class TestIssueCacheBulkUpdate(DatabaseTestCase):
+    @staticmethod
+    def _row(issue_key, project_key="PRJ", status="Open"):
+        return (
+            issue_key,
+            project_key,
+            "Summary",
+            None,
+            "Не назначен",
+            status,
+            None,
+            1.0,
+            2.0,
+            0.0,
+            f"fp-{status}",
+            "2026-01-01T10:00:00.000+0300",
+        )
+
+    def _cached_keys(self, project_key="PRJ"):
+        conn = self.db.pool.connection()
+        rows = conn.execute("SELECT issue_key FROM issue_cache WHERE project_key = ?", (project_key,)).fetchall()
+        return {key for (key,) in rows}
+
+    def test_writes_snapshot_and_removes_missing_issues(self):
+        self.db.update_issue_cache_many("PRJ", [self._row("PRJ-1"), self._row("PRJ-2"), self._row("PRJ-3")])
+        self.db.update_issue_cache_many("OTHER", [self._row("OTHER-1", "OTHER")])
+
+        self.assertTrue(self.db.update_issue_cache_many("PRJ", [self._row("PRJ-1", status="Done"), self._row("PRJ-3")]))
+
+        self.assertEqual({"PRJ-1", "PRJ-3"}, self._cached_keys())
+        self.assertEqual({"OTHER-1"}, self._cached_keys("OTHER"))
+        status = (
+            self.db.pool.connection().execute("SELECT status FROM issue_cache WHERE issue_key = 'PRJ-1'").fetchone()
+        )
+        self.assertEqual("Done", status[0])
+
+    def test_keeps_missing_issues_for_partial_snapshot(self):
+        self.db.update_issue_cache_many("PRJ", [self._row("PRJ-1"), self._row("PRJ-2")])
+
+        self.db.update_issue_cache_many("PRJ", [self._row("PRJ-2")], remove_missing=False)
+
+        self.assertEqual({"PRJ-1", "PRJ-2"}, self._cached_keys())
+
+    def test_keep_keys_protects_unchanged_issues_from_removal(self):
+        self.db.update_issue_cache_many("PRJ", [self._row("PRJ-1"), self._row("PRJ-2"), self._row("PRJ-3")])
+
+        self.db.update_issue_cache_many("PRJ", [self._row("PRJ-1", status="Done")], keep_keys=["PRJ-2"])
+
+        self.assertEqual({"PRJ-1", "PRJ-2"}, self._cached_keys())
+        state = {row[0]: (row[9], row[10]) for row in self.db.get_cached_issues("PRJ")}
+        self.assertEqual("fp-Done", state["PRJ-1"][0])
+        self.assertEqual("fp-Open", state["PRJ-2"][0])
+        self.assertIsNotNone(state["PRJ-2"][1])
+
+    def test_get_cached_issues_returns_rule_fields(self):
+        self.db.update_issue_cache_many("PRJ", [self._row("PRJ-1", status="Done")])
+
+        (row,) = self.db.get_cached_issues("PRJ")
+
+        self.assertEqual(("PRJ-1", "Summary", None, "Не назначен", "Done", None, 1.0, 2.0, 0.0, "fp-Done"), row[:10])
+        self.assertEqual("2026-01-01T10:00:00.000+0300", row[11])
+        self.assertEqual([], self.db.get_cached_issues("OTHER"))
+
+
+class TestIssueSyncState(DatabaseTestCase):
+    def test_missing_state(self):
+        self.assertIsNone(self.db.get_issue_sync_state("PRJ"))
+
+    def test_incremental_sync_keeps_last_full_sync(self):
+        self.db.save_issue_sync_state("PRJ", "owner@example.com", "2026-01-01 09:00:00", full_sync=True)
+        self.db.save_issue_sync_state("PRJ", "owner@example.com", "2026-01-02 09:00:00", full_sync=False)
+
+        self.assertEqual(
+            ("owner@example.com", "2026-01-02 09:00:00", "2026-01-01 09:00:00"), self.db.get_issue_sync_state("PRJ")
+        )
+
+    def test_full_sync_moves_both_watermarks(self):
+        self.db.save_issue_sync_state("PRJ", "owner@example.com", "2026-01-01 09:00:00", full_sync=True)
+        self.db.save_issue_sync_state("PRJ", "other@example.com", "2026-01-08 09:00:00", full_sync=True)
+
+        self.assertEqual(
+            ("other@example.com", "2026-01-08 09:00:00", "2026-01-08 09:00:00"), self.db.get_issue_sync_state("PRJ")
+        )
+
+
+class TestSubscriptionRegistry(DatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+        self.db.subscribe_to_project("PRJ", "Project", "channel-1", "team", "user", "owner@example.com")
+        self.db.subscribe_to_project("PRJ", "Project", "channel-2", "team", "user", "other@example.com")
+        self.db.subscribe_to_project("OPS", "Ops", "channel-1", "team", "user", "ops@example.com")
+
+    def test_lookups_are_served_from_a_single_load(self):
+        for _ in range(20):
+            self.assertEqual("owner@example.com", self.db.subscriptions.get("PRJ", "channel-1").subscribed_by_email)
+            self.assertEqual(2, len(self.db.subscriptions.by_project("PRJ")))
+            self.assertEqual({"PRJ", "OPS"}, {s.project_key for s in self.db.subscriptions.by_channel("channel-1")})
+
+        self.assertEqual(["OPS", "PRJ", "PRJ"], [s.project_key for s in self.db.subscriptions.all()])
+        self.assertEqual(1, self.db.subscriptions.get_stats()["loads"])
+
+    def test_changes_invalidate_registry(self):
+        self.assertIsNotNone(self.db.subscriptions.get("PRJ", "channel-2"))
+
+        self.db.unsubscribe_from_project("PRJ", "channel-2")
+        self.assertIsNone(self.db.subscriptions.get("PRJ", "channel-2"))
+
+        self.db.delete_subscription_by_id("OPS", "channel-1")
+        self.assertEqual([], [s for s in self.db.subscriptions.by_channel("channel-1") if s.project_key == "OPS"])
+
+        self.db.subscribe_to_project("NEW", "New", "channel-3", "team", "user", "new@example.com")
+        self.assertEqual("new@example.com", self.db.subscriptions.get("NEW", "channel-3").subscribed_by_email)
+
+
+class TestJiraSettingsCache(DatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+        self.db.save_user_jira_settings("user@example.com", "u1", "jira-user", "secret")
+
+    def test_decrypts_once_per_ttl_window(self):
+        crypto = database.password_crypto
+        with (
+            patch.object(crypto, "decrypt_password", wraps=crypto.decrypt_password) as decrypt,
+            patch.object(crypto, "is_encrypted", wraps=crypto.is_encrypted) as is_encrypted,
+        ):
+            for _ in range(5):
+                self.assertEqual(("u1", "jira-user", "secret", 0), self.db.get_user_jira_settings("user@example.com"))
+
+        self.assertEqual(1, decrypt.call_count)
+        self.assertEqual(1, is_encrypted.call_count)
+
+    def test_test_result_is_patched_and_changes_invalidate(self):
+        self.db.get_user_jira_settings("user@example.com")
+        self.db.update_jira_test_result("user@example.com", True)
+        self.assertEqual(1, self.db.get_user_jira_settings("user@example.com")[3])
+
+        self.db.save_user_jira_settings("user@example.com", "u1", "jira-user", "new-secret")
+        self.assertEqual("new-secret", self.db.get_user_jira_settings("user@example.com")[2])
+
+        self.db.delete_user_jira_settings("user@example.com")
+        self.assertIsNone(self.db.get_user_jira_settings("user@example.com"))
+
+
+class TestBlockedUsers(DatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+        self.db.save_user_jira_settings("user@example.com", "u1", "jira-user", "secret")
+
+    def test_block_state_follows_writes_without_queries(self):
+        self.assertEqual((1, True), self.db.increment_connection_attempts("user@example.com", "HTTP 401"))
+
+        with patch.object(self.db.pool, "connection", side_effect=AssertionError("запрос к БД")):
+            self.assertTrue(self.db.is_user_blocked("user@example.com"))
+            self.assertFalse(self.db.is_user_blocked("other@example.com"))
+
+        self.db.update_jira_test_result("user@example.com", False)
+        self.assertTrue(self.db.is_user_blocked("user@example.com"))
+        self.db.update_jira_test_result("user@example.com", True)
+        self.assertFalse(self.db.is_user_blocked("user@example.com"))
+
+        self.db.increment_connection_attempts("user@example.com")
+        self.db.reset_connection_attempts("user@example.com")
+        self.assertFalse(self.db.is_user_blocked("user@example.com"))
+
+    def test_block_state_is_loaded_at_startup(self):
+        self.db.increment_connection_attempts("user@example.com")
+        self.db.close()
+
+        self.db = DatabaseManager(self.path)
+
+        self.assertTrue(self.db.is_user_blocked("user@example.com"))
+        self.assertEqual(1, self.db.get_user_block_info("user@example.com")[0])
+
+
+class TestNotificationHistoryCompaction(DatabaseTestCase):
+    def _insert(self, issue_key, days_ago, notification_type="time_exceeded"):
+        notification_date = (date.today() - timedelta(days=days_ago)).isoformat()
+        self.db.apply_write_batch(
+            [
+                (
+                    "PRJ",
+                    issue_key,
+                    notification_type,
+                    None,
+                    "Имя",
+                    "channel",
+                    "Summary",
+                    1.0,
+                    2.0,
+                    None,
+                    notification_date,
+                )
+            ],
+            [],
+        )
+
+    def _count(self, table):
+        return self.db.pool.connection().execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+    def test_rolls_old_rows_into_daily_stats(self):
+        self._insert("PRJ-1", 100)
+        self._insert("PRJ-2", 100)
+        self._insert("PRJ-1", 1)
+
+        archived, _ = self.db.compact_notification_history(90)
+
+        self.assertEqual(2, archived)
+        self.assertEqual(1, self._count("notification_history"))
+        self.assertEqual(2, self.db.pool.connection().execute("PRAGMA auto_vacuum").fetchone()[0])
+
+        # Повторная компактация добавляет к существующему агрегату
+        self._insert("PRJ-3", 100)
+        self.db.compact_notification_history(90)
+
+        stats = self.db.get_notification_stats(120)
+        old_date = (date.today() - timedelta(days=100)).isoformat()
+        self.assertIn((old_date, "PRJ", "time_exceeded", 3), stats)
+        self.assertEqual(2, len(stats))
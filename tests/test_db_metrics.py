@@ -0,0 +1,71 @@
+import sqlite3
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from database import DatabaseManager
+
+
+class TestDatabaseMetrics(unittest.TestCase):
+    def setUp(self):
+        self._tmp_dir = tempfile.TemporaryDirectory()
+        self.db = DatabaseManager(str(Path(self._tmp_dir.name) / "test.db"))
+        self.db.metrics.reset()
+
+    def tearDown(self):
+        self.db.close()
+        self._tmp_dir.cleanup()
+
+    def _method_stats(self, method):
+        return next(item for item in self.db.get_db_metrics() if item["method"] == method)
+
+    def test_records_calls_latency_and_rows(self):
+        self.db.subscribe_to_project("PRJ", "Project", "channel", "team", "user", "user@example.com")
+        self.db.subscribe_to_project("OPS", "Ops", "channel", "team", "user", "user@example.com")
+        for _ in range(3):
+            self.db.get_all_subscriptions()
+
+        subscribe = self._method_stats("subscribe_to_project")
+        self.assertEqual(2, subscribe["calls"])
+        self.assertEqual(2, subscribe["rows"])
+
+        read = self._method_stats("get_all_subscriptions")
+        self.assertEqual(3, read["calls"])
+        self.assertEqual(6, read["rows"])
+        self.assertGreater(read["total_ms"], 0)
+        self.assertGreater(read["p95_ms"], 0)
+
+        self.assertNotIn("get_pool_stats", {item["method"] for item in self.db.get_db_metrics()})
+
+    def test_logs_slow_calls_without_arguments(self):
+        self.db.metrics.slow_query_ms = 0.0001
+
+        with self.assertLogs("db.slow_queries", level="WARNING") as logs:
+            self.db.save_user_jira_settings("user@example.com", "u1", "jira-user", "top-secret")
+
+        self.assertIn("save_user_jira_settings", logs.output[0])
+        self.assertNotIn("top-secret", "".join(logs.output))
+        self.assertEqual(1, self._method_stats("save_user_jira_settings")["slow"])
+
+    def test_instrumentation_does_not_count_pool_checkouts(self):
+        self.db.get_all_subscriptions()
+        reused_before = self.db.get_pool_stats()["reused"]
+
+        for _ in range(5):
+            self.db.get_all_subscriptions()
+
+        # Одна выдача подключения на вызов метода: замер затронутых строк пул не использует
+        self.assertEqual(reused_before + 5, self.db.get_pool_stats()["reused"])
+
+    def test_counts_handled_failures_as_errors(self):
+        self.db.get_all_subscriptions()
+        with patch.object(self.db.pool, "connection", side_effect=sqlite3.OperationalError("disk I/O error")):
+            self.assertEqual([], self.db.get_all_subscriptions())
+
+        read = self._method_stats("get_all_subscriptions")
+        self.assertEqual((2, 1), (read["calls"], read["errors"]))
+
+
+if __name__ == "__main__":
+    unittest.main()
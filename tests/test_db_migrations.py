@@ -0,0 +1,62 @@
+import sqlite3
+import tempfile
+import unittest
+from pathlib import Path
+
+from database import DatabaseManager
+from db_migrations import LATEST_VERSION, column_exists, get_schema_version, migrate
+
+
+class TestSchemaMigrations(unittest.TestCase):
+    def setUp(self):
+        self._tmp_dir = tempfile.TemporaryDirectory()
+        self.db_path = str(Path(self._tmp_dir.name) / "test.db")
+
+    def tearDown(self):
+        self._tmp_dir.cleanup()
+
+    def test_fresh_database_is_migrated_to_latest_version(self):
+        db = DatabaseManager(self.db_path)
+        try:
+            self.assertEqual(LATEST_VERSION, db.get_schema_version())
+            indexes = {
+                row[0] for row in db.pool.connection().execute("SELECT name FROM sqlite_master WHERE type = 'index'")
+            }
+            self.assertIn("idx_issue_project", indexes)
+        finally:
+            db.close()
+
+    def test_warm_start_runs_no_ddl(self):
+        DatabaseManager(self.db_path).close()
+
+        conn = sqlite3.connect(self.db_path)
+        statements = []
+        conn.set_trace_callback(statements.append)
+        try:
+            self.assertEqual(0, migrate(conn))
+        finally:
+            conn.close()
+
+        self.assertEqual(["PRAGMA user_version"], statements)
+
+    def test_legacy_database_without_version_keeps_data(self):
+        conn = sqlite3.connect(self.db_path)
+        conn.execute(
+            "CREATE TABLE user_jira_settings (id INTEGER PRIMARY KEY AUTOINCREMENT, user_email TEXT UNIQUE NOT NULL, "
+            "user_id TEXT NOT NULL, jira_username TEXT NOT NULL, jira_password TEXT NOT NULL)"
+        )
+        conn.execute(
+            "INSERT INTO user_jira_settings (user_email, user_id, jira_username, jira_password) "
+            "VALUES ('user@example.com', 'u1', 'user', 'secret')"
+        )
+        conn.commit()
+
+        self.assertEqual(LATEST_VERSION, migrate(conn))
+        self.assertEqual(LATEST_VERSION, get_schema_version(conn))
+        self.assertTrue(column_exists(conn.cursor(), "user_jira_settings", "is_blocked"))
+        self.assertEqual(1, conn.execute("SELECT COUNT(*) FROM user_jira_settings").fetchone()[0])
+        conn.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,111 @@
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from database import DatabaseManager
+from db_writer import DatabaseWriter
+
+
+class TestDatabaseWriter(unittest.TestCase):
+    def setUp(self):
+        self._tmp_dir = tempfile.TemporaryDirectory()
+        self.db = DatabaseManager(str(Path(self._tmp_dir.name) / "test.db"))
+        self.writer = DatabaseWriter(self.db, flush_interval=0.05)
+
+    def tearDown(self):
+        self.writer.stop()
+        self.db.close()
+        self._tmp_dir.cleanup()
+
+    def _count(self, table):
+        return self.db.pool.connection().execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+    @staticmethod
+    def _cache_row(issue_key, status="Open"):
+        return (issue_key, "PRJ", "Summary", None, "Не назначен", status, None, 1.0, 2.0, 0.0, f"fp-{status}", None)
+
+    def _save_notification(self, issue_key, notification_type="time_exceeded", actual_hours=2.0):
+        self.writer.save_notification(
+            "PRJ", issue_key, notification_type, None, "Не назначен", "channel", "Summary", 1.0, actual_hours
+        )
+
+    def test_flush_writes_queued_notifications_and_cache(self):
+        self._save_notification("PRJ-1")
+        self._save_notification("PRJ-2", "deadline_overdue")
+        self.writer.update_issue_cache_many("PRJ", [self._cache_row("PRJ-1"), self._cache_row("PRJ-2")])
+
+        self.assertTrue(self.writer.flush())
+
+        self.assertEqual(2, self._count("notification_history"))
+        self.assertEqual(2, self._count("issue_cache"))
+
+    def test_coalesces_duplicate_notifications_in_batch(self):
+        self._save_notification("PRJ-1", actual_hours=2.0)
+        self._save_notification("PRJ-1", actual_hours=3.0)
+
+        self.writer.flush()
+
+        rows = self.db.pool.connection().execute("SELECT actual_hours FROM notification_history").fetchall()
+        self.assertEqual([(3.0,)], rows)
+
+    def test_cache_operations_are_applied_in_order(self):
+        self.writer.update_issue_cache_many("PRJ", [self._cache_row("PRJ-1"), self._cache_row("PRJ-2")])
+        self.writer.update_issue_cache(*self._cache_row("PRJ-2", status="Done"))
+        self.writer.update_issue_cache_many("PRJ", [self._cache_row("PRJ-2", status="Closed")])
+
+        self.writer.flush()
+
+        rows = self.db.pool.connection().execute("SELECT issue_key, status FROM issue_cache").fetchall()
+        self.assertEqual([("PRJ-2", "Closed")], rows)
+
+    def test_flush_reports_failed_batches(self):
+        mark = self.writer.failure_mark()
+        with patch.object(self.db, "apply_write_batch", return_value=False):
+            self.writer.update_issue_cache_many("PRJ", [self._cache_row("PRJ-1")])
+            self.writer.flush()
+            # Пакет уже записан неудачно до вызова flush: отметка since все равно его учитывает
+            self.assertFalse(self.writer.flush(since=mark))
+
+        self.assertEqual(1, self.writer.get_stats()["failed_batches"])
+        self.writer.update_issue_cache_many("PRJ", [self._cache_row("PRJ-1")])
+        self.assertTrue(self.writer.flush())
+
+    def test_stop_drains_queue_and_later_writes_are_synchronous(self):
+        self._save_notification("PRJ-1")
+        self.writer.stop()
+        self.assertEqual(1, self._count("notification_history"))
+
+        self._save_notification("PRJ-2")
+        self.assertEqual(2, self._count("notification_history"))
+        self.assertEqual(1, self.writer.get_stats()["sync_writes"])
+
+    def test_stop_waits_for_write_being_queued(self):
+        self._save_notification("PRJ-1")  # запускает фоновый поток
+        entered, release = threading.Event(), threading.Event()
+        original_put = self.writer._queue.put
+
+        def slow_put(item, *args, **kwargs):
+            # Операция прошла проверку остановки, но в очередь еще не попала
+            if item[0] == "notification":
+                entered.set()
+                release.wait(5)
+            return original_put(item, *args, **kwargs)
+
+        with patch.object(self.writer._queue, "put", side_effect=slow_put):
+            submitter = threading.Thread(target=self._save_notification, args=("PRJ-2",))
+            submitter.start()
+            self.assertTrue(entered.wait(5))
+            stopper = threading.Thread(target=self.writer.stop)
+            stopper.start()
+            stopper.join(0.2)
+            self.assertTrue(stopper.is_alive())
+
+            release.set()
+            submitter.join(5)
+            stopper.join(5)
+
+        self.assertFalse(stopper.is_alive())
+        self.assertEqual(2, self._count("notification_history"))
+        self.assertEqual(0, self.writer.get_stats()["queued"])
@@ -0,0 +1,97 @@
+import unittest
+from datetime import date
+
+from issue_snapshot import IssueSnapshot, format_jira_datetime
+
+CLOSED = frozenset({"Done", "Закрыто"})
+
+
+def _raw_issue(**fields):
+    return {
+        "key": "PRJ-7",
+        "fields": {
+            "summary": "Отчет",
+            "status": {"name": "Done", "statusCategory": {"key": "done"}},
+            "assignee": {"displayName": "Иван Петров", "emailAddress": "ivan@example.com", "avatarUrls": {}},
+            "issuetype": {"name": "Task"},
+            "duedate": "2026-10-01",
+            "created": "2026-09-01T10:00:00.000+0300",
+            "updated": "2026-10-15T18:45:12.345+0300",
+            "timeoriginalestimate": 7200,
+            "timespent": 9000,
+            "timeestimate": None,
+            **fields,
+        },
+        "changelog": {
+            "histories": [
+                {"created": "2026-10-10T09:00:00.000+0300", "items": [{"field": "assignee", "toString": "Иван"}]},
+                {"created": "2026-10-14T23:30:00.000+0300", "items": [{"field": "status", "toString": "Done"}]},
+                {"created": "2026-10-15T18:45:12.345+0300", "items": [{"field": "status", "toString": "Закрыто"}]},
+            ]
+        },
+    }
+
+
+class TestIssueSnapshot(unittest.TestCase):
+    def test_from_json_preparses_fields(self):
+        issue = IssueSnapshot.from_json(_raw_issue(), CLOSED)
+
+        self.assertEqual("PRJ-7", issue.key)
+        self.assertTrue(issue.is_closed)
+        self.assertEqual(("Иван Петров", "ivan@example.com"), (issue.assignee_name, issue.assignee_email))
+        self.assertEqual((2.0, 2.5, 0.0), (issue.original_hours, issue.spent_hours, issue.remaining_hours))
+        self.assertEqual(date(2026, 10, 1), issue.due_date)
+        self.assertEqual(date(2026, 9, 1), issue.created)
+        # Первое закрытие по истории, дата по календарю сервера
+        self.assertEqual(date(2026, 10, 14), issue.closed_on)
+        self.assertTrue(issue.changelog_loaded)
+        self.assertEqual("2026-10-15T18:45:12.345+0300", format_jira_datetime(issue.updated))
+        self.assertFalse(hasattr(issue, "__dict__"))
+
+    def test_statuses_and_assignees_are_interned(self):
+        first = IssueSnapshot.from_json(_raw_issue(), CLOSED)
+        second = IssueSnapshot.from_json(_raw_issue(status={"name": "".join(["Do", "ne"])}), CLOSED)
+
+        self.assertIs(first.status, second.status)
+        self.assertIs(first.assignee_name, second.assignee_name)
+
+    def test_unassigned_issue_without_changelog(self):
+        raw = _raw_issue(assignee=None, status={"name": "Open"})
+        del raw["changelog"]
+
+        issue = IssueSnapshot.from_json(raw, CLOSED)
+
+        self.assertIsNone(issue.assignee_name)
+        self.assertEqual("Не назначен", issue.assignee_label)
+        self.assertFalse(issue.is_closed)
+        self.assertFalse(issue.changelog_loaded)
+        self.assertIsNone(issue.closed_on)
+
+    def test_cache_row_round_trip(self):
+        row = (
+            "PRJ-7",
+            "Отчет",
+            None,
+            "Не назначен",
+            "Закрыто",
+            "2026-10-01",
+            2.0,
+            2.5,
+            0.5,
+            "fingerprint",
+            "2026-10-15 15:45:12",
+            "2026-10-15T18:45:12.345+0300",
+        )
+
+        issue = IssueSnapshot.from_cache_row(row, CLOSED)
+
+        self.assertIsNone(issue.assignee_name)
+        self.assertTrue(issue.is_closed)
+        self.assertEqual((2.0, 2.5, 0.5), (issue.original_hours, issue.spent_hours, issue.remaining_hours))
+        self.assertEqual(date(2026, 10, 1), issue.due_date)
+        self.assertEqual(row[-1], format_jira_datetime(issue.updated))
+        self.assertFalse(issue.changelog_loaded)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,91 @@
+import threading
+import time
+import unittest
+from email.utils import formatdate
+
+from jira_governor import AdaptiveLimiter, JiraGovernor, TokenBucket, parse_retry_after
+
+
+class TestAdaptiveLimiter(unittest.TestCase):
+    def test_grows_on_fast_responses_and_halves_on_overload(self):
+        limiter = AdaptiveLimiter(initial=2, max_limit=6, latency_target=1.0, cooldown=60)
+
+        for _ in range(30):
+            limiter.acquire()
+            limiter.release(overloaded=False, latency=0.1)
+        self.assertEqual(6, limiter.limit)
+
+        # Ответы на уже отправленные запросы в пределах cooldown не снижают лимит повторно
+        for _ in range(3):
+            limiter.acquire()
+            limiter.release(overloaded=True, latency=0.1)
+        self.assertEqual(3, limiter.limit)
+        self.assertEqual(1, limiter.decreases)
+
+    def test_slow_response_counts_as_overload(self):
+        limiter = AdaptiveLimiter(initial=4, max_limit=8, latency_target=1.0)
+
+        limiter.acquire()
+        limiter.release(overloaded=False, latency=1.5)
+
+        self.assertEqual(2, limiter.limit)
+
+    def test_blocks_requests_above_limit(self):
+        limiter = AdaptiveLimiter(initial=1, max_limit=1, latency_target=0)
+        limiter.acquire()
+        acquired = threading.Event()
+
+        def worker():
+            limiter.acquire()
+            acquired.set()
+
+        thread = threading.Thread(target=worker)
+        thread.start()
+        self.assertFalse(acquired.wait(0.05))
+
+        limiter.release(overloaded=False, latency=0.0)
+        self.assertTrue(acquired.wait(1))
+        thread.join()
+
+
+class TestTokenBucket(unittest.TestCase):
+    def test_limits_rate_after_burst(self):
+        bucket = TokenBucket(rate=100, burst=2)
+
+        started = time.monotonic()
+        for _ in range(7):
+            bucket.acquire()
+
+        self.assertGreaterEqual(time.monotonic() - started, 0.045)
+
+    def test_pause_delays_all_requests(self):
+        bucket = TokenBucket(rate=0, burst=1)
+        bucket.pause(0.1)
+
+        self.assertGreater(bucket.get_stats()["paused_for"], 0)
+        self.assertGreaterEqual(bucket.acquire(), 0.09)
+
+
+class TestJiraGovernor(unittest.TestCase):
+    def test_retry_after_pauses_host_and_reduces_concurrency(self):
+        governor = JiraGovernor(rate=0, initial_concurrency=4, max_concurrency=8, max_retry_after=30)
+
+        governor.acquire("jira.example.com", "alice")
+        governor.release("jira.example.com", "alice", 429, 0.2, retry_after="120")
+
+        stats = governor.get_stats()
+        self.assertEqual(1, stats["throttled"])
+        self.assertEqual([2], stats["limits"])
+        self.assertTrue(25 < stats["hosts"]["jira.example.com"]["paused_for"] <= 30)
+
+    def test_parse_retry_after(self):
+        now = time.time()
+
+        self.assertEqual(5.0, parse_retry_after("5"))
+        self.assertAlmostEqual(60, parse_retry_after(formatdate(now + 60, usegmt=True), now), delta=1)
+        self.assertIsNone(parse_retry_after("soon"))
+        self.assertIsNone(parse_retry_after(None))
+
+
+if __name__ == "__main__":
+    unittest.main()
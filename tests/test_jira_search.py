@@ -0,0 +1,367 @@
+import json
+import random
+import threading
+import time
+import unittest
+from functools import partial
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+from unittest.mock import patch
+from urllib.parse import parse_qs, urlsplit
+
+from jira import JIRA
+from jira.client import ResultList
+from jira.exceptions import JIRAError
+
+from issue_snapshot import IssueSnapshot
+from jira_search import FETCH_PROFILES, IssueStream, RawSearchClient, split_issues_by_project
+
+
+class FakeJira:
+    def __init__(self, total=0, fail_at=None, keys=None):
+        self.issues = [SimpleNamespace(key=key) for key in keys or [f"PRJ-{i}" for i in range(total)]]
+        self.fail_at = fail_at
+        self.calls = []
+        self.fields_seen = []
+
+    def search_issues(self, jql, startAt=0, maxResults=50, fields=None, expand=None, json_result=False):
+        self.calls.append((startAt, maxResults))
+        self.fields_seen.append(fields)
+        if isinstance(fields, list):
+            # Как настоящий клиент: имена полей переводятся на месте
+            fields.append("translated")
+        if self.fail_at is not None and startAt >= self.fail_at:
+            raise RuntimeError("boom")
+        page = self.issues[startAt : startAt + maxResults]
+        if json_result:
+            issues = [{"key": issue.key, "fields": {"status": {"name": "Open"}}} for issue in page]
+            return {"startAt": startAt, "maxResults": maxResults, "total": len(self.issues), "issues": issues}
+        return ResultList(page, _startAt=startAt, _maxResults=maxResults, _total=len(self.issues))
+
+
+class SlowJira(FakeJira):
+    """Страницы отвечают с задержкой в случайном порядке; одна страница падает один раз"""
+
+    def __init__(self, total, flaky_at=None):
+        super().__init__(total=total)
+        self.flaky_at = flaky_at
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+
+    def search_issues(self, jql, startAt=0, maxResults=50, fields=None, expand=None):
+        with self._lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            flaky = startAt == self.flaky_at
+            if flaky:
+                self.flaky_at = None
+        try:
+            time.sleep(random.uniform(0, 0.01))
+            if flaky:
+                self.calls.append((startAt, maxResults))
+                raise RuntimeError("timeout")
+            return super().search_issues(jql, startAt, maxResults, fields, expand)
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+
+class TestParallelIssueStream(unittest.TestCase):
+    def test_keeps_order_and_respects_concurrency(self):
+        jira = SlowJira(total=1000)
+        stream = IssueStream(jira, "project = PRJ", page_size=50, concurrency=4)
+
+        keys = [issue.key for issue in stream]
+
+        self.assertEqual([f"PRJ-{i}" for i in range(1000)], keys)
+        self.assertTrue(stream.complete)
+        self.assertEqual(20, stream.pages)
+        self.assertLessEqual(jira.max_in_flight, 4)
+        self.assertGreater(jira.max_in_flight, 1)
+
+    @patch("jira_search.time.sleep")
+    def test_retries_failed_page_individually(self, _sleep):
+        jira = SlowJira(total=500, flaky_at=200)
+        stream = IssueStream(jira, "project = PRJ", page_size=50, concurrency=4, retries=1)
+
+        keys = [issue.key for issue in stream]
+
+        self.assertEqual([f"PRJ-{i}" for i in range(500)], keys)
+        self.assertTrue(stream.complete)
+        self.assertEqual(2, sum(1 for call in jira.calls if call[0] == 200))
+        self.assertEqual(1, sum(1 for call in jira.calls if call[0] == 250))
+
+    def test_stops_after_retries_are_exhausted(self):
+        jira = FakeJira(total=500, fail_at=300)
+        stream = IssueStream(jira, "project = PRJ", page_size=50, concurrency=4)
+
+        keys = [issue.key for issue in stream]
+
+        self.assertEqual([f"PRJ-{i}" for i in range(300)], keys)
+        self.assertFalse(stream.complete)
+        self.assertIsInstance(stream.error, RuntimeError)
+
+
+class TestIssueStream(unittest.TestCase):
+    def test_streams_all_pages_beyond_single_request_limit(self):
+        jira = FakeJira(total=250)
+        stream = IssueStream(jira, "project = PRJ", page_size=100)
+
+        keys = [issue.key for issue in stream]
+
+        self.assertEqual(250, len(keys))
+        self.assertEqual(len(set(keys)), len(keys))
+        self.assertEqual([(0, 100), (100, 100), (200, 100)], jira.calls)
+        self.assertTrue(stream.complete)
+        self.assertEqual(250, stream.total)
+
+    def test_fetches_pages_lazily(self):
+        jira = FakeJira(total=250)
+        iterator = iter(IssueStream(jira, "project = PRJ", page_size=100))
+
+        next(iterator)
+
+        self.assertEqual(1, len(jira.calls))
+
+    def test_marks_stream_incomplete_on_page_error(self):
+        jira = FakeJira(total=250, fail_at=100)
+        stream = IssueStream(jira, "project = PRJ", page_size=100)
+
+        self.assertEqual(100, len(list(stream)))
+        self.assertFalse(stream.complete)
+        self.assertIsInstance(stream.error, RuntimeError)
+
+    def test_empty_result(self):
+        stream = IssueStream(FakeJira(total=0), "project = PRJ", page_size=100)
+
+        self.assertEqual([], list(stream))
+        self.assertTrue(stream.complete)
+
+    def test_parse_builds_records_from_json_pages(self):
+        stream = IssueStream(
+            FakeJira(total=150),
+            "project = PRJ",
+            page_size=100,
+            concurrency=2,
+            parse=lambda raw: IssueSnapshot.from_json(raw, frozenset({"Done"})),
+        )
+
+        issues = list(stream)
+
+        self.assertEqual([f"PRJ-{i}" for i in range(150)], [issue.key for issue in issues])
+        self.assertTrue(all(isinstance(issue, IssueSnapshot) and not issue.is_closed for issue in issues))
+        self.assertEqual((150, 2), (stream.total, stream.pages))
+        self.assertTrue(stream.complete)
+
+    def test_passes_fresh_field_list_for_each_page(self):
+        jira = FakeJira(total=150)
+        profile = FETCH_PROFILES["monitor"]
+        stream = IssueStream(jira, "project = PRJ", page_size=100, fields=profile.fields, expand=profile.expand)
+
+        list(stream)
+
+        self.assertEqual(2, len(jira.fields_seen))
+        self.assertIsNot(jira.fields_seen[0], jira.fields_seen[1])
+        self.assertEqual([*profile.fields, "translated"], jira.fields_seen[1])
+
+
+def _raw_issue(number: int) -> dict:
+    status = ("Open", "In Progress", "Done")[number % 3]
+    assignee = None
+    if number % 4:
+        assignee = {"name": f"user{number % 4}", "displayName": f"Пользователь {number % 4}"}
+        assignee["emailAddress"] = f"user{number % 4}@example.com"
+    return {
+        "id": str(10000 + number),
+        "key": f"PRJ-{number}",
+        "fields": {
+            "summary": f"Задача {number}",
+            "status": {"name": status, "id": str(number % 3)},
+            "assignee": assignee,
+            "issuetype": {"name": "Task"},
+            "duedate": f"2026-10-{number % 28 + 1:02d}" if number % 5 else None,
+            "created": "2026-09-01T10:00:00.000+0300",
+            "updated": f"2026-10-15T12:{number % 60:02d}:00.123+0300",
+            "timeoriginalestimate": 3600 * (number % 7) or None,
+            "timespent": 1800 * (number % 11),
+            "timeestimate": 900 * (number % 3),
+        },
+        "changelog": {
+            "histories": [
+                {
+                    "created": "2026-10-10T18:00:00.000+0300",
+                    "items": [{"field": "status", "fromString": "Open", "toString": status}],
+                }
+            ]
+        },
+    }
+
+
+SEARCH_ISSUES = [_raw_issue(number) for number in range(130)]
+
+
+class _SearchHandler(BaseHTTPRequestHandler):
+    """Jira с ответом /rest/api/2/search по startAt/maxResults; запросы записываются в server.requests"""
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        # Библиотека jira передает поля повторяющимся параметром, прямая выборка — списком через запятую
+        query = {key: ",".join(values) for key, values in parse_qs(url.query).items()}
+        self.server.requests.append((url.path, query))
+        if url.path == "/rest/api/2/field":
+            payload = [{"id": "summary", "name": "Summary", "clauseNames": ["summary"]}]
+        elif url.path == "/rest/api/2/search" and query.get("jql") == "broken":
+            self._reply(400, {"errorMessages": ["Ошибка в запросе JQL"]})
+            return
+        elif url.path == "/rest/api/2/search":
+            start_at, max_results = int(query["startAt"]), int(query["maxResults"])
+            issues = []
+            for raw in SEARCH_ISSUES[start_at : start_at + max_results]:
+                issue = {**raw, "fields": {key: raw["fields"][key] for key in query["fields"].split(",")}}
+                if query.get("expand") != "changelog":
+                    issue.pop("changelog")
+                issues.append(issue)
+            payload = {"startAt": start_at, "maxResults": max_results, "total": len(SEARCH_ISSUES), "issues": issues}
+        else:
+            self._reply(404, {})
+            return
+        self._reply(200, payload)
+
+    def _reply(self, status: int, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class TestRawSearchClient(unittest.TestCase):
+    def setUp(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), _SearchHandler)
+        self.server.requests = []
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.jira = JIRA(
+            server=f"http://127.0.0.1:{self.server.server_port}",
+            basic_auth=("user", "secret"),
+            get_server_info=False,
+            max_retries=0,
+        )
+        self.parse = partial(IssueSnapshot.from_json, closed_statuses=frozenset({"Done"}))
+
+    def tearDown(self):
+        self.jira.close()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def _snapshots(self, client, profile):
+        fetch_profile = FETCH_PROFILES[profile]
+        stream = IssueStream(
+            client,
+            "project = PRJ",
+            page_size=50,
+            fields=fetch_profile.fields,
+            expand=fetch_profile.expand,
+            concurrency=2,
+            parse=self.parse,
+        )
+        issues = [{slot: getattr(issue, slot) for slot in IssueSnapshot.__slots__} for issue in stream]
+        self.assertTrue(stream.complete)
+        return issues
+
+    def test_matches_jira_library_search(self):
+        for profile in FETCH_PROFILES:
+            with self.subTest(profile=profile):
+                expected = self._snapshots(self.jira, profile)
+                self.server.requests.clear()
+
+                actual = self._snapshots(RawSearchClient(self.jira), profile)
+
+                self.assertEqual(130, len(actual))
+                self.assertEqual(expected, actual)
+                # Справочник полей (/field) прямой выборке не нужен
+                self.assertEqual(["/rest/api/2/search"] * 3, [path for path, _query in self.server.requests])
+                query = self.server.requests[0][1]
+                self.assertEqual(",".join(FETCH_PROFILES[profile].fields), query["fields"])
+
+    def test_parses_without_orjson(self):
+        with patch("jira_search.orjson", None):
+            actual = self._snapshots(RawSearchClient(self.jira), "analytics")
+
+        self.assertEqual(self._snapshots(self.jira, "analytics"), actual)
+
+    def test_error_response_stops_stream(self):
+        stream = IssueStream(RawSearchClient(self.jira), "broken", parse=self.parse)
+
+        self.assertEqual([], list(stream))
+        self.assertFalse(stream.complete)
+        self.assertIsInstance(stream.error, JIRAError)
+        self.assertEqual(400, stream.error.status_code)
+
+
+class TestFetchProfiles(unittest.TestCase):
+    def test_monitor_profile_skips_changelog_and_keeps_updated(self):
+        profile = FETCH_PROFILES["monitor"]
+
+        self.assertIsNone(profile.expand)
+        self.assertIn("updated", profile.fields)
+        self.assertNotIn("worklog", profile.fields)
+
+    def test_analytics_profile_expands_changelog(self):
+        self.assertEqual("changelog", FETCH_PROFILES["analytics"].expand)
+
+
+class TestSplitIssuesByProject(unittest.TestCase):
+    def test_splits_combined_stream_and_reports_empty_projects(self):
+        jira = FakeJira(keys=["AAA-2", "AAA-1", "BBB-7", "BBB-3", "BBB-1"])
+        stream = IssueStream(jira, "project in (AAA, BBB, CCC)", page_size=2)
+
+        slices = []
+        for project_key, project_issues in split_issues_by_project(stream, ["AAA", "BBB", "CCC"]):
+            slices.append((project_key, [issue.key for issue in project_issues], project_issues))
+            # Пока выборка не закончилась, полнота группы неизвестна
+            self.assertFalse(project_key == "AAA" and project_issues.complete)
+
+        self.assertEqual(
+            [
+                ("AAA", ["AAA-2", "AAA-1"], True),
+                ("BBB", ["BBB-7", "BBB-3", "BBB-1"], True),
+                ("CCC", [], True),
+            ],
+            [(key, keys, project_issues.complete) for key, keys, project_issues in slices],
+        )
+        self.assertEqual(3, len(jira.calls))
+
+    def test_page_error_makes_every_project_incomplete(self):
+        jira = FakeJira(keys=["AAA-2", "AAA-1", "BBB-7", "BBB-3", "BBB-1"], fail_at=4)
+        stream = IssueStream(jira, "project in (AAA, BBB)", page_size=2)
+
+        result = {key: (issues.fetched, issues.complete) for key, issues in self._consume(stream, ["AAA", "BBB"])}
+
+        # Задачи AAA могли прийти еще одной группой на неполученных страницах
+        self.assertEqual({"AAA": (2, False), "BBB": (2, False)}, result)
+
+    def test_repeated_project_group_is_not_full_snapshot(self):
+        jira = FakeJira(keys=["AAA-2", "BBB-1", "AAA-1"])
+        stream = IssueStream(jira, "project in (AAA, BBB)", page_size=10)
+
+        result = [(key, issues.complete) for key, issues in self._consume(stream, ["AAA", "BBB"])]
+
+        self.assertEqual([("AAA", False), ("BBB", True), ("AAA", False)], result)
+
+    @staticmethod
+    def _consume(stream, project_keys):
+        """Прочитать все выборки проектов; полнота читается после окончания совместной выборки"""
+        slices = []
+        for project_key, project_issues in split_issues_by_project(stream, project_keys):
+            list(project_issues)
+            slices.append((project_key, project_issues))
+        return slices
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,89 @@
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+from jira_governor import JiraGovernor
+from jira_transport import JiraTransport
+
+
+class _KeepAliveHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        body = (self.headers.get("Authorization") or "").encode()
+        if self.path == "/busy":
+            self.send_response(503)
+            self.send_header("Retry-After", "1")
+        else:
+            self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class TestJiraTransport(unittest.TestCase):
+    def setUp(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), _KeepAliveHandler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.base_url = f"http://127.0.0.1:{self.server.server_port}"
+        self.transport = JiraTransport(self.base_url, pool_maxsize=4, keepalive_seconds=30)
+
+    def tearDown(self):
+        self.transport.shutdown()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def _session(self, user):
+        session = requests.Session()
+        session.auth = (user, "secret")
+        self.transport.attach(session)
+        return session
+
+    def test_sessions_share_connections_and_keep_their_auth(self):
+        first = self._session("alice")
+        second = self._session("bob")
+
+        responses = [session.get(f"{self.base_url}/rest/api/2/myself") for session in (first, second) * 5]
+
+        self.assertEqual(1, len({response.text for response in responses[::2]}))
+        self.assertEqual(1, len({response.text for response in responses[1::2]}))
+        self.assertNotEqual(responses[0].text, responses[1].text)
+        stats = self.transport.get_stats()
+        self.assertEqual({"sessions": 2, "connections": 1, "requests": 10, "reused": 9}, stats)
+
+    def test_closing_client_session_keeps_shared_pool(self):
+        first = self._session("alice")
+        first.get(f"{self.base_url}/")
+        first.close()
+
+        self._session("bob").get(f"{self.base_url}/")
+
+        self.assertEqual(1, self.transport.get_stats()["connections"])
+
+    def test_governor_sees_every_request_and_retry_after(self):
+        governor = JiraGovernor(rate=0, initial_concurrency=4, max_concurrency=8)
+        transport = JiraTransport(self.base_url, pool_maxsize=4, keepalive_seconds=0, governor=governor)
+        self.addCleanup(transport.shutdown)
+        alice = requests.Session()
+        alice.auth = ("alice", "secret")
+        transport.attach(alice)
+
+        alice.get(f"{self.base_url}/")
+        response = alice.get(f"{self.base_url}/busy")
+
+        self.assertEqual(503, response.status_code)
+        stats = governor.get_stats()
+        self.assertEqual(2, stats["requests"])
+        self.assertEqual(1, stats["throttled"])
+        self.assertEqual(0, stats["in_flight"])
+        self.assertEqual([2], stats["limits"])
+        self.assertGreater(stats["hosts"][f"127.0.0.1:{self.server.server_port}"]["paused_for"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
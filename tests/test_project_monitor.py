@@ -0,0 +1,438 @@
+import itertools
+import re
+import sys
+import tempfile
+import types
+import unittest
+from datetime import UTC, datetime, timedelta
+from pathlib import Path
+from unittest.mock import patch
+
+import database  # noqa: F401 — загружается до подмены sys.modules, чтобы не импортироваться повторно
+from database import DatabaseManager
+from db_writer import DatabaseWriter
+
+with patch.dict(sys.modules, {"mattermost_client": types.SimpleNamespace(mattermost_client=types.SimpleNamespace())}):
+    import project_monitor
+    from project_monitor import ProjectMonitor, ProjectRunPlan
+
+from issue_snapshot import IssueSnapshot, parse_jira_datetime
+from jira_search import IssueStream
+from subscription_registry import Subscription
+
+
+def _jira_time(moment: datetime) -> str:
+    return moment.astimezone().strftime("%Y-%m-%dT%H:%M:%S.000%z")
+
+
+def _issue(number, status, due_date, estimate, spent, updated):
+    # JSON задачи из ответа /search; задача переведена в текущий статус в момент последнего обновления
+    return {
+        "key": f"PRJ-{number}",
+        "fields": {
+            "summary": f"Задача {number}",
+            "status": {"name": status},
+            "assignee": None,
+            "duedate": due_date,
+            "timeoriginalestimate": estimate,
+            "timespent": spent,
+            "updated": _jira_time(updated),
+        },
+        "changelog": {
+            "histories": [{"created": _jira_time(updated), "items": [{"field": "status", "toString": status}]}]
+        },
+    }
+
+
+class _JqlFilter:
+    """
+    Вычисление подмножества JQL, которое строит build_candidate_jql, над JSON задачи —
+    как его выполнил бы сервер Jira (пустое поле не удовлетворяет сравнению)
+    """
+
+    TOKEN = re.compile(r'\s*(?:(\()|(\))|(,)|"((?:[^"\\]|\\.)*)"|(<=|>=|!=|<|>|=)|([\w.-]+))')
+
+    def __init__(self, jql: str, now: datetime):
+        self.now = now
+        self.tokens = []
+        position = 0
+        while position < len(jql.rstrip()):
+            match = self.TOKEN.match(jql, position)
+            if match is None:
+                raise ValueError(f"Неизвестный JQL: {jql[position:]}")
+            position = match.end()
+            lparen, rparen, comma, string, operator, word = match.groups()
+            if string is not None:
+                self.tokens.append(("str", string.replace('\\"', '"').replace("\\\\", "\\")))
+            else:
+                self.tokens.append(("sym", lparen or rparen or comma or operator or word))
+
+    def matches(self, raw: dict) -> bool:
+        self.position = 0
+        result = self._or(raw["fields"])
+        assert self.position == len(self.tokens)
+        return result
+
+    def _next(self):
+        token = self.tokens[self.position]
+        self.position += 1
+        return token
+
+    def _peek(self, value):
+        return self.position < len(self.tokens) and self.tokens[self.position] == ("sym", value)
+
+    def _or(self, fields):
+        result = self._and(fields)
+        while self._peek("OR"):
+            self.position += 1
+            result = self._and(fields) or result
+        return result
+
+    def _and(self, fields):
+        result = self._factor(fields)
+        while self._peek("AND"):
+            self.position += 1
+            result = self._factor(fields) and result
+        return result
+
+    def _factor(self, fields):
+        if self._peek("("):
+            self.position += 1
+            result = self._or(fields)
+            assert self._next() == ("sym", ")")
+            return result
+
+        _, field = self._next()
+        if self._peek("not"):
+            self.position += 2  # not in
+            return (fields["status"] or {}).get("name") not in self._list()
+        _, operator = self._next()
+        _, value = self._next()
+        actual = {
+            "duedate": lambda: fields.get("duedate"),
+            "originalEstimate": lambda: fields.get("timeoriginalestimate"),
+            "timespent": lambda: fields.get("timespent"),
+            "updated": lambda: parse_jira_datetime(fields.get("updated")),
+        }[field]()
+        if actual is None:
+            return False
+        if field == "updated":
+            value = self.now.astimezone() - timedelta(minutes=int(value[1:-1]))
+        elif field != "duedate":
+            value = int(value)
+        return {">": actual > value, ">=": actual >= value, "<=": actual <= value}[operator]
+
+    def _list(self):
+        assert self._next() == ("sym", "(")
+        values = []
+        while True:
+            kind, value = self._next()
+            if kind == "str":
+                values.append(value)
+            elif value == ")":
+                return values
+
+
+class TestCandidateFilter(unittest.TestCase):
+    def setUp(self):
+        self.monitor = ProjectMonitor()
+        self.now = datetime.now()
+        self.server_statuses = {"Open", "In Progress", "Done", "Закрыто", "Отказ от оффера "}
+
+    def _issues(self):
+        today = self.now.date()
+        statuses = ["Open", "In Progress", "Done", "Закрыто", "Отказ от оффера "]
+        due_dates = [None, str(today - timedelta(days=30)), str(today), str(today + timedelta(days=3))]
+        time_tracking = [(0, 0), (3600, 0), (3600, 1800), (3600, 7200), (0, 7200)]
+        updated = [
+            self.now - timedelta(hours=1),
+            self.now - timedelta(days=1),
+            self.now - timedelta(days=2, hours=1),
+            self.now - timedelta(days=40),
+        ]
+        combinations = itertools.product(statuses, due_dates, time_tracking, updated)
+        return [
+            _issue(number, status, due, estimate, spent, moment)
+            for number, (status, due, (estimate, spent), moment) in enumerate(combinations)
+        ]
+
+    def _findings(self, raw_issues):
+        issues = [IssueSnapshot.from_json(raw, self.monitor.closed_status_set) for raw in raw_issues]
+        return {
+            (issue.key, rule)
+            for issue in issues
+            for rule, check in (
+                ("time_exceeded", self.monitor.check_time_exceeded),
+                ("deadline_overdue", self.monitor.check_deadline_overdue),
+            )
+            if check(issue)
+        }
+
+    def test_candidate_jql_gives_same_findings_as_full_scan(self):
+        raw_issues = self._issues()
+        jql = _JqlFilter(self.monitor.build_candidate_jql(self.server_statuses, self.now), self.now)
+
+        candidates = [raw for raw in raw_issues if jql.matches(raw)]
+
+        self.assertTrue(self._findings(raw_issues))
+        self.assertEqual(self._findings(raw_issues), self._findings(candidates))
+        # Долго закрытые задачи и задачи без оснований для уведомлений не загружаются
+        self.assertLess(len(candidates), len(raw_issues) // 2)
+
+    def test_candidate_jql_lists_only_server_statuses(self):
+        jql = self.monitor.build_candidate_jql({"Open", "Done", "Закрыто"}, datetime(2026, 10, 16, 9, 30))
+
+        self.assertEqual(
+            '(duedate <= "2026-10-16" AND status not in ("Done", "Закрыто")) OR '
+            '(originalEstimate > 0 AND timespent > 0 AND (status not in ("Done", "Закрыто") OR updated >= "-3451m"))',
+            jql,
+        )
+
+    def test_unknown_server_statuses_disable_filter(self):
+        self.assertIsNone(self.monitor.build_candidate_jql(None))
+
+
+class _CompleteStream(list):
+    """Полностью полученная выборка задач (как IssueStream после итерации)"""
+
+    complete = True
+    pages = 1
+
+    @property
+    def fetched(self):
+        return len(self)
+
+    total = fetched
+
+
+class TestProcessProjectIssues(unittest.TestCase):
+    def test_failed_issue_is_kept_in_full_snapshot(self):
+        monitor = ProjectMonitor()
+        now = datetime.now()
+        issues = [
+            IssueSnapshot.from_json(_issue(number, "Open", None, 0, 0, now), monitor.closed_status_set)
+            for number in range(3)
+        ]
+        stream = _CompleteStream(issues)
+        build_row = monitor.build_issue_cache_row
+
+        def failing_build(issue, project_key):
+            if issue.key == "PRJ-1":
+                raise ValueError("broken issue")
+            return build_row(issue, project_key)
+
+        with (
+            patch.object(project_monitor, "db_manager") as db_manager,
+            patch.object(project_monitor, "db_writer") as db_writer,
+            patch.object(monitor, "build_issue_cache_row", side_effect=failing_build),
+            patch.object(monitor, "check_issue", return_value=0),
+        ):
+            db_manager.get_cached_issues.return_value = []
+            monitor.process_project_issues("PRJ", ["channel"], "user@example.com", stream, None, now.astimezone())
+
+        _project_key, rows = db_writer.update_issue_cache_many.call_args.args
+        kwargs = db_writer.update_issue_cache_many.call_args.kwargs
+        self.assertEqual(["PRJ-0", "PRJ-2"], [row[0] for row in rows])
+        self.assertTrue(kwargs["remove_missing"])
+        self.assertIn("PRJ-1", kwargs["keep_keys"])
+
+    def test_failed_check_of_queued_issue_is_counted_once(self):
+        monitor = ProjectMonitor()
+        now = datetime.now()
+        issues = [IssueSnapshot.from_json(_issue(1, "Open", None, 0, 0, now), monitor.closed_status_set)]
+
+        with (
+            patch.object(project_monitor, "db_manager") as db_manager,
+            patch.object(project_monitor, "db_writer") as db_writer,
+            patch.object(monitor, "check_issue", side_effect=ValueError("broken rule")),
+        ):
+            db_manager.get_cached_issues.return_value = []
+            monitor.process_project_issues(
+                "PRJ", ["channel"], "user@example.com", _CompleteStream(issues), None, now.astimezone()
+            )
+
+        _project_key, rows = db_writer.update_issue_cache_many.call_args.args
+        self.assertEqual(["PRJ-1"], [row[0] for row in rows])
+        self.assertEqual([], list(db_writer.update_issue_cache_many.call_args.kwargs["keep_keys"]))
+
+
+class TestPlanRun(unittest.TestCase):
+    def test_shares_results_only_between_same_jira_accounts(self):
+        monitor = ProjectMonitor()
+        settings = {
+            "alice@example.com": ("u1", "alice", "secret", 1),
+            "alice.work@example.com": ("u2", "Alice", "secret", 1),
+            "bob@example.com": ("u3", "bob", "secret", 1),
+        }
+        subscriptions = [
+            Subscription("PRJ", "Project", channel, None, email, None)
+            for channel, email in (
+                ("c1", "alice@example.com"),
+                ("c2", "alice.work@example.com"),
+                ("c3", "bob@example.com"),
+                ("c4", "carol@example.com"),
+                ("c5", "alice@example.com"),
+            )
+        ]
+
+        with patch.object(project_monitor, "db_manager") as db_manager:
+            db_manager.get_issue_sync_state.return_value = None
+            db_manager.get_user_jira_settings.side_effect = settings.get
+            (plan,) = monitor.plan_run(subscriptions)
+
+        self.assertEqual("alice@example.com", plan.fetcher_email)
+        self.assertEqual(["c1", "c2", "c5"], plan.channel_ids)
+        self.assertEqual(["c3", "c4"], [subscription.channel_id for subscription in plan.separate])
+
+
+class TestMonitorAllProjects(unittest.TestCase):
+    def test_skips_blocked_subscribers_regardless_of_email_case(self):
+        monitor = ProjectMonitor()
+        subscriptions = [
+            Subscription("PRJ", "Project", "c1", None, " Alice@Example.com", None),
+            Subscription("OPS", "Operations", "c2", None, "bob@example.com", None),
+        ]
+        monday = types.SimpleNamespace(today=lambda: datetime(2026, 10, 12).date())
+
+        with (
+            patch.object(project_monitor, "date", monday),
+            patch.object(project_monitor, "calendar_client") as calendar_client,
+            patch.object(project_monitor, "db_manager") as db_manager,
+            patch.object(monitor, "plan_run", return_value=[]) as plan_run,
+        ):
+            calendar_client.is_working_day.return_value = True
+            db_manager.is_holiday.return_value = False
+            db_manager.subscriptions.all.return_value = subscriptions
+            db_manager.is_user_blocked.side_effect = {"alice@example.com"}.__contains__
+            monitor.monitor_all_projects()
+
+        plan_run.assert_called_once_with(subscriptions[1:])
+
+
+class TestIncrementalSync(unittest.TestCase):
+    def setUp(self):
+        self._tmp_dir = tempfile.TemporaryDirectory()
+        self.db = DatabaseManager(str(Path(self._tmp_dir.name) / "test.db"))
+        self.writer = DatabaseWriter(self.db, flush_interval=0.05)
+        self.monitor = ProjectMonitor()
+        self.now = datetime.now(UTC).replace(microsecond=0)
+        self.checked = []
+        for patcher in (
+            patch.object(project_monitor, "db_manager", self.db),
+            patch.object(project_monitor, "db_writer", self.writer),
+            patch.object(project_monitor.config, "JIRA_FULL_RESYNC_HOURS", 168),
+            patch.object(project_monitor.config, "JIRA_SYNC_OVERLAP_MINUTES", 15),
+            patch.object(self.monitor, "check_issue", side_effect=self._check_issue),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        self.writer.stop()
+        self.db.close()
+        self._tmp_dir.cleanup()
+
+    def _check_issue(self, issue, project_key, channel_ids, user_email):
+        self.checked.append((issue.key, issue.status))
+        return 0
+
+    def _snapshot(self, number, status="Open"):
+        return IssueSnapshot.from_json(_issue(number, status, None, 0, 0, self.now), self.monitor.closed_status_set)
+
+    def _save_sync(self, minutes_ago, full_hours_ago, user_email="owner@example.com"):
+        synced = (self.now - timedelta(minutes=minutes_ago)).strftime("%Y-%m-%d %H:%M:%S")
+        full = (self.now - timedelta(hours=full_hours_ago)).strftime("%Y-%m-%d %H:%M:%S")
+        self.db.save_issue_sync_state("PRJ", user_email, full, full_sync=True)
+        self.db.save_issue_sync_state("PRJ", user_email, synced, full_sync=False)
+        return synced, full
+
+    def _cached_statuses(self):
+        return {row[0]: row[4] for row in self.db.get_cached_issues("PRJ")}
+
+    def test_incremental_window(self):
+        self.assertIsNone(self.monitor.get_incremental_window("PRJ", "owner@example.com", self.now))
+
+        self._save_sync(minutes_ago=30, full_hours_ago=24)
+        self.assertEqual(31 + 15, self.monitor.get_incremental_window("PRJ", "owner@example.com", self.now))
+        # Кеш заполнен с правами другого подписчика
+        self.assertIsNone(self.monitor.get_incremental_window("PRJ", "other@example.com", self.now))
+
+        self._save_sync(minutes_ago=30, full_hours_ago=200)
+        self.assertIsNone(self.monitor.get_incremental_window("PRJ", "owner@example.com", self.now))
+
+    def test_merges_window_into_cache_and_advances_watermark(self):
+        cached = [self.monitor.build_issue_cache_row(self._snapshot(number), "PRJ") for number in (1, 2)]
+        self.db.update_issue_cache_many("PRJ", cached)
+        _synced, full = self._save_sync(minutes_ago=30, full_hours_ago=24)
+
+        changed = _CompleteStream([self._snapshot(2, "In Progress"), self._snapshot(3)])
+        self.monitor.process_project_issues("PRJ", ["channel"], "owner@example.com", changed, 46, self.now)
+
+        # Задачи окна проверены по свежим данным, остальные — по кешу
+        self.assertEqual({("PRJ-1", "Open"), ("PRJ-2", "In Progress"), ("PRJ-3", "Open")}, set(self.checked))
+        self.assertEqual({"PRJ-1": "Open", "PRJ-2": "In Progress", "PRJ-3": "Open"}, self._cached_statuses())
+        self.assertEqual(
+            ("owner@example.com", self.now.strftime("%Y-%m-%d %H:%M:%S"), full), self.db.get_issue_sync_state("PRJ")
+        )
+
+    def test_failed_write_keeps_watermark(self):
+        self.db.update_issue_cache_many("PRJ", [self.monitor.build_issue_cache_row(self._snapshot(1), "PRJ")])
+        synced, full = self._save_sync(minutes_ago=30, full_hours_ago=24)
+
+        with patch.object(self.db, "apply_write_batch", return_value=False):
+            changed = _CompleteStream([self._snapshot(1, "In Progress")])
+            self.monitor.process_project_issues("PRJ", ["channel"], "owner@example.com", changed, 46, self.now)
+
+        # Изменение не записано: следующее окно начнется с прошлой точки и снова загрузит задачу
+        self.assertEqual({"PRJ-1": "Open"}, self._cached_statuses())
+        self.assertEqual(("owner@example.com", synced, full), self.db.get_issue_sync_state("PRJ"))
+
+    def _run_batch(self, keys):
+        raws = [{**_issue(0, "Open", None, 0, 0, self.now), "key": key} for key in keys]
+        jira = types.SimpleNamespace(
+            search_issues=lambda jql, startAt, maxResults, fields, expand, json_result: {
+                "startAt": startAt,
+                "maxResults": maxResults,
+                "total": len(raws),
+                "issues": raws[startAt : startAt + maxResults],
+            }
+        )
+        stream = IssueStream(
+            jira, "project in (AAA, BBB)", page_size=2, parse=lambda raw: IssueSnapshot.from_json(raw, frozenset())
+        )
+        planned = {key: ProjectRunPlan(key, "owner@example.com", ["channel"], []) for key in ("AAA", "BBB")}
+        with patch.object(project_monitor.user_jira_client, "get_projects_issues", return_value=stream):
+            self.monitor._monitor_project_batch("owner@example.com", ["AAA", "BBB"], planned, None, self.now)
+
+    def _cache_project(self, project_key, keys):
+        rows = [
+            self.monitor.build_issue_cache_row(
+                IssueSnapshot.from_json({**_issue(0, "Open", None, 0, 0, self.now), "key": key}, frozenset()),
+                project_key,
+            )
+            for key in keys
+        ]
+        self.db.update_issue_cache_many(project_key, rows)
+
+    def test_batch_prunes_cache_after_stream_ends(self):
+        self._cache_project("AAA", ["AAA-1", "AAA-9"])
+
+        self._run_batch(["AAA-1", "AAA-2", "BBB-1"])
+
+        self.assertEqual({"AAA-1", "AAA-2"}, {row[0] for row in self.db.get_cached_issues("AAA")})
+        self.assertIsNotNone(self.db.get_issue_sync_state("AAA"))
+        self.assertIsNotNone(self.db.get_issue_sync_state("BBB"))
+
+    def test_repeated_project_group_keeps_cache_and_watermark(self):
+        self._cache_project("AAA", ["AAA-1", "AAA-9"])
+
+        # Задачи AAA пришли двумя группами: первая группа не должна считаться полным снимком
+        self._run_batch(["AAA-2", "BBB-1", "AAA-1"])
+
+        self.assertEqual({"AAA-1", "AAA-2", "AAA-9"}, {row[0] for row in self.db.get_cached_issues("AAA")})
+        self.assertIsNone(self.db.get_issue_sync_state("AAA"))
+        self.assertIsNotNone(self.db.get_issue_sync_state("BBB"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,88 @@
+import sys
+import types
+import unittest
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import database  # noqa: F401 — загружается до подмены sys.modules, чтобы не импортироваться повторно
+
+with patch.dict(sys.modules, {"mattermost_client": types.SimpleNamespace(mattermost_client=None)}):
+    import user_jira_client
+    from user_jira_client import UserJiraClient
+
+
+def _response(status_code):
+    return SimpleNamespace(
+        status_code=status_code,
+        ok=status_code < 400,
+        reason="Unauthorized",
+        headers={"X-Seraph-LoginReason": "AUTHENTICATED_FAILED"},
+    )
+
+
+class TestDeferredCredentialValidation(unittest.TestCase):
+    def setUp(self):
+        patcher = patch.object(user_jira_client, "db_manager")
+        self.db = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.db.is_user_blocked.return_value = False
+        self.db.get_user_jira_settings.return_value = ("user-id", "jdoe", "secret", False)
+        self.db.increment_connection_attempts.return_value = (1, True)
+        self.client = UserJiraClient(max_cache_size=5, idle_ttl_seconds=0)
+
+    def test_client_is_created_without_requests_or_database_writes(self):
+        with patch.object(user_jira_client, "JIRA") as jira_cls:
+            jira_cls.return_value._session = MagicMock(hooks={"response": []})
+
+            first = self.client.get_jira_client("User@Example.com")
+            second = self.client.get_jira_client("user@example.com")
+
+        self.assertIs(first, second)
+        self.assertFalse(jira_cls.call_args.kwargs["get_server_info"])
+        first.current_user.assert_not_called()
+        self.db.update_jira_test_result.assert_not_called()
+        self.assertEqual(1, len(first._session.hooks["response"]))
+
+    def test_evicted_client_stays_usable_by_its_holder(self):
+        with patch.object(user_jira_client, "JIRA") as jira_cls:
+            jira_cls.side_effect = lambda **kwargs: MagicMock(_session=MagicMock(hooks={"response": []}))
+            in_use = self.client.get_jira_client("user@example.com")
+
+            self.client.clear_user_cache("user@example.com")
+            for number in range(6):
+                self.client.get_jira_client(f"user{number}@example.com")
+
+        in_use.close.assert_not_called()
+        self.assertIsNotNone(in_use._session)
+
+    def test_first_success_confirms_credentials_once(self):
+        hook = self.client._make_credentials_hook("user@example.com", validated=False)
+
+        for _ in range(3):
+            hook(_response(200))
+
+        self.db.update_jira_test_result.assert_called_once_with("user@example.com", True)
+
+    def test_already_validated_credentials_are_not_rewritten(self):
+        hook = self.client._make_credentials_hook("user@example.com", validated=True)
+
+        hook(_response(200))
+
+        self.db.update_jira_test_result.assert_not_called()
+
+    def test_unauthorized_response_feeds_blocking_logic_once(self):
+        hook = self.client._make_credentials_hook("user@example.com", validated=True)
+
+        with patch.object(self.client, "_notify_user_about_block") as notify:
+            hook(_response(401))
+            hook(_response(401))
+
+        self.db.increment_connection_attempts.assert_called_once_with(
+            "user@example.com", "HTTP 401 AUTHENTICATED_FAILED"
+        )
+        notify.assert_called_once_with("user@example.com", 1)
+        self.db.update_jira_test_result.assert_called_once_with("user@example.com", False)
+
+
+if __name__ == "__main__":
+    unittest.main()
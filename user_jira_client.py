@@ -3,12 +3,20 @@
 """
 
 import logging
+import threading
+from collections.abc import Iterable
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 
 from jira import JIRA
 from jira.exceptions import JIRAError
 
+from cache_utils import LRUCache, TTLCache
 from config import config
 from database import db_manager
+from issue_snapshot import IssueSnapshot
+from jira_search import FETCH_PROFILES, IssueStream, RawSearchClient
+from jira_transport import jira_transport
 
 logger = logging.getLogger(__name__)
 
@@ -21,10 +29,19 @@ except ImportError:
 
 
 class UserJiraClient:
-    def __init__(self, max_cache_size: int = 50):
-        self.jira_instances = {}  # Кеш подключений для разных пользователей
+    def __init__(self, max_cache_size: int = 50, idle_ttl_seconds: float | None = None):
+        # Кеш подключений для разных пользователей. Вытесненные и простаивающие клиенты только удаляются из кеша:
+        # клиент может еще использоваться другим потоком (параллельная выборка, аналитика), а его соединения
+        # принадлежат общему пулу jira_transport, поэтому сессия не закрывается
+        self.jira_instances = LRUCache(
+            max_size=max_cache_size,
+            idle_ttl_seconds=config.JIRA_CLIENT_IDLE_TTL if idle_ttl_seconds is None else idle_ttl_seconds,
+        )
         self.max_cache_size = max_cache_size
-        self.cache_access_order = []  # Для LRU кеша
+        # Имена статусов сервера Jira меняются редко: список нужен для JQL-фильтров по статусу
+        self.status_names_cache = TTLCache(ttl_seconds=3600, max_size=1)
+        # Списки проектов пользователей {ключ: название}: команда list_projects и проверка ключа при подписке
+        self.project_catalog_cache = TTLCache(ttl_seconds=config.JIRA_PROJECT_CATALOG_TTL, max_size=max_cache_size)
 
     def get_jira_client(self, user_email: str) -> JIRA | None:
         """Получить клиент Jira для конкретного пользователя"""
@@ -41,9 +58,9 @@ class UserJiraClient:
             return None
 
         # Проверяем кеш
-        if user_email in self.jira_instances:
-            self._update_cache_access(user_email)
-            return self.jira_instances[user_email]
+        jira_client = self.jira_instances.get(user_email)
+        if jira_client is not None:
+            return jira_client
 
         # Получаем настройки пользователя
         settings = db_manager.get_user_jira_settings(user_email)
@@ -51,25 +68,25 @@ class UserJiraClient:
             logger.warning(f"Настройки Jira не найдены для пользователя {user_email}")
             return None
 
-        _user_id, jira_username, jira_password, _last_test_success = settings
+        _user_id, jira_username, jira_password, last_test_success = settings
 
         try:
-            # Создаем подключение с персональными настройками
+            # Создаем подключение без запросов к серверу: учетные данные проверит первый настоящий запрос
             jira_client = JIRA(
                 server=config.JIRA_URL,
                 basic_auth=(jira_username, jira_password),
                 options={"verify": config.JIRA_VERIFY_SSL, "timeout": 30},
+                get_server_info=False,
+            )
+            # Запросы идут через общий пул соединений; авторизация остается в сессии пользователя
+            jira_transport.attach(jira_client._session)
+            jira_client._session.hooks["response"].append(
+                self._make_credentials_hook(user_email, bool(last_test_success))
             )
-
-            # Тестируем подключение
-            current_user = jira_client.current_user()
-            logger.info(f"Успешное подключение к Jira для {user_email} как {current_user}")
 
             # Кешируем подключение
-            self._add_to_cache(user_email, jira_client)
-
-            # Обновляем результат теста (сбрасывает счетчик попыток)
-            db_manager.update_jira_test_result(user_email, True)
+            self.jira_instances.set(user_email, jira_client)
+            logger.info(f"Создано подключение к Jira для {user_email}")
 
             return jira_client
 
@@ -84,22 +101,11 @@ class UserJiraClient:
             )
 
             if is_auth_error:
-                logger.warning(f"Ошибка аутентификации для {user_email}: {error_message}")
-                # Блокируем пользователя сразу при первой ошибке аутентификации
-                attempts, was_blocked = db_manager.increment_connection_attempts(user_email, error_message)
-
-                if was_blocked:
-                    # Отправляем уведомление пользователю о блокировке
-                    self._notify_user_about_block(user_email, attempts)
-                    logger.error(
-                        f"Пользователь {user_email} заблокирован - неправильный пароль Jira. "
-                        f"Проверки приостановлены до смены пароля."
-                    )
+                self._handle_auth_failure(user_email, error_message)
             else:
                 # Другие ошибки не считаем как попытки аутентификации
                 logger.error(f"Ошибка подключения к Jira для {user_email}: {error_message}")
-
-            db_manager.update_jira_test_result(user_email, False)
+                db_manager.update_jira_test_result(user_email, False)
             return None
 
         except Exception as e:
@@ -109,6 +115,56 @@ class UserJiraClient:
             db_manager.update_jira_test_result(user_email, False)
             return None
 
+    def _make_credentials_hook(self, user_email: str, validated: bool):
+        """
+        Хук ответов сессии клиента: 401 на любой запрос передается в логику блокировки,
+        первый успешный ответ подтверждает учетные данные (запись в БД — только если раньше проверка не проходила).
+        """
+        state = {"validated": validated, "failed": False}
+        lock = threading.Lock()
+
+        def hook(response, *args, **kwargs):
+            if response.status_code == 401:
+                with lock:
+                    # Параллельные запросы страниц могут получить 401 одновременно: учитываем один раз
+                    if state["failed"]:
+                        return response
+                    state["failed"] = True
+                reason = response.headers.get("X-Seraph-LoginReason") or response.reason
+                self._handle_auth_failure(user_email, f"HTTP 401 {reason}")
+            elif response.ok and not state["validated"]:
+                with lock:
+                    if state["validated"]:
+                        return response
+                    state["validated"] = True
+                # Сбрасывает счетчик попыток подключения
+                db_manager.update_jira_test_result(user_email, True)
+                logger.info(f"Учетные данные Jira пользователя {user_email} подтверждены")
+            return response
+
+        return hook
+
+    def _handle_auth_failure(self, user_email: str, error_message: str):
+        """
+        Ошибка аутентификации: передать ошибку в логику блокировки.
+        Клиент из кеша не удаляется — он может использоваться параллельными запросами;
+        заблокированному пользователю get_jira_client его не выдает, а смена пароля очищает кеш.
+        """
+        logger.warning(f"Ошибка аутентификации для {user_email}: {error_message}")
+
+        # Блокируем пользователя сразу при первой ошибке аутентификации
+        attempts, was_blocked = db_manager.increment_connection_attempts(user_email, error_message)
+
+        if was_blocked:
+            # Отправляем уведомление пользователю о блокировке
+            self._notify_user_about_block(user_email, attempts)
+            logger.error(
+                f"Пользователь {user_email} заблокирован - неправильный пароль Jira. "
+                f"Проверки приостановлены до смены пароля."
+            )
+
+        db_manager.update_jira_test_result(user_email, False)
+
     def _notify_user_about_block(self, user_email: str, attempts: int):
         """Отправить уведомление пользователю о блокировке подключения"""
         if not mattermost_client:
@@ -140,8 +196,7 @@ class UserJiraClient:
         """Тестировать подключение к Jira для пользователя"""
         try:
             # Очищаем кеш для принудительного переподключения
-            if user_email in self.jira_instances:
-                del self.jira_instances[user_email]
+            self.jira_instances.invalidate(user_email.strip().lower())
 
             jira_client = self.get_jira_client(user_email)
 
@@ -160,8 +215,9 @@ class UserJiraClient:
 
     def clear_user_cache(self, user_email: str):
         """Очистить кеш подключения для пользователя"""
-        if user_email in self.jira_instances:
-            del self.jira_instances[user_email]
+        user_email = user_email.strip().lower()
+        self.project_catalog_cache.invalidate(user_email)
+        if self.jira_instances.invalidate(user_email):
             logger.info(f"Кеш подключения очищен для {user_email}")
 
     def get_project_info(self, user_email: str, project_key: str) -> tuple[str, str] | None:
@@ -177,45 +233,194 @@ class UserJiraClient:
             logger.error(f"Ошибка получения информации о проекте {project_key}: {e}")
             return None
 
-    def get_project_issues(self, user_email: str, project_key: str, max_results: int = 200) -> list | None:
-        """Получить задачи проекта"""
+    def get_cached_project_catalog(self, user_email: str) -> dict[str, str] | None:
+        """Закешированный список проектов пользователя {ключ: название} без запросов к Jira"""
+        return self.project_catalog_cache.get(user_email.strip().lower())
+
+    def get_project_catalog(self, user_email: str) -> dict[str, str] | None:
+        """
+        Проекты, доступные пользователю: {ключ: название}. Кешируется на JIRA_PROJECT_CATALOG_TTL.
+        Первая страница /project/search сообщает total, остальные страницы запрашиваются параллельно.
+        """
+        user_email = user_email.strip().lower()
+        cached = self.project_catalog_cache.get(user_email)
+        if cached is not None:
+            return cached
+
+        jira_client = self.get_jira_client(user_email)
+        if not jira_client:
+            return None
+
+        try:
+            pages = self._fetch_project_pages(jira_client)
+            catalog = {data["key"]: data.get("name", "") for page in pages for data in page if data.get("key")}
+            logger.info(f"Получено {len(catalog)} проектов за {len(pages)} страниц для {user_email}")
+        except Exception as api_error:
+            # Если постраничный API не сработал, используем стандартный метод
+            logger.warning(f"Не удалось получить проекты через API, используем стандартный метод: {api_error}")
+            try:
+                catalog = {project.key: project.name for project in jira_client.projects()}
+            except Exception as e:
+                logger.error(f"Ошибка получения проектов для {user_email}: {e}")
+                return None
+
+        self.project_catalog_cache.set(user_email, catalog)
+        return catalog
+
+    @staticmethod
+    def _fetch_project_pages(jira_client: JIRA, page_size: int = 50) -> list[list[dict]]:
+        """Все страницы /rest/api/2/project/search (только ключ и название, без expand)"""
+        url = jira_client._options["server"] + "/rest/api/2/project/search"
+
+        def fetch_page(start_at: int) -> tuple[list[dict], bool | None, int | None]:
+            response = jira_client._session.get(url, params={"startAt": start_at, "maxResults": page_size})
+            response.raise_for_status()
+            payload = response.json()
+            # /project/search возвращает {"values": [...], ...}, но для совместимости поддерживаем и список
+            if isinstance(payload, dict):
+                return payload.get("values", []), payload.get("isLast"), payload.get("total")
+            return payload, None, None
+
+        values, is_last, total = fetch_page(0)
+        pages = [values]
+        if not values or is_last is True:
+            return pages
+
+        if total is not None:
+            # Количество известно: оставшиеся страницы запрашиваются параллельно, шаг — фактический размер страницы
+            offsets = range(len(values), total, len(values))
+            with ThreadPoolExecutor(
+                max_workers=max(1, config.JIRA_PAGE_CONCURRENCY), thread_name_prefix="jira-projects"
+            ) as executor:
+                pages.extend(page for page, _, _ in executor.map(fetch_page, offsets))
+            return pages
+
+        # Сервер не сообщил total: идем по страницам последовательно до последней
+        start_at = len(values)
+        while len(values) >= page_size:
+            values, is_last, _ = fetch_page(start_at)
+            if not values:
+                break
+            pages.append(values)
+            if is_last is True:
+                break
+            start_at += len(values)
+        return pages
+
+    def get_project_issues(
+        self,
+        user_email: str,
+        project_key: str,
+        profile: str = "monitor",
+        page_size: int | None = None,
+        updated_within_minutes: int | None = None,
+        jql_filter: str | None = None,
+        closed_statuses: Iterable[str] = (),
+    ) -> IssueStream | None:
+        """
+        Получить задачи проекта постраничным потоком записей IssueSnapshot (все задачи, без ограничения количества).
+        profile — набор запрашиваемых полей из FETCH_PROFILES ("monitor", "analytics").
+        closed_statuses — статусы, которые потребитель считает закрытыми (IssueSnapshot.is_closed, closed_on).
+        updated_within_minutes — только задачи, измененные за последние N минут (инкрементальная синхронизация).
+        jql_filter — дополнительное условие JQL (отбор кандидатов на сервере Jira).
+        Страницы запрашиваются по мере итерации; после нее stream.complete показывает, получена ли выборка целиком.
+        """
+        jira_client = self.get_jira_client(user_email)
+        if not jira_client:
+            return None
+
+        fetch_profile = FETCH_PROFILES[profile]
+        jql = f'project = "{project_key}"'
+        if updated_within_minutes is not None:
+            # Относительное время считается на сервере Jira: не зависит от часовых поясов бота и пользователя
+            jql += f' AND updated >= "-{int(updated_within_minutes)}m"'
+        if jql_filter:
+            jql += f" AND ({jql_filter})"
+        # Стабильный порядок: при сортировке по updated задача, измененная во время выборки,
+        # переходит между страницами startAt и пропускается или читается дважды
+        jql += " ORDER BY key ASC"
+        return IssueStream(
+            RawSearchClient(jira_client) if config.JIRA_RAW_SEARCH else jira_client,
+            jql,
+            page_size=page_size or config.JIRA_PAGE_SIZE,
+            fields=fetch_profile.fields,
+            expand=fetch_profile.expand,
+            concurrency=config.JIRA_PAGE_CONCURRENCY,
+            retries=config.JIRA_PAGE_RETRIES,
+            parse=partial(IssueSnapshot.from_json, closed_statuses=frozenset(closed_statuses)),
+        )
+
+    def get_status_names(self, user_email: str) -> set[str] | None:
+        """Имена всех статусов сервера Jira (None — не удалось получить)"""
+        status_names = self.status_names_cache.get("statuses")
+        if status_names is not None:
+            return status_names
+
         jira_client = self.get_jira_client(user_email)
         if not jira_client:
             return None
 
         try:
-            jql = f'project = "{project_key}" ORDER BY updated DESC'
-            issues = jira_client.search_issues(jql, maxResults=max_results, expand="changelog,worklog")
-            return issues
+            status_names = {status.name for status in jira_client.statuses()}
         except Exception as e:
-            logger.error(f"Ошибка получения задач проекта {project_key}: {e}")
+            logger.error(f"Ошибка получения списка статусов Jira: {e}")
             return None
 
-    def _add_to_cache(self, user_email: str, jira_client):
-        """Добавить подключение в кеш с управлением размером"""
-        # Если кеш полный, удаляем самый старый элемент
-        if len(self.jira_instances) >= self.max_cache_size:
-            oldest_email = self.cache_access_order.pop(0)
-            if oldest_email in self.jira_instances:
-                del self.jira_instances[oldest_email]
-                logger.debug(f"Удален из кеша старый клиент для {oldest_email}")
+        self.status_names_cache.set("statuses", status_names)
+        return status_names
+
+    def get_projects_issues(
+        self,
+        user_email: str,
+        project_keys: list[str],
+        profile: str = "monitor",
+        page_size: int | None = None,
+        updated_within_minutes: int | None = None,
+        closed_statuses: Iterable[str] = (),
+    ) -> IssueStream | None:
+        """
+        Получить задачи нескольких проектов одной постраничной выборкой ("project in (...)") записями IssueSnapshot.
+        Задачи упорядочены по проекту: поток делится на проекты через jira_search.split_issues_by_project.
+        """
+        jira_client = self.get_jira_client(user_email)
+        if not jira_client:
+            return None
 
-        self.jira_instances[user_email] = jira_client
-        self.cache_access_order.append(user_email)
+        fetch_profile = FETCH_PROFILES[profile]
+        projects = ", ".join(f'"{project_key}"' for project_key in project_keys)
+        jql = f"project in ({projects})"
+        if updated_within_minutes is not None:
+            jql += f' AND updated >= "-{int(updated_within_minutes)}m"'
+        # Внутри проекта — стабильный порядок по ключу (см. get_project_issues)
+        jql += " ORDER BY project ASC, key ASC"
+        return IssueStream(
+            RawSearchClient(jira_client) if config.JIRA_RAW_SEARCH else jira_client,
+            jql,
+            page_size=page_size or config.JIRA_PAGE_SIZE,
+            fields=fetch_profile.fields,
+            expand=fetch_profile.expand,
+            concurrency=config.JIRA_PAGE_CONCURRENCY,
+            retries=config.JIRA_PAGE_RETRIES,
+            parse=partial(IssueSnapshot.from_json, closed_statuses=frozenset(closed_statuses)),
+        )
+
+    def get_issue_changelog(self, user_email: str, issue_key: str) -> dict | None:
+        """Загрузить историю изменений задачи в JSON (для выборок без expand=changelog)"""
+        jira_client = self.get_jira_client(user_email)
+        if not jira_client:
+            return None
 
-    def _update_cache_access(self, user_email: str):
-        """Обновить порядок доступа в кеше (LRU)"""
-        if user_email in self.cache_access_order:
-            self.cache_access_order.remove(user_email)
-        self.cache_access_order.append(user_email)
+        try:
+            return jira_client.issue(issue_key, fields="status", expand="changelog").raw.get("changelog")
+        except Exception as e:
+            logger.error(f"Ошибка получения истории изменений задачи {issue_key}: {e}")
+            return None
 
     def get_cache_stats(self) -> dict:
-        """Получить статистику кеша"""
-        return {
-            "size": len(self.jira_instances),
-            "max_size": self.max_cache_size,
-            "users": list(self.jira_instances.keys()),
-        }
+        """Получить статистику кеша подключений (размер, попадания, промахи, вытеснения, истекшие по простою)"""
+        # Простаивающие клиенты удаляются и при сборе статистики, не дожидаясь следующего обращения
+        self.jira_instances.cleanup()
+        return {**self.jira_instances.get_stats(), "users": self.jira_instances.keys()}
 
 
 # Глобальный экземпляр